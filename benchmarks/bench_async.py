@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+# Times AsyncLinkedList handing items to many waiting consumer tasks, against asyncio.Queue. The producer adds the
+# items in batches: with AsyncLinkedList, either one extend() per batch or one add_tail() per item; asyncio.Queue has
+# no bulk add, so it gets one put_nowait() per item.
+#
+# Run with:
+#   python benchmarks/bench_async.py --consumers 10000 --items 200000 --batch 1000
+
+import argparse
+import asyncio
+import time
+
+from linked_list_pkg import AsyncLinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of AsyncLinkedList with many consumers.')
+parser.add_argument("--consumers", help="Number of consumer tasks", type=int, default=10000)
+parser.add_argument("--items", help="Total number of items", type=int, default=200000)
+parser.add_argument("--batch", help="Items added per batch", type=int, default=1000)
+args = parser.parse_args()
+
+async def run(kind):
+    if kind == "queue":
+        q = asyncio.Queue()
+    else:
+        q = AsyncLinkedList()
+    consumed = [0]
+
+    async def _consume():
+        while True:
+            item = await (q.get() if kind == "queue" else q.pop_head())
+            if item is None:
+                return
+            consumed[0] = consumed[0] + 1
+
+    async def _consume_batches():
+        while True:
+            items = await q.pop_many(100)
+            if not items:
+                return
+            consumed[0] = consumed[0] + len(items)
+
+    consumer = _consume_batches if kind == "pop_many" else _consume
+    tasks = [asyncio.ensure_future(consumer()) for n in range(args.consumers)]
+    await asyncio.sleep(0) # let every consumer start waiting
+    start = time.perf_counter()
+    batch = list(range(1, args.batch + 1))
+    for n in range(args.items // args.batch):
+        if kind == "queue":
+            for item in batch:
+                q.put_nowait(item)
+        elif kind == "add_tail":
+            for item in batch:
+                q.add_tail_nowait(item)
+        else:
+            await q.extend(batch)
+        await asyncio.sleep(0) # let consumers run between batches
+    while consumed[0] < args.items // args.batch * args.batch:
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    if kind == "queue":
+        for n in range(args.consumers): q.put_nowait(None)
+    else:
+        q.close()
+    await asyncio.gather(*tasks)
+    return elapsed
+
+print("{} consumers, {} items in batches of {}".format(args.consumers, args.items, args.batch))
+for kind, label in (("extend", "AsyncLinkedList extend"), ("add_tail", "AsyncLinkedList add_tail"),
+                    ("pop_many", "AsyncLinkedList extend, pop_many(100)"), ("queue", "asyncio.Queue put_nowait")):
+    elapsed = asyncio.run(run(kind))
+    print("  {:40s} {:.3f} s  ({:.0f} items/s)".format(label, elapsed, args.items / elapsed))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+# Times the batch functions get_items_at, set_items_at and remove_at, and slice reads, assignments and deletions,
+# against the same work done one index at a time.
+#
+# Run with:
+#   python benchmarks/bench_batch.py --size 1000000 --counts 100,1000,10000
+
+import argparse
+import random
+import time
+
+from linked_list_pkg import LinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of batched LinkedList access.')
+parser.add_argument("--size", help="Size of the list", type=int, default=1000000)
+parser.add_argument("--counts", help="Comma-separated numbers of indices per batch", type=str, default="100,1000,10000")
+parser.add_argument("--seed", help="A seed for random number generation", type=int, default=1)
+parser.add_argument("--modes", help="Comma-separated index modes", type=str, default="cache,tree")
+args = parser.parse_args()
+
+def time_it(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+rand = random.Random(args.seed)
+for mode in args.modes.split(","):
+    ll = LinkedList(range(args.size), index_mode=mode)
+    for count in [int(c) for c in args.counts.split(",")]:
+        print("\nindex mode = {}, size = {}, indices = {}".format(mode, args.size, count))
+        indices = [rand.randrange(ll.size()) for i in range(count)]
+
+        def _get_loop():
+            return [ll.get_item(idx) for idx in indices]
+        print("  get_item loop:   {:.4f} s".format(time_it(_get_loop)))
+        print("  get_items_at:    {:.4f} s".format(time_it(lambda: ll.get_items_at(indices))))
+        print("  set_items_at:    {:.4f} s".format(time_it(lambda: ll.set_items_at(indices, indices))))
+
+        def _remove_loop():
+            # Highest index first, so the others don't shift
+            for idx in sorted(set(indices), reverse=True):
+                ll.remove(idx)
+        print("  remove loop:     {:.4f} s".format(time_it(_remove_loop)))
+        ll.extend(range(len(set(indices))))
+        print("  remove_at:       {:.4f} s".format(time_it(lambda: ll.remove_at(indices))))
+        ll.extend(range(len(set(indices))))
+
+        start_idx = rand.randrange(ll.size() - count)
+        print("  get_item loop over a slice: {:.4f} s".format(
+            time_it(lambda: [ll.get_item(idx) for idx in range(start_idx, start_idx + count)])))
+        print("  slice read:                 {:.4f} s".format(time_it(lambda: ll[start_idx:start_idx + count])))
+        print("  slice read, step 3:         {:.4f} s".format(time_it(lambda: ll[start_idx:start_idx + 3 * count:3])))
+
+        def _remove_range_loop():
+            for idx in range(count):
+                ll.remove(start_idx)
+        print("  remove loop over a slice:   {:.4f} s".format(time_it(_remove_range_loop)))
+        print("  slice assignment (insert):  {:.4f} s".format(
+            time_it(lambda: ll.__setitem__(slice(start_idx, start_idx), range(count)))))
+
+        def _del_slice():
+            del ll[start_idx:start_idx + count]
+        print("  slice deletion:             {:.4f} s".format(time_it(_del_slice)))
+        ll.extend(range(count))
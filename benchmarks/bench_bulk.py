@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+# Times bulk additions and copying against the same work done one item at a time with add_tail, and bulk removals
+# (remove_if(), remove_all(), dedupe()) against loops of find_item() or get_item() and remove().
+#
+# Run with:
+#   python benchmarks/bench_bulk.py --size 1000000 --batch 100000
+
+import argparse
+import time
+
+from linked_list_pkg import LinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of bulk LinkedList operations.')
+parser.add_argument("--size", help="Size of the list the batch is added to", type=int, default=1000000)
+parser.add_argument("--batch", help="Number of items per batch", type=int, default=100000)
+parser.add_argument("--modes", help="Comma-separated index modes", type=str, default="cache,tree")
+args = parser.parse_args()
+
+def time_it(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+batch = list(range(args.batch))
+for mode in args.modes.split(","):
+    print("\nindex mode = {}, size = {}, batch = {}".format(mode, args.size, args.batch))
+    ll = LinkedList(range(args.size), index_mode=mode)
+
+    def _add_tail_loop():
+        for item in batch:
+            ll.add_tail(item)
+    print("  add_tail loop:   {:.3f} s".format(time_it(_add_tail_loop)))
+    print("  extend:          {:.3f} s".format(time_it(lambda: ll.extend(batch))))
+    print("  extend_head:     {:.3f} s".format(time_it(lambda: ll.extend_head(batch))))
+    print("  insert_many:     {:.3f} s".format(time_it(lambda: ll.insert_many(ll.size() // 2, batch))))
+
+    batch_ll = LinkedList(batch, index_mode=mode)
+
+    def _copy_by_add_tail():
+        new_list = LinkedList(index_mode=mode)
+        for item in batch_ll:
+            new_list.add_tail(item)
+    print("  copy by add_tail: {:.3f} s".format(time_it(_copy_by_add_tail)))
+    print("  copy():           {:.3f} s".format(time_it(batch_ll.copy)))
+
+    # Every tenth item goes: by index, one at a time, or with one remove_if()
+    def _remove_loop():
+        idx = 0
+        while idx < batch_ll.size():
+            if batch_ll.get_item(idx) % 10 == 0:
+                batch_ll.remove(idx)
+            else:
+                idx = idx + 1
+    print("  get_item/remove loop: {:.3f} s".format(time_it(_remove_loop)))
+    batch_ll = LinkedList(batch, index_mode=mode)
+    print("  remove_if:            {:.3f} s".format(time_it(lambda: batch_ll.remove_if(lambda item: item % 10 == 0))))
+
+    # Every copy of one value goes, 1 in 100 items
+    def _find_remove_loop():
+        idx = 0
+        while True:
+            try:
+                idx = batch_ll.find_item(0, idx)
+            except (ValueError, IndexError):
+                break
+            batch_ll.remove(idx)
+    batch_ll = LinkedList([item % 100 for item in batch], index_mode=mode)
+    print("  find_item/remove loop: {:.3f} s".format(time_it(_find_remove_loop)))
+    batch_ll = LinkedList([item % 100 for item in batch], index_mode=mode)
+    print("  remove_all:            {:.3f} s".format(time_it(lambda: batch_ll.remove_all(0))))
+    print("  dedupe:                {:.3f} s".format(time_it(batch_ll.dedupe)))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+# Times a queue with a lot of churn: a list kept at about --queue items, with bursts of add_tail() calls each followed
+# by as many pop_head() calls. It runs with and without a node pool, in each index mode. For each run, shows the
+# operations per second, the nodes allocated per add (the rest came from the pool) and per second, the number of
+# garbage collections of the youngest generation (which allocations trigger), and latency percentiles for single calls.
+#
+# Run with:
+#   python benchmarks/bench_churn.py --queue 1000 --ops 1000000 --burst 64 --pools 0,1024
+
+import argparse
+import gc
+import time
+
+from linked_list_pkg import LinkedList
+
+parser = argparse.ArgumentParser(description='Churn benchmark of LinkedList, with and without a node pool.')
+parser.add_argument("--queue", help="Number of items kept in the queue", type=int, default=1000)
+parser.add_argument("--ops", help="Number of adds (and as many pops) timed", type=int, default=200000)
+parser.add_argument("--burst", help="Number of adds in a row, before as many pops", type=int, default=64)
+parser.add_argument("--pools", help="Comma-separated node pool sizes", type=str, default="0,1024")
+parser.add_argument("--modes", help="Comma-separated index modes", type=str, default="cache,tree")
+args = parser.parse_args()
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def run(mode, pool):
+    ll = LinkedList(range(args.queue), index_mode=mode, node_pool=pool)
+    add_tail, pop_head = ll.add_tail, ll.pop_head
+    clock = time.perf_counter_ns
+    latencies = []
+    record = latencies.append
+    rounds = max(1, args.ops // args.burst)
+    burst = range(args.burst)
+    stats_before = ll.node_pool_stats()
+    collections_before = gc.get_stats()[0]['collections']
+    start = time.perf_counter()
+    for r in range(rounds):
+        for i in burst:
+            t = clock()
+            add_tail(i)
+            record(clock() - t)
+        for i in burst:
+            t = clock()
+            pop_head()
+            record(clock() - t)
+    elapsed = time.perf_counter() - start
+    collections = gc.get_stats()[0]['collections'] - collections_before
+    adds = rounds * args.burst
+    stats = ll.node_pool_stats()
+    # Without a pool, misses aren't counted: every add allocates
+    allocated = stats['misses'] - stats_before['misses'] if pool > 0 else adds
+    latencies.sort()
+    return {"ops/s": 2 * adds / elapsed, "allocs/add": allocated / adds, "allocs/s": allocated / elapsed,
+            "gen0 GCs": collections,
+            "p50 us": percentile(latencies, 0.5) / 1000, "p99 us": percentile(latencies, 0.99) / 1000,
+            "max us": latencies[-1] / 1000}
+
+print("queue = {}, ops = {}, burst = {}".format(args.queue, args.ops, args.burst))
+for mode in args.modes.split(","):
+    for pool in [int(p) for p in args.pools.split(",")]:
+        results = run(mode, pool)
+        print("  {:5s} pool {:6d}  ".format(mode, pool) + "  ".join(
+            "{}: {:.3f}".format(k, v) if isinstance(v, float) else "{}: {}".format(k, v) for k, v in results.items()))
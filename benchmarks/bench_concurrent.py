@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+# Multi-threaded throughput of ConcurrentLinkedList used as a work queue, against queue.Queue and collections.deque.
+# Producer threads add items at the tail, consumer threads pop them from the head. A deque can't wait for an item, so
+# its consumers poll.
+#
+# Run with:
+#   python benchmarks/bench_concurrent.py --items 200000 --threads 1x1,4x4 --capacity 1000
+
+import argparse
+import collections
+import queue
+import threading
+import time
+
+from linked_list_pkg import ConcurrentLinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of ConcurrentLinkedList as a work queue.')
+parser.add_argument("--items", help="Total number of items passed through", type=int, default=200000)
+parser.add_argument("--threads", help="Comma-separated producers x consumers", type=str, default="1x1,4x4,1x8")
+parser.add_argument("--capacity", help="Capacity of the queue (0 for none)", type=int, default=0)
+parser.add_argument("--batch", help="Items per drain() call, for a batch-consuming run", type=int, default=100)
+args = parser.parse_args()
+
+STOP = object()
+
+class ConcurrentListQueue(object):
+    def __init__(self, capacity):
+        self.ll = ConcurrentLinkedList(capacity=capacity or None)
+        self.put = self.ll.add_tail
+    def get(self):
+        return self.ll.pop_head(timeout=None)
+
+class DrainingQueue(ConcurrentListQueue):
+    # Consumers take items in batches. The batch is handed out one item at a time.
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.local = threading.local()
+    def get(self):
+        batch = getattr(self.local, 'batch', None)
+        if not batch:
+            batch = self.ll.drain(args.batch)
+            if not batch:
+                batch = [self.ll.pop_head(timeout=None)]
+            batch.reverse()
+            self.local.batch = batch
+        return batch.pop()
+
+class QueueQueue(object):
+    def __init__(self, capacity):
+        self.q = queue.Queue(capacity)
+        self.put = self.q.put
+        self.get = self.q.get
+
+class DequeQueue(object):
+    def __init__(self, capacity):
+        # No capacity: a deque with maxlen would drop items rather than wait
+        self.d = collections.deque()
+        self.put = self.d.append
+    def get(self):
+        while True:
+            try:
+                return self.d.popleft()
+            except IndexError:
+                time.sleep(0)
+
+def run(queue_class, producers, consumers):
+    q = queue_class(args.capacity)
+    per_producer = args.items // producers
+
+    def _produce():
+        put = q.put
+        for n in range(per_producer):
+            put(n)
+
+    def _consume():
+        get = q.get
+        while get() is not STOP:
+            pass
+
+    producer_threads = [threading.Thread(target=_produce) for n in range(producers)]
+    consumer_threads = [threading.Thread(target=_consume) for n in range(consumers)]
+    start = time.perf_counter()
+    for thread in producer_threads + consumer_threads: thread.start()
+    for thread in producer_threads: thread.join()
+    for n in range(consumers): q.put(STOP)
+    for thread in consumer_threads: thread.join()
+    return per_producer * producers / (time.perf_counter() - start)
+
+for threads in args.threads.split(","):
+    producers, consumers = [int(n) for n in threads.split("x")]
+    print("\n{} producers, {} consumers, capacity {}".format(producers, consumers, args.capacity or "none"))
+    for name, queue_class in (("ConcurrentLinkedList", ConcurrentListQueue),
+                              ("  with drain({})".format(args.batch), DrainingQueue),
+                              ("queue.Queue", QueueQueue), ("collections.deque", DequeQueue)):
+        if queue_class is DequeQueue and args.capacity:
+            continue
+        print("  {:22s} {:10.0f} items/s".format(name, run(queue_class, producers, consumers)))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+# Times edits at cursors, in each index mode, against the same edits by index. Each workload has a change elsewhere in
+# the list between one cursor's edits, so the cursor doesn't know its index when it's used:
+#   two cursors       two cursors far apart, each inserting an item and removing it again in turn
+#   add_tail+remove   add_tail(), then removing the item at a cursor in the middle, which moves on to the next item
+#   by index          the same as two cursors, with insert() and remove() at the two indices
+# Each runs with fingers, which are left near the cursors when they're made, and without, when in cache mode the
+# cursors' indices can only be found by walking back to a cached node. With --get-every N, an access by index at a
+# random position is made after every N edits. Results are in microseconds per edit.
+#
+# Run with:
+#   python benchmarks/bench_cursor.py --sizes 10000,1000000 --ops 20000 --get-every 0
+
+import argparse
+import random
+import time
+
+from linked_list_pkg import LinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of edits at LinkedList cursors.')
+parser.add_argument("--sizes", help="Comma-separated list sizes", type=str, default="10000,1000000")
+parser.add_argument("--ops", help="Number of edits timed per workload", type=int, default=20000)
+parser.add_argument("--modes", help="Comma-separated index modes", type=str, default="cache,tree")
+parser.add_argument("--get-every", help="Edits between accesses by index (0 for none)", type=int, default=0)
+parser.add_argument("--seed", help="Random seed", type=int, default=1)
+args = parser.parse_args()
+rng = random.Random(args.seed)
+
+# Between edits, makes an access by index every --get-every edits
+def between(ll, n):
+    if args.get_every > 0 and n % args.get_every == 0:
+        ll.get_item(rng.randrange(ll.size()))
+
+def two_cursors(ll, size):
+    # Off the evenly spread cache entries, so that a walk back to one is as long as it usually is
+    cursors = [ll.cursor(size // 4 + size // 200), ll.cursor(3 * size // 4 + size // 200)]
+    start = time.perf_counter()
+    for n in range(args.ops // 2):
+        cursor = cursors[n % 2]
+        cursor.insert_after(n).remove()
+        between(ll, n)
+    return time.perf_counter() - start
+
+def add_tail_remove(ll, size):
+    cursor = ll.cursor(size // 2 + size // 200)
+    start = time.perf_counter()
+    for n in range(args.ops):
+        ll.add_tail(n)
+        cursor.remove()
+        between(ll, n)
+    return time.perf_counter() - start
+
+def by_index(ll, size):
+    indices = [size // 4 + size // 200, 3 * size // 4 + size // 200]
+    start = time.perf_counter()
+    for n in range(args.ops // 2):
+        index = indices[n % 2]
+        ll.insert(n, index + 1)
+        ll.remove(index + 1)
+        between(ll, n)
+    return time.perf_counter() - start
+
+for size in [int(float(s)) for s in args.sizes.split(",")]:
+    print("size = {}, ops = {}, get every = {}".format(size, args.ops, args.get_every))
+    for mode in args.modes.split(","):
+        for finger_count in [LinkedList.DEFAULT_FINGER_COUNT, 0]:
+            results = []
+            for name, workload in [("two cursors", two_cursors), ("add_tail+remove", add_tail_remove),
+                                   ("by index", by_index)]:
+                ll = LinkedList(range(size), index_mode=mode, finger_count=finger_count)
+                ll.get_item(size // 2)
+                results.append("{}: {:8.2f} us".format(name, workload(ll, size) / args.ops * 1e6))
+            print("  {:5s} fingers {}  ".format(mode, finger_count) + "  ".join(results))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+# Compares the two index modes of LinkedList: the NodeRef cache ('cache') and the order-statistic tree ('tree').
+# For each list size, times random get_item, insert and remove calls, plus a split/join at the middle of the list.
+# Sequential and clustered get_item calls are timed too, to show what the cache policies (fingers) do for them.
+#
+# Run with:
+#   python benchmarks/bench_index_mode.py --sizes 10000,1000000,10000000 --ops 1000 --policies mixed,stride,finger
+
+import argparse
+import random
+import time
+
+from linked_list_pkg import LinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of LinkedList index modes.')
+parser.add_argument("--sizes", help="Comma-separated list sizes", type=str, default="10000,1000000,10000000")
+parser.add_argument("--ops", help="Number of operations timed per test", type=int, default=1000)
+parser.add_argument("--seed", help="A seed for random number generation", type=int, default=1)
+parser.add_argument("--modes", help="Comma-separated index modes", type=str, default="cache,tree")
+parser.add_argument("--policies", help="Comma-separated cache policies, for cache mode", type=str, default="mixed,stride")
+args = parser.parse_args()
+
+# Returns average time per call, in microseconds
+def time_ops(func, params):
+    start = time.perf_counter()
+    for p in params:
+        func(p)
+    return (time.perf_counter() - start) / len(params) * 1e6
+
+def run(size, mode, policy):
+    rand = random.Random(args.seed)
+    start = time.perf_counter()
+    ll = LinkedList(range(size), index_mode=mode, cache_policy=policy)
+    build_time = time.perf_counter() - start
+    results = {"build (s)": build_time}
+    results["get_item (us)"] = time_ops(ll.get_item, [rand.randrange(size) for i in range(args.ops)])
+    seq_start = rand.randrange(max(1, size - args.ops))
+    results["sequential get_item (us)"] = time_ops(ll.get_item, [min(seq_start + i, size - 1) for i in range(args.ops)])
+    # A few hot spots, visited in turn
+    hot_spots = [rand.randrange(size) for i in range(4)]
+    results["clustered get_item (us)"] = time_ops(ll.get_item, [min(hot_spots[i % 4] + rand.randrange(10), size - 1)
+                                                                for i in range(args.ops)])
+    results["insert (us)"] = time_ops(lambda idx: ll.insert(-1, idx), [rand.randrange(size) for i in range(args.ops)])
+    results["remove (us)"] = time_ops(ll.remove, [rand.randrange(size) for i in range(args.ops)])
+
+    def _split_join(idx):
+        ll.join(ll.split(idx))
+    results["split+join (us)"] = time_ops(_split_join, [rand.randrange(size) for i in range(max(1, args.ops // 100))])
+    return results
+
+for size in [int(float(s)) for s in args.sizes.split(",")]:
+    print("\nsize = {}".format(size))
+    for mode in args.modes.split(","):
+        for policy in (args.policies.split(",") if mode == 'cache' else ['mixed']):
+            results = run(size, mode, policy)
+            label = mode if mode != 'cache' else "{}/{}".format(mode, policy)
+            print("  {:13s} ".format(label) + "  ".join("{}: {:.3f}".format(k, v) for k, v in results.items()))
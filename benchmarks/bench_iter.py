@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+# Times iteration over a LinkedList: the generator iterator behind 'for', reversed(), iter_from() from the middle of
+# the list and iter_range() over its middle half, against the NodeRef iterator that 'for' used before (replicated
+# below) and a Python list. Results are in nanoseconds per item.
+#
+# Run with:
+#   python benchmarks/bench_iter.py --sizes 1000,100000,1000000
+
+import argparse
+import time
+
+from linked_list_pkg import LinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of LinkedList iteration.')
+parser.add_argument("--sizes", help="Comma-separated list sizes", type=str, default="1000,100000,1000000")
+parser.add_argument("--repeat", help="Number of runs; the fastest counts", type=int, default=5)
+args = parser.parse_args()
+
+# The previous iterator: a NodeRef, with its node and index both updated on every step
+class LegacyNodeRefIterator(object):
+    __slots__ = ('node', 'idx')
+
+    def __init__(self, node=None, index=-1):
+        self.node = node
+        self.idx = index
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        node = self.node
+        if node is None:
+            raise StopIteration
+        self.node = self.node.next
+        self.idx = self.idx + 1
+        return node.item
+
+# Returns the fastest time to exhaust make_iterator(), in nanoseconds per item
+def time_iteration(make_iterator, items):
+    best = None
+    for r in range(args.repeat):
+        start = time.perf_counter()
+        for item in make_iterator():
+            pass
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / items * 1e9
+
+for size in [int(float(s)) for s in args.sizes.split(",")]:
+    ll = LinkedList(range(size))
+    items = list(range(size))
+    runs = [("NodeRef iterator (before)", lambda: LegacyNodeRefIterator(ll.head, 0), size),
+            ("for item in ll", lambda: ll, size),
+            ("reversed(ll)", lambda: reversed(ll), size),
+            ("iter_from(size // 2)", lambda: ll.iter_from(size // 2), size - size // 2),
+            ("iter_range(middle half)", lambda: ll.iter_range(size // 4, 3 * size // 4), 3 * size // 4 - size // 4),
+            ("Python list", lambda: items, size)]
+    print("\nsize = {}".format(size))
+    for name, make_iterator, count in runs:
+        print("  {:26s} {:7.1f} ns per item".format(name, time_iteration(make_iterator, count)))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+# Times LRUCache and LFUCache against an LRU cache built on OrderedDict and against functools.lru_cache, and shows the
+# way of doing it with a plain LinkedList (find_item(), remove() and add_head() on every hit) for comparison. Keys are
+# drawn from a Zipf-like distribution over --keys keys, so some are much hotter than others. Two workloads:
+#   get/put      cache.get(key), and cache.put(key, value) on a miss
+#   memoize      calls to a memoized function (LRUCache.memoize() against functools.lru_cache)
+# Results are in microseconds per lookup, with the hit rate each cache got.
+#
+# Run with:
+#   python benchmarks/bench_lru.py --capacity 1000 --keys 10000 --ops 200000
+
+import argparse
+import functools
+import random
+import time
+from collections import OrderedDict
+
+from linked_list_pkg import LinkedList, LRUCache, LFUCache
+
+parser = argparse.ArgumentParser(description='Benchmark of LRUCache and LFUCache.')
+parser.add_argument("--capacity", help="Number of entries each cache holds", type=int, default=1000)
+parser.add_argument("--keys", help="Number of distinct keys", type=int, default=10000)
+parser.add_argument("--ops", help="Number of lookups timed", type=int, default=200000)
+parser.add_argument("--list-ops", help="Number of lookups timed for the plain LinkedList", type=int, default=5000)
+parser.add_argument("--seed", help="Random seed", type=int, default=1)
+args = parser.parse_args()
+
+# An LRU cache on OrderedDict, the usual way of writing one by hand
+class OrderedDictCache(object):
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        try:
+            self.entries.move_to_end(key)
+        except KeyError:
+            self.misses = self.misses + 1
+            return default
+        self.hits = self.hits + 1
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+# An LRU cache kept in a LinkedList of (key, value) pairs, most recent first, found by scanning
+class LinkedListCache(object):
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = LinkedList()
+        self.keys = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key not in self.keys:
+            self.misses = self.misses + 1
+            return default
+        self.hits = self.hits + 1
+        self.entries.remove(self.entries.find_item((key, self.keys[key])))
+        self.entries.add_head((key, self.keys[key]))
+        return self.keys[key]
+
+    def put(self, key, value):
+        self.keys[key] = value
+        self.entries.add_head((key, value))
+        if self.entries.size() > self.capacity:
+            del self.keys[self.entries.pop_tail()[0]]
+
+def zipf_keys(count, rng):
+    weights = [1.0 / (rank + 1) for rank in range(args.keys)]
+    return rng.choices(range(args.keys), weights=weights, k=count)
+
+# Returns microseconds per lookup and the hit rate
+def run_get_put(cache, keys):
+    get, put = cache.get, cache.put
+    start = time.perf_counter()
+    for key in keys:
+        if get(key) is None:
+            put(key, key)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(keys) * 1e6, cache.hits / len(keys)
+
+def run_memoized(func, keys):
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+rng = random.Random(args.seed)
+keys = zipf_keys(args.ops, rng)
+print("capacity = {}, keys = {}, ops = {}".format(args.capacity, args.keys, args.ops))
+
+print("\nget/put:")
+for name, cache, cache_keys in [("LRUCache", LRUCache(args.capacity), keys),
+                                ("LFUCache", LFUCache(args.capacity), keys),
+                                ("OrderedDict LRU", OrderedDictCache(args.capacity), keys),
+                                ("LinkedList find/remove/add_head", LinkedListCache(args.capacity),
+                                 keys[:args.list_ops])]:
+    us, hit_rate = run_get_put(cache, cache_keys)
+    print("  {:32s} {:8.3f} us per lookup, hit rate {:.3f}".format(name, us, hit_rate))
+
+print("\nmemoize:")
+def square(x):
+    return x * x
+memoized = [("LRUCache.memoize", LRUCache(args.capacity).memoize(square)),
+            ("LFUCache.memoize", LFUCache(args.capacity).memoize(square)),
+            ("functools.lru_cache", functools.lru_cache(maxsize=args.capacity)(square))]
+for name, func in memoized:
+    us = run_memoized(func, keys)
+    if hasattr(func, 'cache'):
+        hit_rate = func.cache.stats()['hit_rate']
+    else:
+        hit_rate = func.cache_info().hits / len(keys)
+    print("  {:32s} {:8.3f} us per call, hit rate {:.3f}".format(name, us, hit_rate))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+# Times MappedLinkedList, the file-backed list, against the in-memory LinkedList: building the list, reopening it,
+# reaching items near the ends and in the middle, iterating, and removing from the head. Also shows the file sizes,
+# before and after compact().
+#
+# Run with:
+#   python benchmarks/bench_mapped.py --size 1000000
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from linked_list_pkg import LinkedList, MappedLinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of the file-backed linked list.')
+parser.add_argument("--size", help="Number of elements", type=int, default=1000000)
+parser.add_argument("--ops", help="Number of operations for the per-operation timings", type=int, default=1000)
+parser.add_argument("--seed", help="A seed for random number generation", type=int, default=1)
+args = parser.parse_args()
+
+rand = random.Random(args.seed)
+items = [rand.randrange(1000000) for i in range(args.size)]
+
+def time_it(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def per_op(func):
+    return time_it(lambda: [func(n) for n in range(args.ops)])[0] / args.ops * 1e6
+
+def file_sizes(path):
+    return (os.path.getsize(path) + os.path.getsize(path + ".heap")) / 1e6
+
+print("size = {}".format(args.size))
+with tempfile.TemporaryDirectory() as temp_dir:
+    path = os.path.join(temp_dir, "list")
+    build_time, ll = time_it(lambda: LinkedList(items))
+    mapped_build_time, mapped_ll = time_it(lambda: MappedLinkedList(path, items))
+    print("  build:              LinkedList {:7.3f} s,  MappedLinkedList {:7.3f} s".format(build_time,
+                                                                                        mapped_build_time))
+    mapped_ll.close()
+    reopen_time, mapped_ll = time_it(lambda: MappedLinkedList(path))
+    print("  reopen:                                   MappedLinkedList {:7.3f} s".format(reopen_time))
+    for name, index_func in (("get_item near head", lambda n: n % 100),
+                             ("get_item, random", lambda n: rand.randrange(args.size))):
+        print("  {:20s}LinkedList {:7.1f} us, MappedLinkedList {:7.1f} us".format(
+            name + ":", per_op(lambda n: ll.get_item(index_func(n))),
+            per_op(lambda n: mapped_ll.get_item(index_func(n)))))
+    print("  {:20s}LinkedList {:7.3f} s,  MappedLinkedList {:7.3f} s".format(
+        "iterate:", time_it(lambda: sum(1 for item in ll))[0], time_it(lambda: sum(1 for item in mapped_ll))[0]))
+    print("  {:20s}LinkedList {:7.1f} us, MappedLinkedList {:7.1f} us".format(
+        "add_tail, pop_head:", per_op(lambda n: (ll.add_tail(n), ll.pop_head())),
+        per_op(lambda n: (mapped_ll.add_tail(n), mapped_ll.pop_head()))))
+    for n in range(args.size // 2):
+        mapped_ll.pop_tail()
+    mapped_ll.flush()
+    size_before = file_sizes(path)
+    compact_time = time_it(mapped_ll.compact)[0]
+    print("  after popping half: files {:.1f} MB; compact() {:.3f} s, files {:.1f} MB".format(
+        size_before, compact_time, file_sizes(path)))
+    mapped_ll.close()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+# Measures memory per element for the different ways of storing a linked list, using tracemalloc. The items are
+# shared small ints, so only the list's own overhead is counted. "dict nodes" replicates the original ListNode
+# layout (no __slots__), for comparison. Next to what tracemalloc saw, each list's own memory_usage() is shown, to check
+# that its accounting agrees. MappedLinkedList keeps its nodes and items in files, so for it, the size of the files is
+# shown too.
+#
+# Run with:
+#   python benchmarks/bench_memory.py --size 1000000
+
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from linked_list_pkg import LinkedList, CompactLinkedList, UnrolledLinkedList, MappedLinkedList
+
+parser = argparse.ArgumentParser(description='Memory benchmark of linked list storage layouts.')
+parser.add_argument("--size", help="Number of elements", type=int, default=1000000)
+args = parser.parse_args()
+
+# The original ListNode layout, with a __dict__ per node
+class DictListNode(object):
+    def __init__(self, item):
+        self.item = item
+        self.next = None
+        self.prev = None
+
+def build_dict_nodes(items):
+    head = tail = None
+    for i in items:
+        node = DictListNode(i)
+        if head is None:
+            head = node
+        else:
+            node.prev = tail
+            tail.next = node
+        tail = node
+    return head
+
+layouts = [
+    ("dict nodes", build_dict_nodes),
+    ("LinkedList", LinkedList),
+    ("LinkedList, tree", lambda items: LinkedList(items, index_mode='tree')),
+    ("LinkedList, hashed", lambda items: LinkedList(items, hash_index=True)),
+    ("CompactLinkedList", CompactLinkedList),
+    ("UnrolledLinkedList", UnrolledLinkedList),
+    ("Unrolled, typed 'q'", lambda items: UnrolledLinkedList(items, typecode='q')),
+    ("Python list", list),
+]
+
+tmp_dir = tempfile.TemporaryDirectory()
+mapped_path = os.path.join(tmp_dir.name, "bench.llmap")
+layouts.insert(-1, ("MappedLinkedList", lambda items: MappedLinkedList(mapped_path, items)))
+
+items = [i % 256 for i in range(args.size)]
+print("size = {}".format(args.size))
+for name, build in layouts:
+    gc.collect()
+    tracemalloc.start()
+    built = build(items)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    line = "  {:20s} {:8.1f} bytes per element (peak {:.1f})".format(name, current / args.size, peak / args.size)
+    if hasattr(built, 'memory_usage'):
+        line = line + ", memory_usage() {:.1f}".format(built.memory_usage() / args.size)
+    if isinstance(built, MappedLinkedList):
+        built.flush()
+        file_size = os.path.getsize(mapped_path) + os.path.getsize(mapped_path + '.heap')
+        line = line + ", in files {:.1f}".format(file_size / args.size)
+        built.close()
+    print(line)
+    del built
+tmp_dir.cleanup()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+# Times LinkedList.parallel_sort() and parallel_map() at several worker counts, against single-core sort() and a
+# single-core map. Sorting is timed on plain integers, and on records with a key that costs something to compute. The
+# process pool for each worker count is started before the timing, as a job that sorts repeatedly would reuse one.
+#
+# Run with:
+#   python benchmarks/bench_parallel.py --size 1000000 --workers 1,2,4,8
+
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from linked_list_pkg import LinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of LinkedList parallel sort and map.')
+parser.add_argument("--size", help="Number of elements", type=int, default=1000000)
+parser.add_argument("--workers", help="Comma-separated worker counts", type=str, default="1,2,4,8")
+parser.add_argument("--seed", help="A seed for random number generation", type=int, default=1)
+args = parser.parse_args()
+
+# Key and map functions have to be defined at module level, to be sent to the workers
+def record_key(record):
+    return "-".join(part.lower().rjust(8) for part in reversed(record[1].split("-")))
+
+def rewrite(record):
+    return (record[0], "-".join(part.upper() for part in record[1].split("-")))
+
+def time_it(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+rand = random.Random(args.seed)
+ints = [rand.randrange(1000000) for i in range(args.size)]
+records = [(n, "-".join("Part{}".format(rand.randrange(1000)) for i in range(3))) for n in range(args.size)]
+worker_counts = [int(n) for n in args.workers.split(",")]
+
+runs = [("sort() ints", ints, lambda ll: ll.sort(), lambda ll, w, pool: ll.parallel_sort(workers=w, executor=pool)),
+        ("sort(key=...) records", records, lambda ll: ll.sort(key=record_key),
+         lambda ll, w, pool: ll.parallel_sort(key=record_key, workers=w, executor=pool)),
+        ("map records", records, lambda ll: LinkedList(map(rewrite, ll)),
+         lambda ll, w, pool: ll.parallel_map(rewrite, workers=w, executor=pool))]
+
+print("size = {}".format(args.size))
+for name, items, single, parallel in runs:
+    ll = LinkedList(items)
+    single_time = time_it(lambda: single(ll))
+    print("  {:22s} single core:  {:7.3f} s".format(name, single_time))
+    for workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Start the worker processes before timing
+            list(pool.map(abs, range(workers)))
+            ll = LinkedList(items)
+            parallel_time = time_it(lambda: parallel(ll, workers, pool))
+        print("  {:22s} {} worker(s): {:7.3f} s  ({:.2f}x)".format("", workers, parallel_time,
+                                                                   single_time / parallel_time))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+# Times saving and loading a LinkedList, and measures the size of the result and the extra memory used while saving:
+# pickling the list itself, dump() and load() through a file, and the usual workaround of pickling get_items() and
+# building a new list from the loaded items.
+#
+# Run with:
+#   python benchmarks/bench_serialize.py --size 1000000
+
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import time
+import tracemalloc
+
+from linked_list_pkg import LinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of LinkedList serialization.')
+parser.add_argument("--size", help="Number of elements", type=int, default=1000000)
+parser.add_argument("--seed", help="A seed for random number generation", type=int, default=1)
+args = parser.parse_args()
+
+def pickle_list(ll, path):
+    with open(path, 'wb') as fp:
+        pickle.dump(ll, fp, pickle.HIGHEST_PROTOCOL)
+
+def unpickle_list(path):
+    with open(path, 'rb') as fp:
+        return pickle.load(fp)
+
+def pickle_items(ll, path):
+    with open(path, 'wb') as fp:
+        pickle.dump(ll.get_items(), fp, pickle.HIGHEST_PROTOCOL)
+
+def unpickle_items(path):
+    with open(path, 'rb') as fp:
+        return LinkedList(pickle.load(fp))
+
+def dump_list(ll, path):
+    with open(path, 'wb') as fp:
+        ll.dump(fp)
+
+def load_list(path):
+    with open(path, 'rb') as fp:
+        return LinkedList.load(fp)
+
+rand = random.Random(args.seed)
+ll = LinkedList(rand.randrange(1000000) for i in range(args.size))
+print("size = {}".format(args.size))
+with tempfile.TemporaryDirectory() as temp_dir:
+    path = os.path.join(temp_dir, "list")
+    for name, save, load in (("pickle get_items()", pickle_items, unpickle_items),
+                             ("pickle list", pickle_list, unpickle_list),
+                             ("dump(), load()", dump_list, load_list)):
+        start = time.perf_counter()
+        save(ll, path)
+        save_time = time.perf_counter() - start
+        # Memory is measured on a second save, as tracing slows it down
+        tracemalloc.start()
+        save(ll, path)
+        save_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        loaded = load(path)
+        load_time = time.perf_counter() - start
+        if loaded.get_items() != ll.get_items():
+            print("  {}: wrong items loaded".format(name))
+        print("  {:20s} save {:6.3f} s, load {:6.3f} s, {:6.2f} MB, {:7.2f} MB extra memory to save".format(
+            name, save_time, load_time, os.path.getsize(path) / 1e6, save_peak / 1e6))
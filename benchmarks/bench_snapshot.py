@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+# Times snapshot() against copy(), for readers that each take a consistent view of a big list while a writer goes on
+# changing it. Shows, for each index mode:
+#   - what taking a snapshot and a copy cost
+#   - a run of requests, each taking a view (snapshot or copy) and reading --reads items from it by index, with
+#     --writes random inserts and removes by the writer in between, which for snapshots includes copying out the
+#     items they need. Each view is held for --hold requests, so that several are outstanding at once.
+#   - what iterating over a snapshot costs per item, against iterating over the list
+#
+# Run with:
+#   python benchmarks/bench_snapshot.py --size 1000000 --requests 200 --reads 100 --writes 10 --hold 4
+
+import argparse
+import random
+import time
+
+from linked_list_pkg import LinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of LinkedList snapshots against copies.')
+parser.add_argument("--size", help="Number of items in the list", type=int, default=1000000)
+parser.add_argument("--requests", help="Number of requests in a run", type=int, default=100)
+parser.add_argument("--reads", help="Items each request reads by index", type=int, default=100)
+parser.add_argument("--writes", help="Inserts and removes by the writer between requests", type=int, default=10)
+parser.add_argument("--hold", help="Number of requests a view is held for", type=int, default=4)
+parser.add_argument("--modes", help="Comma-separated index modes", type=str, default="cache,tree")
+parser.add_argument("--seed", help="Random seed", type=int, default=1)
+args = parser.parse_args()
+
+def time_call(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+# Runs requests requests, each reading from take_view(). Returns seconds per request (view and reads) and per write.
+def run_requests(ll, take_view, requests):
+    rng = random.Random(args.seed)
+    held = []
+    request_time = 0.0
+    write_time = 0.0
+    for r in range(requests):
+        start = time.perf_counter()
+        view = take_view()
+        size = len(view)
+        for n in range(args.reads):
+            view[rng.randrange(size)]
+        request_time = request_time + time.perf_counter() - start
+        held.append(view)
+        if len(held) > args.hold:
+            held.pop(0)
+        start = time.perf_counter()
+        for n in range(args.writes):
+            if n % 2 == 0:
+                ll.insert(n, rng.randrange(ll.size() + 1))
+            else:
+                ll.remove(rng.randrange(ll.size()))
+        write_time = write_time + time.perf_counter() - start
+    return request_time / requests, write_time / (requests * args.writes)
+
+print("size = {}, requests = {}, reads = {}, writes = {}, hold = {}".format(
+    args.size, args.requests, args.reads, args.writes, args.hold))
+for mode in args.modes.split(","):
+    ll = LinkedList(range(args.size), index_mode=mode)
+    ll.get_item(args.size // 2)
+    print("\n{} mode".format(mode))
+    # Each change to the list means the next snapshot() takes a new one, rather than give back the last one again
+    snapshot_times = []
+    for r in range(1000):
+        ll[0] = 0
+        snapshot_times.append(time_call(ll.snapshot))
+    print("  snapshot()        {:12.1f} us".format(sum(snapshot_times) / len(snapshot_times) * 1e6))
+    print("  copy()            {:12.1f} us".format(time_call(ll.copy) * 1e6))
+
+    # Copies are too slow to take for every request at this size, so the copy run is cut short
+    copy_request, copy_write = run_requests(ll, ll.copy, min(args.requests, 5))
+    snapshot_request, snapshot_write = run_requests(ll, ll.snapshot, args.requests)
+    bare_request, bare_write = run_requests(ll, lambda: ll, args.requests)
+    print("  per request: with snapshot {:10.1f} us, with copy {:12.1f} us, reading the list {:8.1f} us".format(
+        snapshot_request * 1e6, copy_request * 1e6, bare_request * 1e6))
+    print("  per write:   with snapshots {:9.2f} us, with copies {:11.2f} us, no views {:15.2f} us".format(
+        snapshot_write * 1e6, copy_write * 1e6, bare_write * 1e6))
+
+    snapshot = ll.snapshot()
+    list_time = time_call(lambda: [item for item in ll])
+    snapshot_time = time_call(lambda: [item for item in snapshot])
+    print("  iteration:   snapshot {:.1f} ns per item, list {:.1f} ns per item".format(
+        snapshot_time / ll.size() * 1e9, list_time / ll.size() * 1e9))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+# Times LinkedList.sort() against the recursive merge sort it replaced, and against sorting a Python list of the
+# items with sorted().
+#
+# Run with:
+#   python benchmarks/bench_sort.py --size 1000000
+
+import argparse
+import random
+import time
+
+from linked_list_pkg import LinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of LinkedList sorting.')
+parser.add_argument("--size", help="Number of elements", type=int, default=1000000)
+parser.add_argument("--seed", help="A seed for random number generation", type=int, default=1)
+args = parser.parse_args()
+
+# The previous sort: recursive top-down merge sort, with val_func called on every comparison
+class LegacySortList(LinkedList):
+
+    def sort(self, reverse=False, val_func=None):
+        _compare_func = self._get_compare_func(val_func, reverse)
+        size = self.size()
+        if size == 0 or size == 1: return
+        new_start_node = self._merge_sort_sublist(self.head, self.tail, 0, size-1, _compare_func)
+        self.head = new_start_node
+        new_tail_node = new_start_node
+        while new_tail_node.next is not None:
+            new_tail_node = new_tail_node.next
+        self.tail = new_tail_node
+        self._rebuild_cache()
+
+    # The val_func, if specified, returns the value for comparison. If reverse is True, we are going higher-to-lower
+    # instead of lower to higher.
+    def _get_compare_func(self, val_func, reverse):
+        def _val_func(item):
+            return item
+        if not val_func: val_func = _val_func
+
+        def _compare_func(n1, n2): # Returns True if n1, n2 in correct order
+            return not reverse if val_func(n1.item) < val_func(n2.item) else reverse
+        return _compare_func
+
+    # Given a sublist, use merge sort to sort it. Returns new start node of sorted sublist. The compare function
+    # returns true of the first item should come first.
+    def _merge_sort_sublist(self, start_node, end_node, start_index, end_index, compare_func):
+        if start_index >= end_index:
+            start_node.next = None
+            return start_node
+        if (end_index - start_index) == 1:
+            # swap the nodes, if necessary
+            if not compare_func(start_node, end_node): # Returns True if first node should come first
+                end_node.next = start_node # end node becomes start node
+                start_node.prev = end_node # start node becomes end node
+                end_node.prev = None
+                start_node.next = None
+                return end_node
+
+        median_node = start_node
+        median_index = int((start_index + end_index) / 2)
+        for i in range(0, median_index-start_index):
+            median_node = median_node.next
+        median_plus_one_node = median_node.next
+        #print("median node is", median_node.item)
+        new_start_node = self._merge_sort_sublist(start_node, median_node, start_index, median_index, compare_func)
+        new_median_node = self._merge_sort_sublist(median_plus_one_node, end_node, median_index+1, end_index, compare_func)
+        result = self._merge_lists(new_start_node, new_median_node, compare_func)
+        return result
+
+    # Given two lists that have already been sorted using the same compare_func, merge them together
+    def _merge_lists(self, list1_start, list2_start, compare_func):
+        # TODO: could be a little more efficient
+        new_head = None
+        tail = None
+        node1 = list1_start
+        node2 = list2_start
+        while node1 is not None and node2 is not None:
+            choice = None
+            if compare_func(node1, node2): # Returns True if first node should come first
+                choice = node1
+                node1.prev = None
+                node1 = node1.next
+            else:
+                choice = node2
+                node2.prev = None
+                node2 = node2.next
+            if new_head is None:
+                new_head = choice
+            choice.prev = tail
+            if tail is not None:
+                tail.next = choice
+            tail = choice # the next pointer will continue to point where it was
+        if node1 is not None:
+            tail.next = node1
+            node1.prev = tail
+        elif node2 is not None:
+            tail.next = node2
+            node2.prev = tail
+        return new_head
+
+
+
+
+
+def time_it(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+rand = random.Random(args.seed)
+random_items = [rand.randrange(1000000) for i in range(args.size)]
+inputs = [("random", random_items), ("sorted", sorted(random_items)), ("reversed", sorted(random_items, reverse=True))]
+print("size = {}".format(args.size))
+for name, items in inputs:
+    print("  {} input".format(name))
+    legacy_ll = LegacySortList(items)
+    print("    previous sort():        {:.3f} s".format(time_it(legacy_ll.sort)))
+    new_ll = LinkedList(items)
+    print("    sort():                 {:.3f} s".format(time_it(new_ll.sort)))
+    new_ll = LinkedList(items)
+    print("    sort(key=...):          {:.3f} s".format(time_it(lambda: new_ll.sort(key=lambda x: -x))))
+    new_ll = LinkedList(items)
+    print("    sorted(get_items()):    {:.3f} s".format(time_it(lambda: sorted(new_ll.get_items()))))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+# Times whole-list operations on a list of ints stored three ways: LinkedList (a node per item), UnrolledLinkedList
+# (blocks of Python lists) and UnrolledLinkedList with typecode='q' (blocks of unboxed 64-bit ints). Also times inserts
+# and removes in the middle, which the typed blocks have to keep doing as well as the others.
+#
+# Run with:
+#   python benchmarks/bench_typed.py --size 1000000
+
+import argparse
+import random
+import time
+
+from linked_list_pkg import LinkedList, UnrolledLinkedList
+
+parser = argparse.ArgumentParser(description='Benchmark of typed unrolled list blocks.')
+parser.add_argument("--size", help="Number of elements", type=int, default=1000000)
+parser.add_argument("--ops", help="Number of inserts and removes in the middle", type=int, default=1000)
+parser.add_argument("--seed", help="A seed for random number generation", type=int, default=1)
+args = parser.parse_args()
+
+rand = random.Random(args.seed)
+items = [rand.randrange(1000000) for i in range(args.size)]
+missing = -1
+
+def time_it(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def find_missing(ll):
+    try:
+        ll.find_item(missing)
+    except ValueError:
+        pass
+
+def middle_changes(ll):
+    for n in range(args.ops):
+        index = rand.randrange(ll.size())
+        ll.insert(n, index)
+        ll.remove(index)
+
+layouts = [("LinkedList", lambda: LinkedList(items)),
+           ("UnrolledLinkedList", lambda: UnrolledLinkedList(items)),
+           ("  typed 'q'", lambda: UnrolledLinkedList(items, typecode='q'))]
+
+ops = [("find_item (missing)", find_missing),
+       ("count", lambda ll: ll.count(missing)),
+       ("sum", lambda ll: ll.sum() if hasattr(ll, 'sum') else sum(ll)),
+       ("min, max", lambda ll: (ll.min(), ll.max()) if hasattr(ll, 'min') else (min(ll), max(ll))),
+       ("get_items", lambda ll: ll.get_items()),
+       ("get_array", lambda ll: ll.get_array() if getattr(ll, 'typecode', None) else None),
+       ("sort", lambda ll: ll.sort()),
+       ("{} inserts/removes".format(args.ops), middle_changes)]
+
+print("size = {}".format(args.size))
+lists = [(name, build()) for name, build in layouts]
+for op_name, op in ops:
+    print("  {}".format(op_name))
+    for name, ll in lists:
+        if op_name == "count" and not hasattr(ll, 'count'):
+            continue
+        print("    {:20s} {:8.4f} s".format(name, time_it(lambda: op(ll))))
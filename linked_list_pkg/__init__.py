@@ -1 +1,7 @@
 from .linked_list_impl import *
+from .compact_list import CompactLinkedList
+from .unrolled_list import UnrolledLinkedList
+from .concurrent_list import ConcurrentLinkedList
+from .async_list import AsyncLinkedList
+from .mapped_list import MappedLinkedList
+from .lru_cache import LRUCache, LFUCache
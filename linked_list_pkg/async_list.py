@@ -0,0 +1,287 @@
+import asyncio
+from collections import deque
+
+from .linked_list_impl import LinkedList
+
+# A linked list for asyncio code. It's typically used as a queue that also allows changes in the middle (moving an
+# item up, or taking out one that was cancelled), which asyncio.Queue can't do. Consumers await pop_head() or
+# pop_tail(), or use 'async for'; producers await add_tail(), add_head() or extend(), which wait for room if the list
+# has a capacity. insert(), remove() and the rest work as in LinkedList, and don't wait. They're for rearranging
+# items already in the list, so insert() and insert_many() can take the list over its capacity.
+#
+# Consumers only wait while the list is empty. When items are added, they are handed straight to the waiting
+# consumers, oldest first, without going into the list at all; only what's left over is added. A bulk add goes through
+# the waiters once, waking only as many as there are items, rather than waking every waiter to compete for them.
+# pop_many() takes a whole batch for one wakeup.
+#
+# Like the rest of asyncio, it's not thread-safe: use it from one event loop.
+
+_CLOSED = object() # handed to waiting consumers when the list is closed
+
+class AsyncLinkedList(object):
+
+    # Params
+    #   iterable: if given, the list is filled with its items
+    #   capacity: if given, the most items add_head(), add_tail() and extend() will let the list hold
+    #   index_mode: index mode of the underlying LinkedList
+    def __init__(self, iterable=None, capacity=None, index_mode='cache'):
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.closed = False
+        self._list = LinkedList(iterable, index_mode=index_mode)
+        if capacity is not None and self._list.size() > capacity:
+            raise ValueError("more items than capacity")
+        self._getters = deque() # (future, from_head, count) for each waiting consumer, oldest first
+        self._putters = deque() # future for each producer waiting for room, oldest first
+
+    def __len__(self):
+        return self._list.size()
+
+    # Support for 'async for'. Iteration pops items from the head, waiting for more, until the list is closed and
+    # empty.
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self._pop(True, None)
+        if item is _CLOSED:
+            raise StopAsyncIteration
+        return item
+
+    # --------------------------------------
+    # Functions for adding items
+    # --------------------------------------
+
+    # Adds item to tail of list, waiting for room if the list is full
+    async def add_tail(self, item):
+        await self._wait_for_room()
+        self._add_items([item], self._list.extend)
+
+    # Adds item to head of list, waiting for room if the list is full
+    async def add_head(self, item):
+        await self._wait_for_room()
+        self._add_items([item], self._list.extend_head)
+
+    # Adds item to tail of list. Raises asyncio.QueueFull if the list is full.
+    def add_tail_nowait(self, item):
+        self._check_room()
+        self._add_items([item], self._list.extend)
+
+    # Adds item to head of list. Raises asyncio.QueueFull if the list is full.
+    def add_head_nowait(self, item):
+        self._check_room()
+        self._add_items([item], self._list.extend_head)
+
+    # Adds all items of iterable to tail of list. They go in as a batch (or, if the list has a capacity, in batches
+    # as big as there's room for), and waiting consumers are woken once per batch.
+    async def extend(self, iterable):
+        items = list(iterable)
+        pos = 0
+        while pos < len(items):
+            room = await self._wait_for_room()
+            batch = items[pos:] if room is None else items[pos:pos + room]
+            pos = pos + len(batch)
+            self._add_items(batch, self._list.extend)
+
+    # Inserts item before item at index, without waiting for room
+    def insert(self, item, index=0):
+        self.insert_many(index, [item])
+
+    # Inserts all items of iterable before item at index, without waiting for room
+    def insert_many(self, index, iterable):
+        self._check_open()
+        if index < 0 or index > self._list.size():
+            raise IndexError("linked list index out of range")
+        self._add_items(list(iterable), lambda items: self._list.insert_many(index, items))
+
+    # --------------------------------------
+    # Functions for removing items
+    # --------------------------------------
+
+    # Pops item from head of list, returns item. Waits for an item if the list is empty. If the list is closed (and
+    # empty), returns None.
+    async def pop_head(self):
+        item = await self._pop(True, None)
+        return None if item is _CLOSED else item
+
+    # Pops item from tail of list, returns item. Waits the same way as pop_head().
+    async def pop_tail(self):
+        item = await self._pop(False, None)
+        return None if item is _CLOSED else item
+
+    # Pops up to max_items items from head of list, returns them in a Python list. Waits for an item if the list is
+    # empty, but not for more than one. If the list is closed (and empty), returns an empty list.
+    async def pop_many(self, max_items):
+        items = await self._pop(True, max_items)
+        return [] if items is _CLOSED else items
+
+    # Pops item from head of list, returns item. If the list is empty, returns None without waiting.
+    def pop_head_nowait(self):
+        item = self._list.pop_head()
+        self._wake_putters()
+        return item
+
+    # Pops item from tail of list, returns item. If the list is empty, returns None without waiting.
+    def pop_tail_nowait(self):
+        item = self._list.pop_tail()
+        self._wake_putters()
+        return item
+
+    # Pops up to max_items items (all of them, if max_items is None) from head of list, without waiting. Returns them
+    # in a Python list.
+    def drain(self, max_items=None):
+        count = self._list.size() if max_items is None else min(max_items, self._list.size())
+        items = self._list.remove_at(range(count))
+        self._wake_putters()
+        return items
+
+    # Removes item at specified index, returns item
+    def remove(self, index=0):
+        item = self._list.remove(index)
+        self._wake_putters()
+        return item
+
+    # Removes the first item equal to item, returns it. Raises ValueError if there isn't one.
+    def remove_value(self, item):
+        item = self._list.remove_value(item)
+        self._wake_putters()
+        return item
+
+    # Closes the list: nothing more can be added. Consumers can still pop what's left; after that, pops return None
+    # (or an empty list) rather than wait, and 'async for' loops end. Producers waiting for room get ValueError.
+    def close(self):
+        self.closed = True
+        if self._list.size() == 0:
+            while self._getters:
+                future = self._getters.popleft()[0]
+                if not future.done():
+                    future.set_result(_CLOSED)
+        while self._putters:
+            future = self._putters.popleft()
+            if not future.done():
+                future.set_result(None)
+
+    # --------------------------------------
+    # Functions for getting items or information
+    # --------------------------------------
+
+    def size(self):
+        return self._list.size()
+
+    def empty(self):
+        return self._list.size() == 0
+
+    def full(self):
+        return self.capacity is not None and self._list.size() >= self.capacity
+
+    def get_item(self, index):
+        return self._list.get_item(index)
+
+    def find_item(self, item, start_index=None, backwards=False):
+        return self._list.find_item(item, start_index, backwards)
+
+    def count(self, item):
+        return self._list.count(item)
+
+    def __contains__(self, item):
+        return item in self._list
+
+    def get_items(self):
+        return self._list.get_items()
+
+    # --------------------------------------
+    # Private helper functions, for internal use
+    # --------------------------------------
+
+    # Pops an item from the head (or tail, if from_head is False) of the list or, if count isn't None, a Python list
+    # of up to count items from the head. If the list is empty, waits to be handed them by _hand_over(). If a
+    # consumer is cancelled just after being handed them, they go back into the list.
+    async def _pop(self, from_head, count):
+        if self._list.size() > 0:
+            if count is not None:
+                result = self._list.remove_at(range(min(count, self._list.size())))
+            else:
+                result = self._list.pop_head() if from_head else self._list.pop_tail()
+            self._wake_putters()
+            return result
+        if self.closed:
+            return _CLOSED
+        future = asyncio.get_running_loop().create_future()
+        self._getters.append((future, from_head, count))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if not future.cancelled() and future.result() is not _CLOSED:
+                items = future.result() if count is not None else [future.result()]
+                self._add_items(items, self._list.extend_head if from_head else self._list.extend)
+            raise
+
+    # Adds items (a Python list, in order) to the list with add(items), after handing waiting consumers what they
+    # would have popped. If that leaves room, other producers waiting for it are woken.
+    def _add_items(self, items, add):
+        if self._getters:
+            items = self._hand_over(items)
+        if items:
+            add(items)
+        if self._putters:
+            self._wake_putters()
+
+    # Hands items, which are to be added to an empty list, to waiting consumers, oldest first. Consumers that were
+    # cancelled while waiting are skipped. Returns the items left over.
+    def _hand_over(self, items):
+        getters = self._getters
+        lo, hi = 0, len(items)
+        while getters and lo < hi:
+            future, from_head, count = getters.popleft()
+            if future.done():
+                continue
+            if count is not None:
+                result = items[lo:min(hi, lo + count)]
+                lo = lo + len(result)
+            elif from_head:
+                result = items[lo]
+                lo = lo + 1
+            else:
+                hi = hi - 1
+                result = items[hi]
+            future.set_result(result)
+        return items[lo:hi]
+
+    # Wakes as many waiting producers as there is room for
+    def _wake_putters(self):
+        if self.capacity is None: return
+        room = self.capacity - self._list.size()
+        putters = self._putters
+        while putters and room > 0:
+            future = putters.popleft()
+            if not future.done():
+                future.set_result(None)
+                room = room - 1
+
+    # Waits until the list has room for an item. Returns how many items there's room for (None if no capacity).
+    async def _wait_for_room(self):
+        self._check_open()
+        if self.capacity is None:
+            return None
+        while self._list.size() >= self.capacity:
+            future = asyncio.get_running_loop().create_future()
+            self._putters.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    # Pass the wakeup on to another producer
+                    self._wake_putters()
+                raise
+            self._check_open()
+        return self.capacity - self._list.size()
+
+    def _check_room(self):
+        self._check_open()
+        if self.capacity is not None and self._list.size() >= self.capacity:
+            raise asyncio.QueueFull
+
+    def _check_open(self):
+        if self.closed:
+            raise ValueError("list is closed")
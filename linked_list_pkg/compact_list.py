@@ -0,0 +1,290 @@
+import sys
+from array import array
+
+from . import memory
+
+# A doubly-linked list with compact storage. Rather than being a Python object each, nodes live in parallel columns,
+# indexed by slot number: the items in a Python list, the next and prev slot numbers in typed arrays. -1 means "no
+# node". Slots freed up by removals go onto a free list and get reused by later additions. The public functions are
+# the same as LinkedList's, so one can be swapped for the other.
+#
+# There's no node cache. Getting to an index starts from the head, the tail, or the last index reached, whichever is
+# closest, which keeps sequential access cheap.
+
+NO_SLOT = -1
+
+class CompactLinkedList(object):
+
+    def __init__(self, iterable=None):
+        self._reset_storage()
+        if iterable is not None:
+            for i in iterable:
+                self._link_tail(self._alloc(i))
+
+    # Support for iteration using 'for'
+    def __iter__(self):
+        items = self._items
+        next_slots = self._next
+        slot = self.head
+        while slot != NO_SLOT:
+            yield items[slot]
+            slot = next_slots[slot]
+
+    # Support for sys.getsizeof(). Counts the list object and its columns, free slots included, but not the items (see
+    # memory_usage()).
+    def __sizeof__(self):
+        size = object.__sizeof__(self) + sys.getsizeof(vars(self))
+        for column in (self._items, self._next, self._prev, self._free):
+            size = size + sys.getsizeof(column)
+        return size
+
+    # --------------------------------------
+    # Functions for adding items
+    # --------------------------------------
+
+    # Adds item to head of linked list
+    def add_head(self, item):
+        slot = self._alloc(item)
+        if self.length == 0:
+            self.head = slot
+            self.tail = slot
+        else:
+            self._next[slot] = self.head
+            self._prev[self.head] = slot
+            self.head = slot
+        self.length = self.length + 1
+        self._finger = None
+
+    # Adds item to tail of linked list
+    def add_tail(self, item):
+        self._link_tail(self._alloc(item))
+
+    # Inserts item into list, before item at specified index. If index == length of list, place after last item.
+    def insert(self, item, index=0):
+        if index < 0 or index > self.length:
+            raise IndexError("linked list index out of range")
+        if index == 0:
+            self.add_head(item)
+        elif index == self.length:
+            self.add_tail(item)
+        else:
+            slot_to_precede = self._get_to_index(index)
+            slot = self._alloc(item)
+            prev_slot = self._prev[slot_to_precede]
+            self._prev[slot] = prev_slot
+            self._next[slot] = slot_to_precede
+            self._next[prev_slot] = slot
+            self._prev[slot_to_precede] = slot
+            self.length = self.length + 1
+            self._finger = None
+
+    # --------------------------------------
+    # Functions for removing items
+    # --------------------------------------
+
+    # Pops item from head of list, returns item
+    def pop_head(self):
+        if self.length == 0: return
+        return self._unlink(self.head)
+
+    # Pops item from tail of list, returns item
+    def pop_tail(self):
+        if self.length == 0: return
+        return self._unlink(self.tail)
+
+    # Removes item at specified index, returns item
+    def remove(self, index=0):
+        if index < 0 or (index > 0 and index >= self.length):
+            raise IndexError("linked list index {} out of range".format(index))
+        if self.length == 0: return
+        return self._unlink(self._get_to_index(index))
+
+    # --------------------------------------
+    # Functions for getting items or information
+    # --------------------------------------
+
+    # Returns current size of list
+    def size(self):
+        return self.length
+
+    def empty(self):
+        return self.length == 0
+
+    # Gets item at index
+    def get_item(self, index):
+        if index < 0 or index >= self.length:
+            raise IndexError("linked list index out of range")
+        return self._items[self._get_to_index(index)]
+
+    # Locates item in list, starting from start_index. Params and return value are the same as for LinkedList.
+    def find_item(self, item, start_index=None, backwards=False):
+        if start_index is None or start_index == -1:
+            start_index = self.length-1 if backwards else 0
+        if start_index < 0 or start_index >= self.length:
+            raise IndexError("linked list index out of range")
+        items = self._items
+        links = self._prev if backwards else self._next
+        step = -1 if backwards else 1
+        slot = self._get_to_index(start_index)
+        idx = start_index
+        while slot != NO_SLOT:
+            if items[slot] == item:
+                return idx
+            idx = idx + step
+            slot = links[slot]
+        raise ValueError("Item not found in linked list")
+
+    # Returns a Python list of items in list
+    def get_items(self):
+        return list(self)
+
+    # Returns the number of bytes of memory the list takes: what sys.getsizeof() gives, and, if deep is True, the items
+    # too. Each distinct item is counted once.
+    def memory_usage(self, deep=False):
+        size = sys.getsizeof(self)
+        if deep:
+            size = size + memory.items_size(self)
+        return size
+
+    # --------------------------------------
+    # Functions for broadly changing list
+    # --------------------------------------
+
+    # Empties the list
+    def clear(self):
+        self._reset_storage()
+
+    # Makes a copy of this list. The copy's storage has no free slots.
+    def copy(self):
+        return CompactLinkedList(self)
+
+    # Reverses the list in place. Swapping the next and prev columns does it in O(1).
+    def reverse_list(self):
+        self._next, self._prev = self._prev, self._next
+        self.head, self.tail = self.tail, self.head
+        self._finger = None
+
+    # Sorts the list. Params are the same as for LinkedList.sort(). The items are sorted, then written back along
+    # the existing chain of slots, so no links change.
+    def sort(self, reverse=False, val_func=None, key=None):
+        if key is None: key = val_func
+        if self.length < 2: return
+        sorted_items = sorted(self, key=key, reverse=reverse)
+        items = self._items
+        next_slots = self._next
+        slot = self.head
+        for item in sorted_items:
+            items[slot] = item
+            slot = next_slots[slot]
+
+    # Given another compact list, join its contents to the tail of this one. The other list is cleared. If this list
+    # is empty, the other list's storage is taken over whole; otherwise, the other list's items are copied over.
+    def join(self, other_list):
+        if self.length == 0:
+            self._take_storage(other_list)
+        else:
+            for item in other_list:
+                self._link_tail(self._alloc(item))
+        other_list.clear()
+
+    # Splits off a separate linked list, beginning with the item at index. If index is the same as the size of
+    # the list, then return an empty linked list. Whichever part is smaller is copied into fresh storage, so this is
+    # O(min(index, size - index)).
+    def split(self, index):
+        size = self.length
+        if index < 0 or index > size:
+            raise IndexError("linked list index out of range")
+        new_list = CompactLinkedList()
+        if index == size:
+            return new_list
+        if index <= size - index:
+            # Copy the front part out, hand the storage with the back part over to the new list
+            front_list = CompactLinkedList()
+            for n in range(index):
+                front_list.add_tail(self.pop_head())
+            new_list._take_storage(self)
+            self._take_storage(front_list)
+        else:
+            for n in range(size - index):
+                new_list.add_head(self.pop_tail())
+        return new_list
+
+    # --------------------------------------
+    # Private helper functions, for internal use
+    # --------------------------------------
+
+    def _reset_storage(self):
+        self._items = []
+        self._next = array('q')
+        self._prev = array('q')
+        self._free = array('q')
+        self.head = NO_SLOT
+        self.tail = NO_SLOT
+        self.length = 0
+        self._finger = None # (index, slot) of the last index reached, or None
+
+    # Moves the storage of other_list into this list, leaving the other list empty
+    def _take_storage(self, other_list):
+        self._items, self._next, self._prev, self._free = other_list._items, other_list._next, other_list._prev, other_list._free
+        self.head, self.tail, self.length = other_list.head, other_list.tail, other_list.length
+        self._finger = None
+        other_list._reset_storage()
+
+    # Returns a free slot holding item, with no links
+    def _alloc(self, item):
+        if len(self._free) > 0:
+            slot = self._free.pop()
+            self._items[slot] = item
+            self._next[slot] = NO_SLOT
+            self._prev[slot] = NO_SLOT
+            return slot
+        self._items.append(item)
+        self._next.append(NO_SLOT)
+        self._prev.append(NO_SLOT)
+        return len(self._items) - 1
+
+    def _link_tail(self, slot):
+        if self.length == 0:
+            self.head = slot
+            self.tail = slot
+        else:
+            self._prev[slot] = self.tail
+            self._next[self.tail] = slot
+            self.tail = slot
+        self.length = self.length + 1
+
+    # Unlinks the node at slot and frees the slot. Returns the item it held.
+    def _unlink(self, slot):
+        prev_slot = self._prev[slot]
+        next_slot = self._next[slot]
+        if prev_slot == NO_SLOT:
+            self.head = next_slot
+        else:
+            self._next[prev_slot] = next_slot
+        if next_slot == NO_SLOT:
+            self.tail = prev_slot
+        else:
+            self._prev[next_slot] = prev_slot
+        item = self._items[slot]
+        self.length = self.length - 1
+        self._finger = None
+        if self.length == 0:
+            # Nothing left, so let go of the storage altogether
+            self._reset_storage()
+        else:
+            self._items[slot] = None
+            self._free.append(slot)
+        return item
+
+    # Returns slot at target_idx, starting from whichever of head, tail or last index reached is closest
+    def _get_to_index(self, target_idx):
+        start_idx, slot = 0, self.head
+        if self.length - 1 - target_idx < target_idx:
+            start_idx, slot = self.length - 1, self.tail
+        if self._finger is not None and abs(self._finger[0] - target_idx) < abs(start_idx - target_idx):
+            start_idx, slot = self._finger
+        links = self._next if target_idx >= start_idx else self._prev
+        for i in range(abs(target_idx - start_idx)):
+            slot = links[slot]
+        self._finger = (target_idx, slot)
+        return slot
@@ -0,0 +1,214 @@
+import threading
+import time
+
+from .linked_list_impl import ListNode
+
+# A doubly-linked list that can be shared between threads, typically as a work queue: producers add at one end,
+# consumers pop from the other. Only the operations at the ends are supported.
+#
+# There are separate locks for the head and the tail, so that add_tail() and pop_head(), the usual queue operations,
+# never wait on each other, even when the list is empty or nearly so. That works because the list always starts with a
+# dummy node: add_tail() only ever touches the last node, and pop_head() only the dummy and the node after it, which
+# then becomes the new dummy. add_head() and pop_tail(), which can touch both ends, take both locks (head lock first).
+#
+# Threads waiting for an item, or for room in a list with a capacity, wait on a _Signal. Signalling one is free while
+# nobody is waiting, so an add or a pop normally takes just the one lock.
+
+# A condition variable that counts its waiters, so that notify() costs next to nothing when there are none
+class _Signal(object):
+
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        self.waiters = 0 # changed only with the condition's lock held
+
+    # Waits until ready() returns True, or deadline (a time.monotonic() value, None for no limit) passes. Returns
+    # False if the deadline passed first.
+    def wait_for(self, ready, deadline):
+        with self.condition:
+            # Counting ourselves in before checking means that a notify() after the state changes can't be missed
+            self.waiters = self.waiters + 1
+            try:
+                while not ready():
+                    if deadline is None:
+                        self.condition.wait()
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        self.condition.wait(remaining)
+                return True
+            finally:
+                self.waiters = self.waiters - 1
+
+    def notify(self, count=1):
+        if self.waiters > 0:
+            with self.condition:
+                self.condition.notify(count)
+
+class ConcurrentLinkedList(object):
+
+    # Params
+    #   iterable: if given, the list is filled with its items
+    #   capacity: if given, the most items the list may hold. Adds wait for room.
+    def __init__(self, iterable=None, capacity=None):
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._head_lock = threading.Lock()
+        self._tail_lock = threading.Lock()
+        self._dummy = ListNode(None) # the node before the first item
+        self._tail = self._dummy
+        # Item count is split in two, so that each part is only changed while holding one lock
+        self._head_count = 0 # changed by add_head(), pop_head() and drain(), with the head lock held
+        self._tail_count = 0 # changed by add_tail() and pop_tail(), with the tail lock held
+        self._not_empty = _Signal()
+        self._not_full = _Signal()
+        if iterable is not None:
+            for item in iterable:
+                self.add_tail(item)
+
+    def __len__(self):
+        return self.size()
+
+    # --------------------------------------
+    # Functions for adding items
+    # --------------------------------------
+
+    # Adds item to tail of list. If the list is full, waits up to timeout seconds (forever if timeout is None) for
+    # room. Returns True if the item was added, False if there was no room in time.
+    def add_tail(self, item, timeout=None):
+        node = ListNode(item)
+        deadline = self._deadline(timeout)
+        while True:
+            with self._tail_lock:
+                # Pops going on at the head can only make the count too high here, never too low
+                if self.capacity is None or self.size() < self.capacity:
+                    node.prev = self._tail
+                    self._tail.next = node
+                    self._tail = node
+                    self._tail_count = self._tail_count + 1
+                    break
+            if not self._not_full.wait_for(self._has_room, deadline):
+                return False
+        self._not_empty.notify()
+        return True
+
+    # Adds item to head of list. Waits for room the same way as add_tail().
+    def add_head(self, item, timeout=None):
+        node = ListNode(item)
+        deadline = self._deadline(timeout)
+        while True:
+            with self._head_lock, self._tail_lock:
+                if self.capacity is None or self.size() < self.capacity:
+                    dummy = self._dummy
+                    node.prev = dummy
+                    node.next = dummy.next
+                    if node.next is None:
+                        self._tail = node
+                    else:
+                        node.next.prev = node
+                    dummy.next = node
+                    self._head_count = self._head_count + 1
+                    break
+            if not self._not_full.wait_for(self._has_room, deadline):
+                return False
+        self._not_empty.notify()
+        return True
+
+    # --------------------------------------
+    # Functions for removing items
+    # --------------------------------------
+
+    # Pops item from head of list, returns item. If the list is empty, waits up to timeout seconds (forever if
+    # timeout is None; by default, not at all) for an item. Returns None if there was nothing to pop in time, as
+    # LinkedList.pop_head() does for an empty list.
+    def pop_head(self, timeout=0):
+        deadline = self._deadline(timeout)
+        while True:
+            with self._head_lock:
+                node = self._dummy.next
+                if node is not None:
+                    item = node.item
+                    # The popped node becomes the dummy
+                    node.item = None
+                    node.prev = None
+                    self._dummy = node
+                    self._head_count = self._head_count - 1
+                    break
+            if not self._not_empty.wait_for(self._has_items, deadline):
+                return None
+        self._not_full.notify()
+        return item
+
+    # Pops item from tail of list, returns item. Waits for an item the same way as pop_head().
+    def pop_tail(self, timeout=0):
+        deadline = self._deadline(timeout)
+        while True:
+            with self._head_lock, self._tail_lock:
+                node = self._tail
+                if node is not self._dummy:
+                    self._tail = node.prev
+                    self._tail.next = None
+                    node.prev = None
+                    self._tail_count = self._tail_count - 1
+                    break
+            if not self._not_empty.wait_for(self._has_items, deadline):
+                return None
+        self._not_full.notify()
+        return node.item
+
+    # Pops up to max_items items (all of them, if max_items is None) from the head of the list, without waiting.
+    # Returns them in a Python list, in list order. The head lock is only taken once, for the whole batch.
+    def drain(self, max_items=None):
+        items = []
+        with self._head_lock:
+            node = self._dummy
+            while node.next is not None and (max_items is None or len(items) < max_items):
+                node = node.next
+                items.append(node.item)
+            if len(items) == 0:
+                return items
+            node.item = None
+            node.prev = None
+            self._dummy = node
+            self._head_count = self._head_count - len(items)
+        self._not_full.notify(len(items))
+        return items
+
+    # --------------------------------------
+    # Functions for getting items or information
+    # --------------------------------------
+
+    # Returns current size of list. While other threads are adding or popping, it can be out of date by the time it
+    # is returned.
+    def size(self):
+        return self._head_count + self._tail_count
+
+    def empty(self):
+        return self.size() == 0
+
+    # Returns a Python list of items in list, as of one moment
+    def get_items(self):
+        ret_list = []
+        with self._head_lock, self._tail_lock:
+            node = self._dummy.next
+            while node is not None:
+                ret_list.append(node.item)
+                node = node.next
+        return ret_list
+
+    # --------------------------------------
+    # Private helper functions, for internal use
+    # --------------------------------------
+
+    # Returns the time.monotonic() value at which a wait of timeout seconds runs out, or None for no limit
+    def _deadline(self, timeout):
+        if timeout is None:
+            return None
+        return time.monotonic() + timeout
+
+    def _has_items(self):
+        return self._dummy.next is not None
+
+    def _has_room(self):
+        return self.capacity is None or self.size() < self.capacity
@@ -0,0 +1,84 @@
+# Hash index, used by LinkedList when hash indexing is turned on. Maps each item (or key(item), if there's a key
+# function) to the nodes holding it, so that finding an item takes O(1) on average instead of a scan. For the
+# results to match a scan, items that are equal must have equal keys, and items must not change their key while in
+# the list (the usual rules for dict keys).
+#
+# Items that can't be hashed are counted, but not indexed. While the list holds any, the index can't answer
+# lookups, and the list goes back to scanning.
+
+class HashIndex(object):
+
+    def __init__(self, key=None):
+        self.key = key
+        self.buckets = {} # key -> dict of nodes (used as an ordered set)
+        self.unhashable_count = 0
+
+    def clear(self):
+        self.buckets = {}
+        self.unhashable_count = 0
+
+    def add(self, node):
+        try:
+            item_key = self._key_of(node.item)
+            bucket = self.buckets.get(item_key)
+        except TypeError:
+            self.unhashable_count = self.unhashable_count + 1
+            return
+        if bucket is None:
+            self.buckets[item_key] = {node: None}
+        else:
+            bucket[node] = None
+
+    def remove(self, node):
+        try:
+            item_key = self._key_of(node.item)
+            bucket = self.buckets[item_key]
+        except TypeError:
+            self.unhashable_count = self.unhashable_count - 1
+            return
+        del bucket[node]
+        if len(bucket) == 0:
+            del self.buckets[item_key]
+
+    # Adds count nodes, starting with first and following next links
+    def add_chain(self, first, count):
+        node = first
+        for n in range(count):
+            self.add(node)
+            node = node.next
+
+    # Moves the nodes starting at head (up to the end of their chain) from other_index into this one
+    def take_chain(self, other_index, head):
+        node = head
+        while node is not None:
+            other_index.remove(node)
+            self.add(node)
+            node = node.next
+
+    # Moves every node in other_index into this one. The other index is emptied.
+    def take_all(self, other_index):
+        buckets = self.buckets
+        for item_key, other_bucket in other_index.buckets.items():
+            bucket = buckets.get(item_key)
+            if bucket is None:
+                buckets[item_key] = other_bucket
+            else:
+                bucket.update(other_bucket)
+        self.unhashable_count = self.unhashable_count + other_index.unhashable_count
+        other_index.clear()
+
+    # Returns the nodes whose items are equal to item, in no particular order. Returns None if the index can't
+    # answer (item is unhashable, or the list holds unhashable items), in which case the caller has to scan.
+    def nodes_for(self, item):
+        if self.unhashable_count > 0:
+            return None
+        try:
+            bucket = self.buckets.get(self._key_of(item))
+        except TypeError:
+            return None
+        if bucket is None:
+            return []
+        return [node for node in bucket if node.item == item]
+
+    def _key_of(self, item):
+        return item if self.key is None else self.key(item)
@@ -1,33 +1,190 @@
 # Implementation of a linked list. It is doubly-linked. There is a caching feature, for keeping track of last
 # node accessed. That way, if we try to get an item at a particular index, we might be able to get to it
 # more quickly.
+#
+# The cache (or tree) is maintained lazily after operations that change the whole list. join() and split() shift
+# cache entries from one list to the other rather than walking either; reverse_list() maps the entries to their new
+# indices; sort() marks everything stale. Whatever part of a list has no cache entries is marked as stale, and gets
+# walked, and cache entries made for it, the first time an index in it is needed.
+#
+# On top of the cache entries, which are spread evenly over the list, the list remembers a few "fingers": the
+# positions most recently reached by index, in least-recently-used order. Sequential or clustered access then starts
+# walking from a finger close by, which makes it close to O(1) per access. cache_policy picks the mix: 'mixed' (the
+# default) uses both, 'stride' only the evenly spread entries, 'finger' only the fingers (so the list never has to
+# be walked to build a cache).
+#
+# Optionally, the list also keeps a hash index from items to nodes (see hash_index.py), which makes find_item(),
+# count(), 'in' and remove_value() O(1) on average instead of a scan.
+#
+# Alternatively, the list can be created with index_mode='tree', in which case an order-statistic tree is kept over
+# the nodes instead of the cache (see order_index.py). That makes positional access and positional changes O(log n)
+# no matter how big the list gets, at the cost of some extra memory per node.
+#
+# For queues with a lot of churn, the list can keep a pool of nodes that were popped or removed, and reuse them for
+# items added later, rather than allocate a new node each time (see node_pool). Pooled nodes are scrubbed, so they
+# hold no references to items or other nodes. Since a removed node can then come back into the list, holding another
+# item, a cursor (or iterator) on a removed node must never be used again: it might now be on that other item.
+#
+# For finding out what the cache is doing in a running program, enable_stats() records where each access by index
+# started walking from and how far it walked, how often the cache was rebuilt, and what each method call took (see
+# list_stats.py).
+#
+# snapshot() gives a read-only view of the list as it is, in O(1). The view shares the list's nodes, and the list
+# copies out, for each of its snapshots, just the items of the nodes it's about to change (see snapshot.py).
 
+import sys
+import weakref
+from bisect import bisect_left
+from copy import deepcopy
+from operator import attrgetter
+from time import perf_counter
+
+from .order_index import OrderIndex
+from .hash_index import HashIndex
+from .list_stats import ListStats
+from .snapshot import ListSnapshot
+from . import memory
+from . import parallel
+from . import serialize
+
+__all__ = ['ListNode', 'IndexedListNode', 'ListCursor', 'LinkedList']
+
+# Nodes use __slots__, to keep per-node memory down in big lists. For an even more compact layout, see
+# CompactLinkedList.
 class ListNode(object):
+    __slots__ = ('item', 'next', 'prev')
+
+    def __init__(self, item):
+        self.item = item
+        self.next = None
+        self.prev = None
+
+# A list node that is also a node in the order-statistic tree. Used when index_mode is 'tree'.
+class IndexedListNode(ListNode):
+    __slots__ = ('left', 'right', 'parent', 'size', 'prio')
 
     def __init__(self, item):
         self.item = item
         self.next = None
         self.prev = None
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.size = 1
+        self.prio = 0.0
+
+# A cursor is a stable handle on one node of a linked list. Unlike an index, it stays on the same node when the list
+# changes elsewhere, and inserting or removing at a cursor relinks nodes, with no walk to get to an index in tree mode,
+# or in cache mode while the cursor's index is current (or a finger is a short walk away). Otherwise, in cache mode,
+# the cache needs the index: for the first few such edits after the cache is built, it's found by walking back to a
+# cached node, O(n / cache size), and after that the cache is marked stale instead, so that the edits are O(1) and the
+# next access by index rebuilds the cache, in O(n). Either way, a run of edits costs at most about twice the cheaper of
+# the two. (If the list has snapshots, they need the index, so that's always worked out.)
+# Cursors come from add_head(), add_tail(), insert(), cursor(), find_cursor() and cursors(). If the cursor's own node
+# is removed by other means (pop_head(), remove(), clear(), etc.), or moved to another list by join() or split(),
+# the cursor must not be used again.
+class ListCursor(object):
+    __slots__ = ('owner', 'node', 'idx', 'mod_count')
+
+    def __init__(self, owner, node, index=-1):
+        self.owner = owner
+        self.node = node
+        self.idx = index # index of node, as of owner's mod count below. -1 if not known.
+        self.mod_count = owner._mod_count
+
+    def valid(self):
+        return self.node is not None
+
+    @property
+    def item(self):
+        self._check_valid()
+        return self.node.item
+
+    @item.setter
+    def item(self, value):
+        self._check_valid()
+        self.owner._set_node_item(self.node, value, self._known_index())
+
+    # Returns index of the cursor's node. That's O(1) if the list hasn't changed since the cursor last knew it.
+    def index(self):
+        self._check_valid()
+        if self._known_index() == -1:
+            self.idx = self.owner._index_of_node(self.node)
+            self.mod_count = self.owner._mod_count
+        return self.idx
+
+    # Moves to the next node. Returns False if that goes past the tail, after which the cursor isn't valid.
+    def move_next(self):
+        self._check_valid()
+        self.node = self.node.next
+        self._after_move(1)
+        return self.node is not None
+
+    # Moves to the previous node. Returns False if that goes past the head, after which the cursor isn't valid.
+    def move_prev(self):
+        self._check_valid()
+        self.node = self.node.prev
+        self._after_move(-1)
+        return self.node is not None
+
+    # Inserts item before the cursor's node. Returns a cursor on the new node.
+    def insert_before(self, item):
+        self._check_valid()
+        return self.owner._insert_at_cursor(self, item, True)
+
+    # Inserts item after the cursor's node. Returns a cursor on the new node.
+    def insert_after(self, item):
+        self._check_valid()
+        return self.owner._insert_at_cursor(self, item, False)
+
+    # Removes the cursor's node, returns its item. The cursor moves on to the next node (if there is one).
+    def remove(self):
+        self._check_valid()
+        return self.owner._remove_at_cursor(self)
+
+    def _check_valid(self):
+        if self.node is None:
+            raise IndexError("cursor is not on a node")
+
+    # Returns index of node if it is known to be current, -1 otherwise
+    def _known_index(self):
+        if self.mod_count != self.owner._mod_count:
+            return -1
+        return self.idx
+
+    def _after_move(self, step):
+        if self.node is None:
+            self.idx = -1
+        elif self.idx != -1:
+            self.idx = self.idx + step
 
 class LinkedList(object):
 
-    # Helper class. Refers to a node in a linked list with both the node pointer and its index in the list.
-    # For now, its two main purposes are for implementing the cached node and for implementing the Python
-    # iterator. I might later make this class more useful to outside callers.
+    INDEX_MODES = ('cache', 'tree')
+    CACHE_POLICIES = ('mixed', 'stride', 'finger')
+    DEFAULT_FINGER_COUNT = 8
+    SHORT_WALK = 16 # _get_to_index() walks this far from a head, tail or finger rather than look up the cache
+    MAX_HASH_CANDIDATES = 16 # find_item() scans rather than use the hash index if an item has more duplicates
+    PARALLEL_MIN_SEGMENT = 10000 # parallel_sort() and parallel_map() give each worker at least this many items
+    # In tree mode, removing more than 1/TREE_REBUILD_FRACTION of the list at once rebuilds the tree (when next needed)
+    # rather than take each node out of it
+    TREE_REBUILD_FRACTION = 5
+    # Methods whose calls are counted and timed while stats are on (see enable_stats())
+    TIMED_METHODS = ('add_head', 'add_tail', 'append', 'insert', 'extend', 'extend_head', 'insert_many', 'pop_head',
+                     'pop_tail', 'remove', 'remove_at', 'remove_value', 'remove_if', 'retain', 'filter_in_place',
+                     'dedupe', 'remove_all', 'get_item', 'get_items_at', 'set_items_at',
+                     'find_item', 'count', 'find_cursor', 'cursor', 'get_items', 'clear', 'copy', 'reverse_list',
+                     'snapshot', 'sort', 'parallel_sort', 'parallel_map', 'join', 'split')
+
+    # Helper class. Refers to a node in a linked list with both the node pointer and its index in the list. It's
+    # used for cache entries and fingers.
     class NodeRef:
+        __slots__ = ('node', 'idx')
+
         def __init__(self, node=None, index=-1):
             self.node = node
             self.idx = index
 
-        # For iterator support
-        def __next__(self):
-            node = self.node
-            if node is None:
-                raise StopIteration
-            self.node = self.node.next
-            self.idx = self.idx + 1
-            return node.item
-
         def set(self, node, index):
             self.node = node
             self.idx = index
@@ -50,32 +207,204 @@ class LinkedList(object):
             if self.node is not None:
                 self.idx = self.idx - 1
 
-    def __init__(self, iterable=None):
+    # Params
+    #   iterable: if given, the list is filled with its items
+    #   index_mode: 'cache' to find indices through the node cache, 'tree' to use an order-statistic tree
+    #   hash_index: if True, keep a hash index of items, for finding them quickly
+    #   hash_key: if given, the hash index uses hash_key(item) rather than item itself as the key
+    #   cache_policy: in cache mode, 'mixed', 'stride' or 'finger' (see top of file)
+    #   finger_count: how many recently reached positions to remember, with the 'mixed' or 'finger' policy
+    #   node_pool: the most popped or removed nodes to keep for reuse (0, the default, for no pool)
+    def __init__(self, iterable=None, index_mode='cache', hash_index=False, hash_key=None, cache_policy='mixed',
+                 finger_count=DEFAULT_FINGER_COUNT, node_pool=0):
+        if index_mode not in LinkedList.INDEX_MODES:
+            raise ValueError("unknown index mode {}".format(index_mode))
+        if cache_policy not in LinkedList.CACHE_POLICIES:
+            raise ValueError("unknown cache policy {}".format(cache_policy))
+        if node_pool < 0:
+            raise ValueError("node pool size can't be negative")
+        self.index_mode = index_mode
+        self.cache_policy = cache_policy
+        self.finger_count = 0 if cache_policy == 'stride' or index_mode == 'tree' else finger_count
+        self._fingers = [] # NodeRefs of recently reached positions, least recently used first
+        self._order_index = OrderIndex() if index_mode == 'tree' else None
+        self._hash_index = HashIndex(hash_key) if hash_index else None
         self.head = None
         self.tail = None
         self.length = 0
+        self._mod_count = 0 # goes up every time the structure of the list changes
+        self._stale_from = None # if not None, the cache has no entries from this index on (in tree mode, always 0)
+        self._edit_walks = 0 # walks to the index of a node for an edit, since the cache was last built
+        self._stats = None # ListStats, while stats are on
+        self.node_pool = node_pool
+        self._free_nodes = [] # scrubbed nodes, for reuse by _new_node()
+        self._pool_hits = 0 # nodes taken from the pool
+        self._pool_misses = 0 # nodes allocated, with the pool empty (only counted if there is a pool)
+        self._pool_discards = 0 # nodes dropped, with the pool full
+        self._snapshots = [] # weak references to the snapshots that may share nodes with the list
+        self._fresh_snapshot = None # weak reference to the last snapshot taken, until the list changes
         self._rebuild_cache()
 
         if iterable is not None:
-            for i in iterable:
-                node = ListNode(i)
-                self._add_to_tail_internal(node)
-            self._rebuild_cache()
+            self.extend(iterable)
+
+    # Creates a list from the items of iterable
+    @classmethod
+    def from_iterable(cls, iterable, index_mode='cache'):
+        return cls(iterable, index_mode=index_mode)
+
+    # Reads a list written by dump() from fp, a binary file. The list gets the settings it was dumped with, and its
+    # items are added a chunk at a time, so memory use stays bounded.
+    @classmethod
+    def load(cls, fp):
+        settings, chunks = serialize.load_items(fp)
+        new_list = cls(**settings)
+        for chunk in chunks:
+            new_list.extend(chunk)
+        return new_list
 
-    # Support for iteration using 'for'. A NodeRef object serves as the iterator.
+    # Support for 'in'. Uses the hash index if there is one.
+    def __contains__(self, item):
+        nodes = self._hash_index.nodes_for(item) if self._hash_index is not None else None
+        if nodes is not None:
+            return len(nodes) > 0
+        node = self.head
+        while node is not None:
+            if node.item == item:
+                return True
+            node = node.next
+        return False
+
+    # Support for iteration using 'for'. The iterator is a generator, which keeps its place in a local variable. If the
+    # list's structure changes while it's in use (items added, removed or moved), the next step raises RuntimeError,
+    # rather than carry on from a node that may no longer be in the list. Setting items is fine. To remove items while
+    # going through the list, use cursors().
     def __iter__(self):
-        return LinkedList.NodeRef(self.head, 0)
+        mod_count = self._mod_count
+        node = self.head
+        while node is not None:
+            yield node.item
+            if self._mod_count != mod_count:
+                raise RuntimeError("linked list changed during iteration")
+            node = node.next
+
+    # Support for reversed(). Iterates from tail to head, with the same check as __iter__.
+    def __reversed__(self):
+        mod_count = self._mod_count
+        node = self.tail
+        while node is not None:
+            yield node.item
+            if self._mod_count != mod_count:
+                raise RuntimeError("linked list changed during iteration")
+            node = node.prev
 
+    # Support for sys.getsizeof(). Counts the list object and everything it owns: the nodes (pooled ones too), the
+    # cache entries and fingers, and the tree or hash index if there is one. The items aren't counted (see
+    # memory_usage()).
     def __sizeof__(self):
+        size = object.__sizeof__(self) + sys.getsizeof(vars(self))
+        if self._order_index is not None:
+            # Tree nodes each have a float priority of their own, and a subtree size that may not be a shared int
+            size = size + sys.getsizeof(self._order_index)
+            node = self.head
+            while node is not None:
+                size = size + sys.getsizeof(node) + sys.getsizeof(node.prio) + memory.int_size(node.size)
+                node = node.next
+        elif self.head is not None:
+            # Nodes all have the same size
+            size = size + self.length * sys.getsizeof(self.head)
+        size = size + sys.getsizeof(self._free_nodes) + sys.getsizeof(self._snapshots)
+        for node in self._free_nodes:
+            size = size + sys.getsizeof(node) + (sys.getsizeof(node.prio) if self._order_index is not None else 0)
+        for entries in (self.cached_nodes, self._fingers):
+            size = size + sys.getsizeof(entries)
+            for entry in entries:
+                size = size + sys.getsizeof(entry) + memory.int_size(entry.idx)
+        if self._hash_index is not None:
+            buckets = self._hash_index.buckets
+            size = size + sys.getsizeof(self._hash_index) + sys.getsizeof(buckets)
+            for bucket in buckets.values():
+                size = size + sys.getsizeof(bucket)
+        return size
+
+    def __len__(self):
         return self.length
 
+    # Support for pickling. Only the settings and the items are stored, not the nodes: pickle takes the items from an
+    # iterator and stores them in flat batches, which go back in through extend(). So no node links are followed
+    # recursively, and the cache, tree or hash index is rebuilt on loading rather than stored. The hash key, if there
+    # is one, has to be picklable.
+    def __reduce__(self):
+        settings = self._settings()
+        return (self.__class__, (None, settings['index_mode'], settings['hash_index'], settings['hash_key'],
+                                 settings['cache_policy'], settings['finger_count'], settings['node_pool']), None,
+                iter(self))
+
+    # Support for copy.copy() and copy.deepcopy(). The copy is of the same class, with the same settings.
+    def __copy__(self):
+        new_list = self.__class__(**self._settings())
+        new_list.extend(self)
+        return new_list
+
+    def __deepcopy__(self, memo):
+        new_list = self.__class__(**self._settings())
+        memo[id(self)] = new_list
+        new_list.extend([deepcopy(item, memo) for item in self])
+        return new_list
+
+    # Support for ll[index] and ll[start:stop:step]. Negative indices count from the end, as with Python lists. A slice
+    # is read in a single traversal, and returned as a new list of the same kind.
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            new_list = self._new_empty_list()
+            new_list.extend([node.item for node in self._slice_nodes(index)])
+            return new_list
+        return self._get_to_index(self._normalize_index(index)).item
+
+    # Support for ll[index] = item and ll[start:stop:step] = items. Assigning to a plain slice relinks nodes in place,
+    # so the list can grow or shrink; an extended slice (step other than 1) needs exactly one item per index.
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step == 1:
+                self._replace_range(start, max(0, stop - start), value)
+                return
+            nodes = self._slice_nodes(index)
+            items = list(value)
+            if len(items) != len(nodes):
+                raise ValueError("attempt to assign sequence of size {} to extended slice of size {}".format(
+                    len(items), len(nodes)))
+            for idx, node, item in zip(range(*index.indices(self.length)), nodes, items):
+                self._set_node_item(node, item, idx)
+            return
+        index = self._normalize_index(index)
+        self._set_node_item(self._get_to_index(index), value, index)
+
+    # Support for del ll[index] and del ll[start:stop:step]
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step == 1:
+                self._replace_range(start, max(0, stop - start), ())
+            else:
+                targets = sorted(range(start, stop, step))
+                self._remove_nodes(targets, self._nodes_at_sorted(targets))
+            return
+        index = self._normalize_index(index)
+        node = self._get_to_index(index)
+        self._remove_node(node, index)
+        if self.node_pool > 0:
+            self._recycle_node(node)
+
     # --------------------------------------
     # Functions for adding items
     # --------------------------------------
 
-    # Adds item to head of linked list
+    # Adds item to head of linked list. Returns a cursor on the new node.
     def add_head(self, item):
-        node = ListNode(item)
+        if self._snapshots:
+            self._snapshot_change(0, 0, 1)
+        node = self._new_node(item)
         if self.size() == 0:
             self.head = node
             self.tail = node
@@ -84,33 +413,85 @@ class LinkedList(object):
             self.head.prev = node
             self.head = node
         self.length = self.length + 1
-        self._adjust_cache(True, 0)
+        self._adjust_cache(True, 0, node)
+        return ListCursor(self, node, 0)
 
-    # Adds item to tail of linked list
+    # Same as add_tail(), but returns nothing, as for a Python list
+    def append(self, item):
+        self.add_tail(item)
+
+    # Adds item to tail of linked list. Returns a cursor on the new node.
     def add_tail(self, item):
         old_size = self.length
-        node = ListNode(item)
+        if self._snapshots:
+            self._snapshot_change(old_size, 0, 1)
+        node = self._new_node(item)
         self._add_to_tail_internal(node)
-        self._adjust_cache(True, old_size)
+        self._adjust_cache(True, old_size, node)
+        return ListCursor(self, node, old_size)
 
     # Inserts item into list, before item at specified index. If index == length of list, place after last item.
+    # Returns a cursor on the new node.
     def insert(self, item, index=0):
         if index < 0 or index > self.size():
             raise IndexError("linked list index out of range")
         if index == 0:
-            self.add_head(item)
+            return self.add_head(item)
         elif index == self.size():
-            self.add_tail(item)
+            return self.add_tail(item)
         else:
+            if self._snapshots:
+                self._snapshot_change(index, 0, 1)
             node_to_precede = self._get_to_index(index)
-            new_node = ListNode(item)
+            new_node = self._new_node(item)
             new_node.prev = node_to_precede.prev
             new_node.next = node_to_precede
             if new_node.prev is not None:
                 new_node.prev.next = new_node
             node_to_precede.prev = new_node
             self.length = self.length + 1
-            self._adjust_cache(True, index)
+            self._adjust_cache(True, index, new_node)
+            return ListCursor(self, new_node, index)
+
+    # Adds all items of iterable to tail of linked list. The nodes are linked in one pass, and the cache (or tree) is
+    # fixed up once at the end, rather than once per item.
+    def extend(self, iterable):
+        self.insert_many(self.size(), iterable)
+
+    # Adds all items of iterable to head of linked list, keeping their order
+    def extend_head(self, iterable):
+        self.insert_many(0, iterable)
+
+    # Inserts all items of iterable into list, before item at specified index, keeping their order. If index == length
+    # of list, they go after the last item.
+    def insert_many(self, index, iterable):
+        if index < 0 or index > self.size():
+            raise IndexError("linked list index out of range")
+        first, last, count = self._make_chain(iterable)
+        if count == 0: return
+        if self._snapshots:
+            self._snapshot_change(index, 0, count)
+        node_to_precede = self._get_to_index(index) if index < self.size() else None
+        # In tree mode, the new nodes get their own tree while they're still a separate chain
+        chain_index = None
+        if self._order_index is not None:
+            chain_index = OrderIndex()
+            chain_index.build(first)
+        prev_node = self.tail if node_to_precede is None else node_to_precede.prev
+        first.prev = prev_node
+        last.next = node_to_precede
+        if prev_node is None:
+            self.head = first
+        else:
+            prev_node.next = first
+        if node_to_precede is None:
+            self.tail = last
+        else:
+            node_to_precede.prev = last
+        self.length = self.length + count
+        if self._hash_index is not None:
+            self._hash_index.add_chain(first, count)
+        self._adjust_cache_for_chain(index, count, chain_index)
 
     # A helper function that doesn't do cache adjustments
     def _add_to_tail_internal(self, node):
@@ -130,6 +511,8 @@ class LinkedList(object):
     # Pops item from head of list, returns item
     def pop_head(self):
         if self.size() == 0: return
+        if self._snapshots:
+            self._snapshot_change(0, 1, 0)
         ret_node = self.head
         self.head = ret_node.next
         if self.head is not None:
@@ -137,13 +520,18 @@ class LinkedList(object):
         if self.tail is ret_node:
             self.tail = None
         self.length = self.length - 1
-        self._adjust_cache(False, 0)
-        return ret_node.item
+        self._adjust_cache(False, 0, ret_node)
+        item = ret_node.item
+        if self.node_pool > 0:
+            self._recycle_node(ret_node)
+        return item
 
     # Pops item from tail of list, returns item
     def pop_tail(self):
         size = self.size()
         if size == 0: return
+        if self._snapshots:
+            self._snapshot_change(size - 1, 1, 0)
         ret_node = self.tail
         self.tail = ret_node.prev
         if self.tail is not None:
@@ -151,8 +539,11 @@ class LinkedList(object):
         if self.head is ret_node:
             self.head = None
         self.length = self.length - 1
-        self._adjust_cache(False, size - 1)
-        return ret_node.item
+        self._adjust_cache(False, size - 1, ret_node)
+        item = ret_node.item
+        if self.node_pool > 0:
+            self._recycle_node(ret_node)
+        return item
 
     # Removes item at specified index, returns item
     def remove(self, index=0):
@@ -164,14 +555,94 @@ class LinkedList(object):
         elif index == self.size()-1:
             return self.pop_tail()
         else:
+            if self._snapshots:
+                self._snapshot_change(index, 1, 0)
             node_to_remove = self._get_to_index(index)
             if node_to_remove.prev is not None:
                 node_to_remove.prev.next = node_to_remove.next
             if node_to_remove.next is not None:
                 node_to_remove.next.prev = node_to_remove.prev
             self.length = self.length - 1
-            self._adjust_cache(False, index)
-            return node_to_remove.item
+            self._adjust_cache(False, index, node_to_remove)
+            item = node_to_remove.item
+            if self.node_pool > 0:
+                self._recycle_node(node_to_remove)
+            return item
+
+    # Removes the items at the given indices (as they are before any removal), returns them in the order the indices
+    # were given. All the nodes are found in a single sweep. Raises IndexError, and removes nothing, if any index is
+    # out of range.
+    def remove_at(self, indices):
+        indices = list(indices)
+        targets = self._sorted_indices(indices)
+        nodes = self._nodes_at_sorted(targets)
+        item_at = dict(zip(targets, [node.item for node in nodes]))
+        self._remove_nodes(targets, nodes)
+        return [item_at[idx] for idx in indices]
+
+    # Removes the first item equal to item, returns it. Raises ValueError if there isn't one. With a hash index, if
+    # there's only one such item, it's removed without working out its index, as for an edit at a cursor.
+    def remove_value(self, item):
+        nodes = self._hash_index.nodes_for(item) if self._hash_index is not None else None
+        if nodes is not None and len(nodes) == 1:
+            node = nodes[0]
+            idx = self._edit_index(node, -1)
+        else:
+            idx, node = self._find_node(item, None, False)
+        item = self._remove_node_anywhere(node, idx)
+        if self.node_pool > 0:
+            self._recycle_node(node)
+        return item
+
+    # Removes every item for which pred(item) is true, returns them in order. The list is walked once, calling pred
+    # once per item, and then the nodes are unlinked and the cache (or tree) fixed up once for all of them, rather than
+    # once per removal. If pred raises an exception, nothing is removed; if it changes the list's structure, that
+    # raises RuntimeError.
+    def remove_if(self, pred):
+        return self._remove_matching(pred)
+
+    # Keeps only the items for which pred(item) is true, removing the rest in one pass as remove_if() does. Returns the
+    # items removed.
+    def retain(self, pred):
+        return self._remove_matching(lambda item: not pred(item))
+
+    # Same as retain()
+    def filter_in_place(self, pred):
+        return self.retain(pred)
+
+    # Removes duplicates in one pass, keeping the first of each, and returns the items removed. Items are compared by
+    # key(item) if key is given, otherwise by themselves. If consecutive is True, only duplicates next to each other are
+    # removed (as Unix uniq does), and the keys don't need to be hashable. Otherwise every key seen is kept in a set,
+    # so they do.
+    def dedupe(self, key=None, consecutive=False):
+        if consecutive:
+            previous_key = None
+            started = False
+            def is_duplicate(item):
+                nonlocal previous_key, started
+                item_key = item if key is None else key(item)
+                duplicate = started and item_key == previous_key
+                previous_key, started = item_key, True
+                return duplicate
+        else:
+            seen = set()
+            def is_duplicate(item):
+                item_key = item if key is None else key(item)
+                if item_key in seen:
+                    return True
+                seen.add(item_key)
+                return False
+        return self._remove_matching(is_duplicate)
+
+    # Removes every item equal to value, returns how many there were. With a hash index, the nodes are found through
+    # it, unless there are so many that a scan is quicker than working out their indices.
+    def remove_all(self, value):
+        nodes = self._hash_index.nodes_for(value) if self._hash_index is not None else None
+        if nodes is not None and len(nodes) <= LinkedList.MAX_HASH_CANDIDATES:
+            found = sorted((self._index_of_node(node), node) for node in nodes)
+            self._remove_nodes([idx for idx, node in found], [node for idx, node in found])
+            return len(found)
+        return len(self._remove_matching(lambda item: item == value))
 
     # --------------------------------------
     # Functions for getting items or information
@@ -191,25 +662,88 @@ class LinkedList(object):
         node = self._get_to_index(index)
         return node.item
 
-    # Locates item in list, starting from start_index.
+    # Gets the items at the given indices, returned in the order the indices were given. Rather than a separate walk
+    # for each index, the indices are sorted and the nodes found in a single sweep, so that k indices take
+    # O(n + k log k) at worst instead of O(k * n / cache size).
+    def get_items_at(self, indices):
+        indices = list(indices)
+        targets = self._sorted_indices(indices)
+        item_at = dict(zip(targets, [node.item for node in self._nodes_at_sorted(targets)]))
+        return [item_at[idx] for idx in indices]
+
+    # Sets the item at each of the given indices to the matching item from items, in a single sweep. If an index is
+    # given more than once, the last item given for it wins.
+    def set_items_at(self, indices, items):
+        indices = list(indices)
+        items = list(items)
+        if len(indices) != len(items):
+            raise ValueError("set_items_at() needs as many items as indices")
+        targets = self._sorted_indices(indices)
+        node_at = dict(zip(targets, self._nodes_at_sorted(targets)))
+        for idx, item in zip(indices, items):
+            self._set_node_item(node_at[idx], item, idx)
+
+    # Locates item in list, starting from start_index. With a hash index, the nodes holding item are found in O(1), but
+    # their indices still have to be worked out: O(log n) each in tree mode, and in cache mode, a walk back to a cached
+    # node, about as long as get_item()'s.
     # Params
     #   item: item to find
     #   start_index: if given, index to start searching from. -1 is the same as not giving an index.
     #   backwards: if true, we search backwards
     # Returns index of item
     def find_item(self, item, start_index=None, backwards=False):
-        if start_index is None or start_index == -1:
-            start_index = self.size()-1 if backwards else 0
-        if start_index < 0 or start_index >= self.size():
-            raise IndexError("linked list index out of range")
-        node = self._get_to_index(start_index)
-        idx = start_index
+        return self._find_node(item, start_index, backwards)[0]
+
+    # Returns the number of items equal to item. Uses the hash index if there is one.
+    def count(self, item):
+        nodes = self._hash_index.nodes_for(item) if self._hash_index is not None else None
+        if nodes is not None:
+            return len(nodes)
+        count = 0
+        node = self.head
         while node is not None:
             if node.item == item:
-                return idx
-            idx = idx + (-1 if backwards else 1)
-            node = node.prev if backwards else node.next
-        raise ValueError("Item not found in linked list")
+                count = count + 1
+            node = node.next
+        return count
+
+    # Like find_item(), but returns a cursor on the node found
+    def find_cursor(self, item, start_index=None, backwards=False):
+        idx, node = self._find_node(item, start_index, backwards)
+        return ListCursor(self, node, idx)
+
+    # Returns a cursor on the node at index
+    def cursor(self, index):
+        if index < 0 or index >= self.size():
+            raise IndexError("linked list index out of range")
+        return ListCursor(self, self._get_to_index(index), index)
+
+    # Returns an iterator over the items from index on, to the tail (or, if backwards is True, to the head). The walk to
+    # index starts from the closest cached node or finger, as for get_item(). Negative indices count from the end.
+    # Going forwards, index can be the length of the list, for an empty iteration. Raises RuntimeError like __iter__
+    # if the list changes.
+    def iter_from(self, index, backwards=False):
+        if not backwards and index == self.length:
+            return iter(())
+        index = self._normalize_index(index)
+        return self._iter_nodes(self._get_to_index(index), index + 1 if backwards else self.length - index, backwards)
+
+    # Returns an iterator over the items from start up to, but not including, stop. start and stop work as in a slice
+    # (ll[start:stop]), but the items are read as they're iterated over, rather than copied into a new list.
+    def iter_range(self, start, stop):
+        start, stop, step = slice(start, stop).indices(self.length)
+        if start >= stop:
+            return iter(())
+        return self._iter_nodes(self._get_to_index(start), stop - start, False)
+
+    # Iterates through the list, producing a cursor for each node
+    def cursors(self):
+        node = self.head
+        idx = 0
+        while node is not None:
+            yield ListCursor(self, node, idx)
+            node = node.next
+            idx = idx + 1
 
     # Returns a Python list of items in list
     def get_items(self):
@@ -220,31 +754,127 @@ class LinkedList(object):
             node = node.next
         return ret_list
 
+    # Returns the number of bytes of memory the list takes: what sys.getsizeof() gives, and, if deep is True, the items
+    # too (and the hash keys, if the hash index has a key function). Each distinct item is counted once, but not what
+    # it refers to in turn (see memory.py).
+    def memory_usage(self, deep=False):
+        size = sys.getsizeof(self)
+        if deep:
+            seen = set()
+            size = size + memory.items_size(self, seen)
+            if self._hash_index is not None and self._hash_index.key is not None:
+                size = size + memory.items_size(self._hash_index.buckets, seen)
+        return size
+
+    # Returns counts for the node pool, in a dict: 'size' (nodes in the pool now), 'capacity' (node_pool), 'hits' (nodes
+    # reused from it), 'misses' (nodes allocated because it was empty), 'discards' (nodes not kept because it was full)
+    # and 'hit_rate' (hits over nodes needed)
+    def node_pool_stats(self):
+        needed = self._pool_hits + self._pool_misses
+        return {'size': len(self._free_nodes), 'capacity': self.node_pool, 'hits': self._pool_hits,
+                'misses': self._pool_misses, 'discards': self._pool_discards,
+                'hit_rate': self._pool_hits / needed if needed > 0 else 0.0}
+
+    # Returns the runtime statistics gathered since enable_stats() (or the last reset), as a dict of plain values, or
+    # None if stats are off. Keys:
+    #   accesses: number of nodes reached by index, total and by where the walk started ('head', 'tail', 'finger',
+    #     'cache' or, in tree mode, 'tree')
+    #   hops, mean_hops, max_hops, hop_histogram: number of nodes walked over to reach them (0 in tree mode)
+    #   rebuilds, rebuild_time: number and total seconds of full cache (or tree) rebuilds ('rebuild') and refreshes of
+    #     the stale part of the cache ('refresh')
+    #   operations: for each method called, a dict of calls, total_time, mean_time, max_time (in seconds) and a latency
+    #     histogram (in microseconds)
+    # If reset is True, the stats start over after being read.
+    def stats(self, reset=False):
+        if self._stats is None:
+            return None
+        snapshot = self._stats.snapshot()
+        if reset:
+            self._stats.reset()
+        return snapshot
+
     # --------------------------------------
     # Functions for broadly changing list
     # --------------------------------------
 
+    # Turns on the hash index, building it from the items now in the list. If key is given, the index uses key(item)
+    # rather than the item itself. Equal items must have equal keys.
+    def enable_hash_index(self, key=None):
+        self._hash_index = HashIndex(key)
+        self._hash_index.add_chain(self.head, self.length)
+
+    def disable_hash_index(self):
+        self._hash_index = None
+
+    # Turns on runtime statistics, read with stats(). If time_methods is True, calls to the methods in TIMED_METHODS
+    # are counted and timed as well; a method called by another is only counted as part of that one. Operators (ll[i],
+    # 'in', iteration) aren't timed, though the accesses they make are recorded. hooks, if given, are called with each
+    # event as it's recorded (see list_stats.py). Turning stats on again starts them over.
+    def enable_stats(self, time_methods=True, hooks=None):
+        self.disable_stats()
+        self._stats = ListStats(hooks)
+        if time_methods:
+            for name in LinkedList.TIMED_METHODS:
+                setattr(self, name, self._stats.timed(name, getattr(self, name)))
+
+    # Turns off runtime statistics, taking the method timers off the list
+    def disable_stats(self):
+        self._stats = None
+        for name in LinkedList.TIMED_METHODS:
+            self.__dict__.pop(name, None)
+
     # Empties the list
     def clear(self):
+        if self._snapshots:
+            # The snapshots go on reading the nodes let go of through a list of their own, which nothing else changes
+            orphan_list = LinkedList(index_mode=self.index_mode)
+            orphan_list.head, orphan_list.tail, orphan_list.length = self.head, self.tail, self.length
+            orphan_list._mark_stale(0)
+            self._move_snapshots(orphan_list, 0, 0)
+        self._fresh_snapshot = None
+        self._mod_count = self._mod_count + 1
+        self._stale_from = None
         self.head = None
         self.tail = None
         self.length = 0
         self.cached_nodes = []
         self.num_valid_cache_entries = 0
+        self._fingers = []
+        if self._order_index is not None:
+            self._order_index.clear()
+        if self._hash_index is not None:
+            self._hash_index.clear()
 
     # Makes a copy of this list
     def copy(self):
-        new_list = LinkedList()
-        node = self.head
-        while node:
-            new_list.add_tail(node.item)
-            node = node.next
+        new_list = self._new_empty_list()
+        new_list.extend(self.get_items())
         return new_list
 
+    # Returns a read-only snapshot of the list: a ListSnapshot, which goes on giving the items the list has now, in this
+    # order, however the list changes later. It can be iterated over (forwards or backwards) and indexed like the list.
+    # Taking one is O(1), as it shares the list's nodes; from then on, before the list changes any nodes, it copies
+    # their items out for the snapshot (see snapshot.py). Snapshots taken with no change to the list in between are the
+    # same object.
+    def snapshot(self):
+        snapshot = self._fresh_snapshot() if self._fresh_snapshot is not None else None
+        if snapshot is None:
+            snapshot = ListSnapshot(self)
+            self._fresh_snapshot = weakref.ref(snapshot)
+            self._snapshots.append(self._fresh_snapshot)
+        return snapshot
+
+    # Writes the list's settings and items to fp, a binary file, in the format described in serialize.py. The items
+    # are written a chunk at a time, so memory use stays bounded. They have to be picklable, as does the hash key.
+    def dump(self, fp):
+        serialize.dump_items(fp, self._settings(), self)
+
     # Reverses the list in place
     def reverse_list(self):
         size = self.size()
         if size == 0: return
+        if self._snapshots:
+            self._snapshot_change(0, size, size)
         node = self.head
         while node:
             orig_next = node.next
@@ -254,27 +884,103 @@ class LinkedList(object):
         orig_tail = self.tail
         self.tail = self.head
         self.head = orig_tail
-        # TODO: revisit this
-        self._rebuild_cache()
+        self._mod_count = self._mod_count + 1
+        if self._order_index is None and self._stale_from is None:
+            # The cached nodes are all still good, at mirrored indices
+            self.cached_nodes = [LinkedList.NodeRef(cache_entry.node, size - 1 - cache_entry.idx)
+                                 for cache_entry in reversed(self.cached_nodes) if cache_entry.valid()]
+            self.num_valid_cache_entries = len(self.cached_nodes)
+            for finger in self._fingers:
+                finger.idx = size - 1 - finger.idx
+        else:
+            self._mark_stale(0)
 
-    # Sorts the list. If the val_func is set, it must return a particular piece of data from the object stored in
-    # the list (presumably, they're all of the same type). Otherwise, the objects themselves will be compared.
-    def sort(self, reverse=False, val_func=None):
-        _compare_func = self._get_compare_func(val_func, reverse)
+    # Sorts the list. If key is set, it must return a particular piece of data from the object stored in the list
+    # (presumably, they're all of the same type). Otherwise, the objects themselves will be compared. val_func is the
+    # older name for key.
+    #
+    # The sort is stable. Each key is computed just once, and the nodes are ordered with Python's own sort (Timsort:
+    # an iterative, bottom-up merge sort that finds runs already in order, or in reverse order, and merges those).
+    # Then the nodes are relinked in their new order, so no recursion is involved, and cursors stay on their items.
+    def sort(self, reverse=False, val_func=None, key=None):
+        if key is None: key = val_func
         size = self.size()
         if size == 0 or size == 1: return
-        new_start_node = self._merge_sort_sublist(self.head, self.tail, 0, size-1, _compare_func)
-        self.head = new_start_node
-        new_tail_node = new_start_node
-        while new_tail_node.next is not None:
-            new_tail_node = new_tail_node.next
-        self.tail = new_tail_node
-        self._rebuild_cache()
+        nodes = self._get_nodes()
+        if key is None:
+            nodes.sort(key=attrgetter('item'), reverse=reverse)
+        else:
+            nodes.sort(key=lambda n: key(n.item), reverse=reverse)
+        self._relink_nodes(nodes)
+        self._mod_count = self._mod_count + 1
+        self._mark_stale(0)
+
+    # Sorts the list, with the sorting spread over worker processes. The list is cut into contiguous segments, one per
+    # worker (workers defaults to the number of CPUs, but each worker gets at least PARALLEL_MIN_SEGMENT items), and
+    # each segment is sorted in a process of its own. The sorted segments are then merged in this process: Timsort
+    # finds each one as a run, so the merge takes O(n log k) for k segments, and no more key calls. The result is
+    # the same as sort()'s, stability included, and the nodes are relinked the same way.
+    #
+    # The items, and key if given, are sent to the workers, so they have to be picklable (see parallel.py). Sending
+    # them, and the merge, are done on one core, which bounds the speedup; it's best when key is costly. executor, if
+    # given, is a concurrent.futures executor to run the segments in, instead of a new process pool. If there's only
+    # one worker, this is just sort().
+    def parallel_sort(self, reverse=False, key=None, workers=None, executor=None):
+        size = self.size()
+        if size == 0 or size == 1: return
+        count = parallel.worker_count(size, workers, LinkedList.PARALLEL_MIN_SEGMENT)
+        if count == 1:
+            self.sort(reverse=reverse, key=key)
+            return
+        node_segments = parallel.segments_of(self._get_nodes(), count)
+        item_segments = [[node.item for node in segment] for segment in node_segments]
+        results = parallel.run_segments(parallel.sort_segment, item_segments, (key, reverse), executor)
+        nodes = []
+        keys = []
+        for segment, (order, segment_keys) in zip(node_segments, results):
+            nodes.extend([segment[n] for n in order])
+            if segment_keys is not None:
+                keys.extend(segment_keys)
+        if key is None:
+            nodes.sort(key=attrgetter('item'), reverse=reverse)
+        else:
+            nodes = [nodes[n] for n in sorted(range(size), key=keys.__getitem__, reverse=reverse)]
+        self._relink_nodes(nodes)
+        self._mod_count = self._mod_count + 1
+        self._mark_stale(0)
 
-    # Given another linked list, join its contents to the tail of this one. The other list is cleared.
+    # Returns a new list holding func(item) for each item of this one, in order, with the calls spread over worker
+    # processes the same way as in parallel_sort(). func, the items and what func returns have to be picklable. The
+    # new list has the same index mode and cache policy as this one, but no hash index, as the key might not suit the
+    # new items.
+    def parallel_map(self, func, workers=None, executor=None):
+        items = self.get_items()
+        count = parallel.worker_count(len(items), workers, LinkedList.PARALLEL_MIN_SEGMENT)
+        results = parallel.run_segments(parallel.map_segment, parallel.segments_of(items, count), (func,), executor)
+        new_list = self.__class__(index_mode=self.index_mode, cache_policy=self.cache_policy,
+                                  finger_count=self.finger_count, node_pool=self.node_pool)
+        for segment_results in results:
+            new_list.extend(segment_results)
+        return new_list
+
+    # Given another linked list, join its contents to the tail of this one. The other list is cleared. This is O(1) in
+    # cache mode (the joined part of the list is marked stale) and O(log n) in tree mode, unless the other list isn't
+    # in tree mode, in which case its items are moved over into indexed nodes first.
     def join(self, other_list):
+        if self._order_index is not None and other_list._order_index is None:
+            converted_list = LinkedList(other_list, index_mode=self.index_mode)
+            other_list.clear()
+            other_list = converted_list
+        if self._order_index is not None:
+            # Both trees have to be whole before they can be merged
+            self._refresh_index()
+            other_list._refresh_index()
         size = self.size()
         size2 = other_list.size()
+        if self._snapshots:
+            self._snapshot_change(size, 0, size2)
+        if other_list._snapshots:
+            other_list._move_snapshots(self, 0, size)
         if size == 0:
             self.head = other_list.head
             self.tail = other_list.tail
@@ -288,40 +994,562 @@ class LinkedList(object):
                 new_tail_node = tail_node
             self.tail = new_tail_node
         self.length = size + size2
+        self._mod_count = self._mod_count + 1
+        if self._hash_index is not None:
+            other_hash_index = other_list._hash_index
+            if other_hash_index is not None and other_hash_index.key is self._hash_index.key:
+                # Merge the smaller index into the bigger one
+                if len(other_hash_index.buckets) > len(self._hash_index.buckets):
+                    self._hash_index, other_list._hash_index = other_hash_index, self._hash_index
+                self._hash_index.take_all(other_list._hash_index)
+            else:
+                self._hash_index.add_chain(other_list.head, size2)
+        if self._order_index is not None:
+            self._order_index.join(other_list._order_index)
+        else:
+            self._take_cache_entries(other_list, size)
         other_list.clear()
-        self._rebuild_cache()
 
     # Splits off a separate linked list, beginning with the item at index. If index is the same as the size of
-    # the list, then return an empty linked list.
+    # the list, then return an empty linked list. Apart from getting to index, this is O(1) in cache mode (cache
+    # entries past index are dropped, and the new list's cache is built when first needed) and O(log n) in tree mode.
     def split(self, index):
         size = self.size()
         if index < 0 or index > size:
             raise IndexError("linked list index out of range")
-        new_list = LinkedList()
+        new_list = self._new_empty_list()
         if index == size:
             # simply return an empty list
             return new_list
         split_node = self._get_to_index(index)
+        if self._snapshots:
+            self._snapshot_change(index, 0, 0)
+            self._move_snapshots(new_list, index, -index)
         new_tail = split_node.prev
         if new_tail is not None:
             new_tail.next = None
+        else:
+            self.head = None
+        split_node.prev = None
         new_list.head = split_node
         new_list.tail = self.tail
         new_list.length = size - index
         self.tail = new_tail
         self.length = index
-        self._rebuild_cache()
+        self._mod_count = self._mod_count + 1
+        if self._hash_index is not None:
+            # Move whichever part is smaller over to a fresh index
+            if index < size - index:
+                new_list._hash_index, self._hash_index = self._hash_index, new_list._hash_index
+                self._hash_index.take_chain(new_list._hash_index, self.head)
+            else:
+                new_list._hash_index.take_chain(self._hash_index, new_list.head)
+        if self._order_index is not None:
+            new_list._order_index = self._order_index.split(index)
+        else:
+            new_list._stale_from = 0
+            if self._stale_from is None or self._stale_from > index:
+                new_list._stale_from = None if self._stale_from is None else self._stale_from - index
+                new_list.cached_nodes = [LinkedList.NodeRef(cache_entry.node, cache_entry.idx - index)
+                                         for cache_entry in self.cached_nodes
+                                         if cache_entry.valid() and cache_entry.idx >= index]
+            new_list.num_valid_cache_entries = len(new_list.cached_nodes)
+            new_list.list_length_at_cache_rebuild = new_list.length
+            if new_list.finger_count > 0:
+                new_list._fingers = [LinkedList.NodeRef(finger.node, finger.idx - index)
+                                     for finger in self._fingers if finger.idx >= index]
+            self._mark_stale(index)
         return new_list
 
     # --------------------------------------
     # Private helper functions, for internal use
     # --------------------------------------
 
-    # Rebuilds the cache by stepping through the list, periodically recording a cache node
+    # Search behind find_item() and find_cursor(). Returns index and node of item.
+    def _find_node(self, item, start_index, backwards):
+        if start_index is None or start_index == -1:
+            start_index = self.size()-1 if backwards else 0
+        if start_index < 0 or start_index >= self.size():
+            raise IndexError("linked list index out of range")
+        nodes = self._hash_index.nodes_for(item) if self._hash_index is not None else None
+        # With lots of duplicates, working out the index of each one costs more than a scan, which will likely find
+        # one soon anyway
+        if nodes is not None and len(nodes) <= LinkedList.MAX_HASH_CANDIDATES:
+            best_idx, best_node = -1, None
+            for node in nodes:
+                idx = self._index_of_node(node)
+                if backwards:
+                    if idx <= start_index and idx > best_idx:
+                        best_idx, best_node = idx, node
+                elif idx >= start_index and (best_node is None or idx < best_idx):
+                    best_idx, best_node = idx, node
+            if best_node is None:
+                raise ValueError("Item not found in linked list")
+            return best_idx, best_node
+        node = self._get_to_index(start_index)
+        idx = start_index
+        while node is not None:
+            if node.item == item:
+                return idx, node
+            idx = idx + (-1 if backwards else 1)
+            node = node.prev if backwards else node.next
+        raise ValueError("Item not found in linked list")
+
+    # Returns index of node. In tree mode, it's worked out from the tree. Otherwise, we walk backwards from the node
+    # until reaching a cached node or the head.
+    def _index_of_node(self, node):
+        if self._order_index is not None:
+            self._refresh_index()
+            return self._order_index.rank(node)
+        cached_indices = {}
+        for cache_entry in self.cached_nodes:
+            if cache_entry.node is not None:
+                cached_indices[cache_entry.node] = cache_entry.idx
+        for finger in self._fingers:
+            cached_indices[finger.node] = finger.idx
+        steps = 0
+        while node is not self.head:
+            if node in cached_indices:
+                return cached_indices[node] + steps
+            node = node.prev
+            steps = steps + 1
+        return steps
+
+    # Returns index of node if the head, the tail or a finger is a short walk back from it, -1 otherwise. Unlike
+    # _index_of_node(), this is cheap enough to try on every edit at a cursor.
+    def _nearby_index(self, node):
+        if node.next is None:
+            return self.length - 1
+        finger_indices = {finger.node: finger.idx for finger in self._fingers}
+        for steps in range(LinkedList.SHORT_WALK + 1):
+            if node in finger_indices:
+                return finger_indices[node] + steps
+            if node.prev is None:
+                return steps
+            node = node.prev
+        return -1
+
+    # Returns index of node for an edit there (index, if not -1, is its index already), or -1 if it's not worth
+    # finding. In tree mode, it's not needed unless there are snapshots. In cache mode, a walk to the index costs about
+    # 1 / cache size of a rebuild, so until there have been that many walks since the cache was built, a walk costs
+    # less than marking the cache stale would; after that, the index isn't found, and the cache is marked stale
+    # instead (see _remove_node_anywhere()).
+    def _edit_index(self, node, index):
+        if index == -1 and self._order_index is None:
+            index = self._nearby_index(node)
+            if index == -1 and self._stale_from != 0 and self._edit_walks < self._cache_size():
+                self._edit_walks = self._edit_walks + 1
+                index = self._index_of_node(node)
+        if index == -1 and self._snapshots:
+            index = self._index_of_node(node)
+        return index
+
+    # Unlinks node, returns its item. Index is its index, or -1 if that's not known, as from _edit_index().
+    def _remove_node_anywhere(self, node, index):
+        if index == -1 and self._order_index is None:
+            self._unlink_node(node)
+            self._adjust_cache_unknown_index(False, node)
+            return node.item
+        return self._remove_node(node, index)
+
+    # In cache mode, instead of _adjust_cache() after node was added or removed at an index that isn't known: the
+    # whole cache is marked stale, to be rebuilt the next time an index is needed
+    def _adjust_cache_unknown_index(self, item_added, node):
+        self._mod_count = self._mod_count + 1
+        if self._hash_index is not None:
+            if item_added:
+                self._hash_index.add(node)
+            else:
+                self._hash_index.remove(node)
+        self._mark_stale(0)
+
+    # Inserts item next to cursor's node, before it if before is True. Returns a cursor on the new node.
+    def _insert_at_cursor(self, cursor, item, before):
+        ref_node = cursor.node
+        ref_index = self._edit_index(ref_node, cursor._known_index())
+        if self._snapshots:
+            self._snapshot_change(ref_index if before else ref_index + 1, 0, 1)
+        node = self._new_node(item)
+        prev_node = ref_node.prev if before else ref_node
+        next_node = ref_node if before else ref_node.next
+        node.prev = prev_node
+        node.next = next_node
+        if prev_node is None:
+            self.head = node
+        else:
+            prev_node.next = node
+        if next_node is None:
+            self.tail = node
+        else:
+            next_node.prev = node
+        self.length = self.length + 1
+        new_index = -1
+        cursor.idx = -1
+        if ref_index != -1:
+            new_index = ref_index if before else ref_index + 1
+            cursor.idx = ref_index + 1 if before else ref_index
+        if new_index == -1 and self._order_index is None:
+            self._adjust_cache_unknown_index(True, node)
+        else:
+            self._adjust_cache(True, new_index, node)
+        cursor.mod_count = self._mod_count
+        return ListCursor(self, node, new_index)
+
+    # Removes cursor's node, returns its item. The cursor moves on to the next node.
+    def _remove_at_cursor(self, cursor):
+        node = cursor.node
+        index = self._edit_index(node, cursor._known_index())
+        item = self._remove_node_anywhere(node, index)
+        cursor.node = node.next
+        cursor.idx = index if cursor.node is not None else -1
+        cursor.mod_count = self._mod_count
+        if self.node_pool > 0:
+            self._recycle_node(node)
+        return item
+
+    # Generator for iter_from() and iter_range(): the items of count nodes from node on, following next links (or prev
+    # links if backwards is True). There must be at least count of them.
+    def _iter_nodes(self, node, count, backwards):
+        mod_count = self._mod_count
+        if backwards:
+            for n in range(count):
+                yield node.item
+                if self._mod_count != mod_count:
+                    raise RuntimeError("linked list changed during iteration")
+                node = node.prev
+        else:
+            for n in range(count):
+                yield node.item
+                if self._mod_count != mod_count:
+                    raise RuntimeError("linked list changed during iteration")
+                node = node.next
+
+    # Unlinks node, which is at index, returns its item. Index can be -1 in tree mode, if the list has no snapshots.
+    def _remove_node(self, node, index):
+        if self._snapshots:
+            self._snapshot_change(index, 1, 0)
+        self._unlink_node(node)
+        self._adjust_cache(False, index, node)
+        return node.item
+
+    # Takes node out of the chain of nodes. Leaves the cache and indexes alone.
+    def _unlink_node(self, node):
+        if node.prev is None:
+            self.head = node.next
+        else:
+            node.prev.next = node.next
+        if node.next is None:
+            self.tail = node.prev
+        else:
+            node.next.prev = node.prev
+        self.length = self.length - 1
+
+    # Removes the nodes at targets, a sorted list of indices without duplicates. The nodes go to the node pool, so the
+    # caller must have read their items already.
+    def _remove_nodes(self, targets, nodes):
+        if len(nodes) <= LinkedList.SHORT_WALK or \
+                (self._order_index is not None and len(nodes) * LinkedList.TREE_REBUILD_FRACTION <= self.length):
+            # Each removal shifts the later indices down by one
+            for n, node in enumerate(nodes):
+                self._remove_node(node, targets[n] - n)
+        elif len(nodes) > 0:
+            # Cheaper to unlink them all, then fix up the cache (or tree) once
+            if self._snapshots:
+                for target in reversed(targets):
+                    self._snapshot_change(target, 1, 0)
+            for node in nodes:
+                self._unlink_node(node)
+                if self._hash_index is not None:
+                    self._hash_index.remove(node)
+            self._mod_count = self._mod_count + 1
+            if self._order_index is not None:
+                self._order_index.clear()
+                self._mark_stale(0)
+            else:
+                self._adjust_cache_for_removals(targets)
+        if self.node_pool > 0:
+            for node in nodes:
+                self._recycle_node(node)
+
+    # Walks the list once, finding the items for which match(item) is true, then removes them all with
+    # _remove_nodes(). Returns the items removed, in order. If match changed the list's structure, the nodes found
+    # may not be the right ones any more, so nothing is removed.
+    def _remove_matching(self, match):
+        mod_count = self._mod_count
+        targets = []
+        nodes = []
+        node = self.head
+        idx = 0
+        while node is not None:
+            if match(node.item):
+                targets.append(idx)
+                nodes.append(node)
+            node = node.next
+            idx = idx + 1
+        if self._mod_count != mod_count:
+            raise RuntimeError("linked list changed during removal")
+        items = [node.item for node in nodes]
+        self._remove_nodes(targets, nodes)
+        return items
+
+    # Turns a possibly negative index into a list index. Raises IndexError if it's out of range.
+    def _normalize_index(self, index):
+        if index < 0:
+            index = index + self.length
+        if index < 0 or index >= self.length:
+            raise IndexError("linked list index out of range")
+        return index
+
+    # Returns the nodes picked out by a slice, in slice order, found in a single traversal
+    def _slice_nodes(self, index_slice):
+        indices = range(*index_slice.indices(self.length))
+        if indices.step > 0:
+            return self._nodes_at_sorted(indices)
+        nodes = self._nodes_at_sorted(indices[::-1])
+        nodes.reverse()
+        return nodes
+
+    # Replaces the count items from index start on with the items of iterable. The old nodes are unlinked and the new
+    # ones linked in their place, in one pass, and the index is fixed up once for the whole range.
+    def _replace_range(self, start, count, iterable):
+        first, last, new_count = self._make_chain(iterable)
+        if count == 0 and new_count == 0:
+            return
+        if self._snapshots:
+            self._snapshot_change(start, count, new_count)
+        if count > 0:
+            old_first = self._get_to_index(start)
+            old_last = old_first
+            for n in range(count - 1):
+                old_last = old_last.next
+            before, after = old_first.prev, old_last.next
+        else:
+            before = self._get_to_index(start - 1) if start > 0 else None
+            after = self.head if before is None else before.next
+        if self._order_index is not None:
+            # Cut the old nodes out of the tree, and splice in a tree of the new ones
+            self._refresh_index()
+            chain_index = OrderIndex()
+            chain_index.build(first)
+            after_index = self._order_index.split(start)
+            after_index = after_index.split(count)
+            self._order_index.join(chain_index)
+            self._order_index.join(after_index)
+        if count > 0:
+            if self._hash_index is not None:
+                node = old_first
+                for n in range(count):
+                    self._hash_index.remove(node)
+                    node = node.next
+            old_first.prev = None
+            old_last.next = None
+        if new_count > 0:
+            if self._hash_index is not None:
+                self._hash_index.add_chain(first, new_count)
+            first.prev = before
+            last.next = after
+        else:
+            first, last = after, before
+        if before is None:
+            self.head = first
+        else:
+            before.next = first
+        if after is None:
+            self.tail = last
+        else:
+            after.prev = last
+        self.length = self.length + new_count - count
+        self._mod_count = self._mod_count + 1
+        if self._order_index is None:
+            self._adjust_cache_for_range(start, count, new_count)
+        if count > 0 and self.node_pool > 0:
+            node = old_first
+            while node is not None:
+                next_node = node.next
+                self._recycle_node(node)
+                node = next_node
+
+    # Checks that the indices are all in range. Returns them sorted, without duplicates.
+    def _sorted_indices(self, indices):
+        targets = sorted(set(indices))
+        if len(targets) > 0 and (targets[0] < 0 or targets[-1] >= self.size()):
+            raise IndexError("linked list index out of range")
+        return targets
+
+    # Returns the nodes at the given indices, which must be sorted and in range. It's a single forward sweep from one
+    # index to the next, except where the next index is far enough ahead that getting there from the closest cached
+    # node (or tree root) is quicker.
+    def _nodes_at_sorted(self, targets):
+        if self._order_index is not None:
+            max_walk = LinkedList.SHORT_WALK
+        elif self._cache_size() == 0:
+            max_walk = self.size()
+        else:
+            max_walk = max(LinkedList.SHORT_WALK, self.size() // (2 * self._cache_size()))
+        nodes = []
+        node, idx = None, 0
+        for target in targets:
+            if node is None or target - idx > max_walk:
+                node = self._get_to_index(target)
+            else:
+                for n in range(target - idx):
+                    node = node.next
+            idx = target
+            nodes.append(node)
+        return nodes
+
+    # Changes the item held by node, which is at index (-1 if not known), keeping the hash index up to date
+    def _set_node_item(self, node, item, index=-1):
+        if self._snapshots:
+            self._snapshot_change(index if index != -1 else self._index_of_node(node), 1, 1)
+        if self._hash_index is not None:
+            self._hash_index.remove(node)
+            node.item = item
+            self._hash_index.add(node)
+        else:
+            node.item = item
+
+    # Tells the list's snapshots that the count nodes from index start on are about to be removed or given new items,
+    # and added new ones put in their place, so that they can copy what they need from them first. Snapshots that no
+    # longer share any nodes with the list are let go of.
+    def _snapshot_change(self, start, count, added):
+        self._fresh_snapshot = None
+        snapshots = []
+        start_node = None # found by the first snapshot that needs it
+        for ref in self._snapshots:
+            snapshot = ref()
+            if snapshot is not None:
+                start_node = snapshot._change(self, start, count, added, start_node)
+                if snapshot._shares(self):
+                    snapshots.append(ref)
+        self._snapshots = snapshots
+
+    # Hands the list's nodes from index start on over to new_owner, as far as the snapshots sharing them are concerned.
+    # In new_owner, their indices are shift more.
+    def _move_snapshots(self, new_owner, start, shift):
+        self._fresh_snapshot = None
+        new_owner._fresh_snapshot = None
+        snapshots = []
+        for ref in self._snapshots:
+            snapshot = ref()
+            if snapshot is None:
+                continue
+            snapshot._move_runs(self, new_owner, start, shift)
+            if snapshot._shares(new_owner) and ref not in new_owner._snapshots:
+                new_owner._snapshots.append(ref)
+            if snapshot._shares(self):
+                snapshots.append(ref)
+        self._snapshots = snapshots
+
+    # Returns the list's settings, as keyword arguments for the constructor
+    def _settings(self):
+        return {'index_mode': self.index_mode, 'hash_index': self._hash_index is not None,
+                'hash_key': None if self._hash_index is None else self._hash_index.key,
+                'cache_policy': self.cache_policy, 'finger_count': self.finger_count, 'node_pool': self.node_pool}
+
+    # Returns an empty list with the same index settings as this one
+    def _new_empty_list(self):
+        new_list = self.__class__(index_mode=self.index_mode, cache_policy=self.cache_policy,
+                                  finger_count=self.finger_count, node_pool=self.node_pool)
+        if self._hash_index is not None:
+            new_list._hash_index = HashIndex(self._hash_index.key)
+        return new_list
+
+    # Creates a node of the right kind for the index mode, or takes one from the node pool
+    def _new_node(self, item):
+        if self._free_nodes:
+            self._pool_hits = self._pool_hits + 1
+            node = self._free_nodes.pop()
+            node.item = item
+            return node
+        if self.node_pool > 0:
+            self._pool_misses = self._pool_misses + 1
+        if self._order_index is not None:
+            return IndexedListNode(item)
+        return ListNode(item)
+
+    # Scrubs node, which has been taken out of the list, and puts it in the node pool if there's room. A node of the
+    # wrong kind for the index mode (from a list joined on) is left for the garbage collector.
+    def _recycle_node(self, node):
+        if len(self._free_nodes) >= self.node_pool or \
+                (self._order_index is not None) != isinstance(node, IndexedListNode):
+            self._pool_discards = self._pool_discards + 1
+            return
+        node.item = None
+        node.next = None
+        node.prev = None
+        if self._order_index is not None:
+            node.left = None
+            node.right = None
+            node.parent = None
+            node.size = 1
+        self._free_nodes.append(node)
+
+    # Creates a chain of unattached nodes holding the items of iterable. Returns first node, last node, node count.
+    def _make_chain(self, iterable):
+        first = None
+        last = None
+        count = 0
+        new_node = self._new_node
+        for item in iterable:
+            node = new_node(item)
+            if last is None:
+                first = node
+            else:
+                node.prev = last
+                last.next = node
+            last = node
+            count = count + 1
+        return first, last, count
+
+    # Returns a Python list of the list's nodes, in order
+    def _get_nodes(self):
+        nodes = []
+        node = self.head
+        while node is not None:
+            nodes.append(node)
+            node = node.next
+        return nodes
+
+    # Links the nodes together in the order given, making them the whole list
+    def _relink_nodes(self, nodes):
+        if self._snapshots:
+            self._snapshot_change(0, self.length, self.length)
+        prev_node = None
+        for node in nodes:
+            node.prev = prev_node
+            if prev_node is not None:
+                prev_node.next = node
+            prev_node = node
+        prev_node.next = None
+        self.head = nodes[0]
+        self.tail = prev_node
+
+    # Rebuilds the cache by stepping through the list, periodically recording a cache node. In tree mode, the tree is
+    # rebuilt instead and the cache is left empty.
     def _rebuild_cache(self):
+        if self._stats is None:
+            self._build_cache()
+            return
+        start = perf_counter()
+        self._build_cache()
+        self._stats.record_rebuild('rebuild', perf_counter() - start)
+
+    # Rebuilding doesn't change the list's structure, so it leaves the mod count alone: iterators can go on while the
+    # cache is rebuilt for an access by index
+    def _build_cache(self):
+        self._stale_from = None
+        self._edit_walks = 0
         self.cached_nodes = []
         self.num_valid_cache_entries = 0
-        cache_size = 10 if self.length <= 10 else (50 if self.length <= 1000 else 100);
+        if self._order_index is not None:
+            self._order_index.build(self.head)
+            self.list_length_at_cache_rebuild = self.length
+            return
+        cache_size = self._cache_size()
+        if cache_size == 0:
+            self.list_length_at_cache_rebuild = self.length
+            return
         skip_amount = 1 if cache_size >= self.length else int(self.length / cache_size)
         self.cached_nodes = [LinkedList.NodeRef() for i in range(cache_size)]
         cache_idx = 0
@@ -337,7 +1565,74 @@ class LinkedList(object):
         self.num_valid_cache_entries = cache_idx
         self.list_length_at_cache_rebuild = self.length
 
+    # Number of cache entries wanted for the current list length. With the 'finger' policy, there are none.
+    def _cache_size(self):
+        if self.cache_policy == 'finger':
+            return 0
+        return 10 if self.length <= 10 else (50 if self.length <= 1000 else 100)
+
+    # Marks the list from index on as stale: the cache entries there are dropped, to be made again when needed. In
+    # tree mode, index must be 0, and the whole tree will be rebuilt when needed.
+    def _mark_stale(self, index):
+        if self._stale_from is not None:
+            index = min(index, self._stale_from)
+        self._stale_from = index if index < self.length else None
+        self.cached_nodes = [cache_entry for cache_entry in self.cached_nodes
+                             if cache_entry.valid() and cache_entry.idx < index]
+        self.num_valid_cache_entries = len(self.cached_nodes)
+        self.list_length_at_cache_rebuild = self.length
+        self._fingers = [finger for finger in self._fingers if finger.idx < index]
+
+    # After other_list has been joined on at offset, takes over its cache entries, shifted by offset. If this list had
+    # a stale part, everything from there on stays stale. A list in tree mode has no cache entries, so all of it is
+    # stale.
+    def _take_cache_entries(self, other_list, offset):
+        if self._stale_from is not None:
+            self._mark_stale(offset)
+            return
+        other_stale_from = 0 if other_list._order_index is not None else other_list._stale_from
+        cached_nodes = [cache_entry for cache_entry in self.cached_nodes if cache_entry.valid()]
+        cached_nodes.extend(LinkedList.NodeRef(cache_entry.node, cache_entry.idx + offset)
+                            for cache_entry in other_list.cached_nodes if cache_entry.valid())
+        if len(cached_nodes) > 2 * self._cache_size():
+            # Too many entries after lots of joins; thin them out
+            cached_nodes = cached_nodes[::2]
+        self.cached_nodes = cached_nodes
+        self.num_valid_cache_entries = len(cached_nodes)
+        self.list_length_at_cache_rebuild = self.length
+        self._stale_from = None if other_stale_from is None else offset + other_stale_from
+
+    # Brings the stale part of the list (if any) back into the cache. Only the stale part is walked, starting from
+    # the last cached node before it. In tree mode, the tree is rebuilt.
+    def _refresh_index(self):
+        stale_from = self._stale_from
+        if stale_from is None:
+            return
+        if stale_from == 0 or self._order_index is not None or self._cache_size() == 0:
+            self._rebuild_cache()
+            return
+        start = perf_counter()
+        skip_amount = max(1, int(self.length / self._cache_size()))
+        if len(self.cached_nodes) > 0:
+            list_idx, node = self.cached_nodes[-1].idx, self.cached_nodes[-1].node
+        else:
+            list_idx, node = 0, self.head
+        start_idx = list_idx
+        while node is not None:
+            if list_idx >= stale_from and (list_idx - start_idx) % skip_amount == 0:
+                self.cached_nodes.append(LinkedList.NodeRef(node, list_idx))
+            node = node.next
+            list_idx = list_idx + 1
+        self.num_valid_cache_entries = len(self.cached_nodes)
+        self.list_length_at_cache_rebuild = self.length
+        self._stale_from = None
+        if self._stats is not None:
+            self._stats.record_rebuild('refresh', perf_counter() - start)
+
     def _cache_needs_rebuild(self):
+        # A short list is walked quickly enough without a cache, so there's no point rebuilding it at every change
+        if self.length <= LinkedList.SHORT_WALK and self.list_length_at_cache_rebuild <= LinkedList.SHORT_WALK:
+            return False
         # Has list shrunk or grown significantly since last cache rebuild?
         if self.list_length_at_cache_rebuild < int(self.length * 0.66):
             return True
@@ -350,19 +1645,18 @@ class LinkedList(object):
 
     # Returns node at target_idx, takes advantage of caching to get there more quickly
     def _get_to_index(self, target_idx):
-        # The idea is to pick the closest starting point: head of list, tail, or cached node
+        if self._stale_from is not None and target_idx >= self._stale_from:
+            self._refresh_index()
+        if self._order_index is not None:
+            if self._stats is not None:
+                self._stats.record_access('tree', 0)
+            return self._order_index.node_at(target_idx)
+
+        # The idea is to pick the closest starting point: head of list, tail, a finger, or cached node
         # Each tuple: a delta value, a starting index, node
         options = [(target_idx, 0, self.head), # representing start of linked list
                          (target_idx - (self.size()-1), self.size()-1, self.tail)] # end of l. list
 
-        # in theory, it's possible for this function to return -1, which will lead to a slower search,
-        # but in reality, that doesn't happen much, if at all
-        cache_n = self._find_cache_entry(target_idx)
-        if cache_n != -1:
-            if self.cached_nodes[cache_n].valid():
-                # There is a cached node
-                options.append((target_idx - self.cached_nodes[cache_n].idx, self.cached_nodes[cache_n].idx, self.cached_nodes[cache_n].node))
-
         # Find best option
         best_delta = self.size()
         best_op = options[0]
@@ -370,18 +1664,105 @@ class LinkedList(object):
             if abs(tup[0]) < best_delta:
                 best_delta = abs(tup[0])
                 best_op = tup
+        best_finger = None
+        for finger in self._fingers:
+            if abs(target_idx - finger.idx) < best_delta:
+                best_delta = abs(target_idx - finger.idx)
+                best_op = (target_idx - finger.idx, finger.idx, finger.node)
+                best_finger = finger
+
+        # A short walk costs less than looking up the cache, so only look it up when nothing is close
+        if best_delta > LinkedList.SHORT_WALK:
+            # in theory, it's possible for this function to return -1, which will lead to a slower search,
+            # but in reality, that doesn't happen much, if at all
+            cache_n = self._find_cache_entry(target_idx)
+            if cache_n != -1:
+                cache_entry = self.cached_nodes[cache_n]
+                if cache_entry.valid() and abs(target_idx - cache_entry.idx) < best_delta:
+                    # There is a cached node, closer than the rest
+                    best_delta = abs(target_idx - cache_entry.idx)
+                    best_op = (target_idx - cache_entry.idx, cache_entry.idx, cache_entry.node)
+                    best_finger = None
 
         node = best_op[2]
         step = -1 if best_op[0] < 0 else 1 # delta to target
         for i in range(best_op[1], target_idx, step):
             node = node.next if (step == 1) else node.prev
 
+        if self._stats is not None:
+            if best_finger is not None:
+                source = 'finger'
+            elif best_op is options[0] or best_op is options[1]:
+                source = 'head' if best_op is options[0] else 'tail'
+            else:
+                source = 'cache'
+            self._stats.record_access(source, best_delta)
+        if self.finger_count > 0:
+            self._move_finger(best_finger, target_idx, node)
         return node
 
+    # Records that node at index was just reached. If we got there from a finger, that finger moves along; otherwise a
+    # new finger is made, pushing out the least recently used one if there are too many.
+    def _move_finger(self, finger, index, node):
+        fingers = self._fingers
+        if finger is None:
+            if len(fingers) >= self.finger_count:
+                finger = fingers.pop(0)
+            else:
+                finger = LinkedList.NodeRef()
+        else:
+            fingers.remove(finger)
+        finger.set(node, index)
+        fingers.append(finger)
+
+    # Shifts finger indices after count items were added at index (or, if count is negative, removed). Fingers on
+    # removed items are dropped or, if next_node (the node that now has index) is given, moved on to it.
+    def _shift_fingers(self, index, count, next_node=None):
+        if count < 0:
+            end = index - count
+            if next_node is None:
+                self._fingers = [finger for finger in self._fingers if finger.idx < index or finger.idx >= end]
+            else:
+                for finger in self._fingers:
+                    if finger.idx >= index and finger.idx < end:
+                        finger.set(next_node, end) # shifted back to index below
+        for finger in self._fingers:
+            if finger.idx >= index:
+                finger.idx = finger.idx + count
+
     # If an item is added to or removed from linked list, we need to change index of cached node
     # item_added: True if item was just added, False if removed
     # item_index: which item was just added or subtracted
-    def _adjust_cache(self, item_added, item_index):
+    # node: the node that was added or removed. It has already been linked into (or out of) the list.
+    def _adjust_cache(self, item_added, item_index, node):
+        self._mod_count = self._mod_count + 1
+        if self._hash_index is not None:
+            if item_added:
+                self._hash_index.add(node)
+            else:
+                self._hash_index.remove(node)
+        if self._stale_from is not None:
+            if self._order_index is not None:
+                # The rebuilt tree takes in this change too
+                self._refresh_index()
+                return
+            elif item_index >= self._stale_from:
+                # No cache entries there to adjust
+                return
+            else:
+                self._stale_from = self._stale_from + (1 if item_added else -1)
+        if self._order_index is not None:
+            if item_added:
+                self._order_index.insert_before(node.next, node)
+            else:
+                self._order_index.remove(node)
+            return
+        if self._fingers:
+            if item_added:
+                self._shift_fingers(item_index, 1)
+            else:
+                self._shift_fingers(item_index, -1, node.next)
+
         if self._cache_needs_rebuild():
             self._rebuild_cache()
             return
@@ -405,6 +1786,75 @@ class LinkedList(object):
                 elif self.cached_nodes[n].idx > item_index:
                     self.cached_nodes[n].idx = self.cached_nodes[n].idx - 1
 
+    # Like _adjust_cache(), but for a chain of count nodes just inserted at item_index. In tree mode, chain_index is
+    # the tree of the chain's nodes, and it gets spliced into the list's tree.
+    def _adjust_cache_for_chain(self, item_index, count, chain_index):
+        self._mod_count = self._mod_count + 1
+        if self._stale_from is not None:
+            if self._order_index is not None:
+                self._refresh_index()
+                return
+            elif item_index >= self._stale_from:
+                return
+            else:
+                self._stale_from = self._stale_from + count
+        if self._order_index is not None:
+            after_index = self._order_index.split(item_index)
+            self._order_index.join(chain_index)
+            self._order_index.join(after_index)
+            return
+        if self._fingers:
+            self._shift_fingers(item_index, count)
+
+        if self._cache_needs_rebuild():
+            self._rebuild_cache()
+            return
+        for cache_entry in self.cached_nodes:
+            if cache_entry.idx >= item_index:
+                cache_entry.idx = cache_entry.idx + count
+
+    # Fixes up the cache after the items at targets (sorted indices, without duplicates) were all removed. Each cache
+    # entry or finger left moves down by the number of removals before it.
+    def _adjust_cache_for_removals(self, targets):
+        if self._stale_from is not None:
+            self._stale_from = self._stale_from - bisect_left(targets, self._stale_from)
+            if self._stale_from >= self.length:
+                self._stale_from = None
+        for entries in (self.cached_nodes, self._fingers):
+            kept = []
+            for entry in entries:
+                if entry.valid():
+                    n = bisect_left(targets, entry.idx)
+                    if n == len(targets) or targets[n] != entry.idx:
+                        entry.idx = entry.idx - n
+                        kept.append(entry)
+            entries[:] = kept
+        self.num_valid_cache_entries = len(self.cached_nodes)
+        if self._cache_needs_rebuild():
+            self._rebuild_cache()
+
+    # Fixes up the cache after the count items from index start on were replaced by new_count others. Cache entries
+    # and fingers on the replaced items are dropped, and the ones after them shifted.
+    def _adjust_cache_for_range(self, start, count, new_count):
+        end = start + count
+        if self._stale_from is not None:
+            if end >= self._stale_from:
+                self._mark_stale(start)
+                return
+            self._stale_from = self._stale_from + new_count - count
+        cached_nodes = [cache_entry for cache_entry in self.cached_nodes
+                        if cache_entry.valid() and (cache_entry.idx < start or cache_entry.idx >= end)]
+        for cache_entry in cached_nodes:
+            if cache_entry.idx >= end:
+                cache_entry.idx = cache_entry.idx + new_count - count
+        self.cached_nodes = cached_nodes
+        self.num_valid_cache_entries = len(cached_nodes)
+        if self._fingers:
+            self._shift_fingers(start, -count)
+            self._shift_fingers(start, new_count)
+        if self._cache_needs_rebuild():
+            self._rebuild_cache()
+
     # This does a recursive "dictionary search" to find the cached node that comes as close as possible
     # to the desired list_idx, but doesn't come after it
     def _find_cache_entry(self, list_idx, start_n=None, end_n=None):
@@ -418,6 +1868,7 @@ class LinkedList(object):
                     return -1
             return n
 
+        if len(self.cached_nodes) == 0: return -1
         if start_n is None: start_n = 0
         if end_n is None: end_n = len(self.cached_nodes) - 1
         start_n = _get_to_valid_node(start_n, 1, start_n, end_n)
@@ -434,75 +1885,3 @@ class LinkedList(object):
         else:
             # the one we're looking for is somewhere between halfway_n and end_n
             return self._find_cache_entry(list_idx, halfway_n, end_n)
-
-    # The val_func, if specified, returns the value for comparison. If reverse is True, we are going higher-to-lower
-    # instead of lower to higher.
-    def _get_compare_func(self, val_func, reverse):
-        def _val_func(item):
-            return item
-        if not val_func: val_func = _val_func
-
-        def _compare_func(n1, n2): # Returns True if n1, n2 in correct order
-            return not reverse if val_func(n1.item) < val_func(n2.item) else reverse
-        return _compare_func
-
-    # Given a sublist, use merge sort to sort it. Returns new start node of sorted sublist. The compare function
-    # returns true of the first item should come first.
-    def _merge_sort_sublist(self, start_node, end_node, start_index, end_index, compare_func):
-        if start_index >= end_index:
-            start_node.next = None
-            return start_node
-        if (end_index - start_index) == 1:
-            # swap the nodes, if necessary
-            if not compare_func(start_node, end_node): # Returns True if first node should come first
-                end_node.next = start_node # end node becomes start node
-                start_node.prev = end_node # start node becomes end node
-                end_node.prev = None
-                start_node.next = None
-                return end_node
-
-        median_node = start_node
-        median_index = int((start_index + end_index) / 2)
-        for i in range(0, median_index-start_index):
-            median_node = median_node.next
-        median_plus_one_node = median_node.next
-        #print("median node is", median_node.item)
-        new_start_node = self._merge_sort_sublist(start_node, median_node, start_index, median_index, compare_func)
-        new_median_node = self._merge_sort_sublist(median_plus_one_node, end_node, median_index+1, end_index, compare_func)
-        result = self._merge_lists(new_start_node, new_median_node, compare_func)
-        return result
-
-    # Given two lists that have already been sorted using the same compare_func, merge them together
-    def _merge_lists(self, list1_start, list2_start, compare_func):
-        # TODO: could be a little more efficient
-        new_head = None
-        tail = None
-        node1 = list1_start
-        node2 = list2_start
-        while node1 is not None and node2 is not None:
-            choice = None
-            if compare_func(node1, node2): # Returns True if first node should come first
-                choice = node1
-                node1.prev = None
-                node1 = node1.next
-            else:
-                choice = node2
-                node2.prev = None
-                node2 = node2.next
-            if new_head is None:
-                new_head = choice
-            choice.prev = tail
-            if tail is not None:
-                tail.next = choice
-            tail = choice # the next pointer will continue to point where it was
-        if node1 is not None:
-            tail.next = node1
-            node1.prev = tail
-        elif node2 is not None:
-            tail.next = node2
-            node2.prev = tail
-        return new_head
-
-
-
-
@@ -0,0 +1,113 @@
+from time import perf_counter
+
+# Runtime statistics for a LinkedList, kept while LinkedList.enable_stats() is on. They record:
+#   accesses     every time _get_to_index() gets to a node, where it started walking from (head, tail, finger or
+#                cache entry, or 'tree' in tree mode) and how many nodes it hopped over to get there
+#   rebuilds     full rebuilds of the cache or tree, and refreshes of the stale part of the cache, with their times
+#   operations   for each public method called, the number of calls and a histogram of their latencies
+#
+# Histograms are dicts from a power of two to the number of values below it and at least half of it (the first bucket,
+# 1, counts zeros too). Latencies are in microseconds.
+#
+# Hooks are for feeding another metrics system. Each is called as hook(event, name, value), for each event as it's
+# recorded: ('access', source, hops), ('rebuild', 'rebuild' or 'refresh', seconds) and ('operation', method name,
+# seconds). A hook gets called in the middle of list operations, so it mustn't change the list.
+#
+# When stats are off, the list has none of this: the only cost left is a check of one attribute on the paths that would
+# record accesses and rebuilds. Method calls are timed by wrappers put on the list itself while stats are on, and taken
+# off again after. Like the list, stats aren't thread-safe.
+
+ACCESS_SOURCES = ('head', 'tail', 'finger', 'cache', 'tree')
+REBUILD_KINDS = ('rebuild', 'refresh')
+
+class ListStats(object):
+
+    def __init__(self, hooks=None):
+        self.hooks = [] if hooks is None else list(hooks)
+        self.reset()
+
+    def reset(self):
+        self.accesses = dict.fromkeys(ACCESS_SOURCES, 0)
+        self.hops = 0
+        self.max_hops = 0
+        self.hop_histogram = {}
+        self.rebuilds = dict.fromkeys(REBUILD_KINDS, 0)
+        self.rebuild_time = dict.fromkeys(REBUILD_KINDS, 0.0)
+        self.operations = {} # method name -> OperationStats
+        self._timing = False # True while a timed method runs, so the methods it calls aren't timed as well
+
+    def record_access(self, source, hops):
+        self.accesses[source] = self.accesses[source] + 1
+        self.hops = self.hops + hops
+        if hops > self.max_hops:
+            self.max_hops = hops
+        _add_to_histogram(self.hop_histogram, hops)
+        for hook in self.hooks:
+            hook('access', source, hops)
+
+    def record_rebuild(self, kind, seconds):
+        self.rebuilds[kind] = self.rebuilds[kind] + 1
+        self.rebuild_time[kind] = self.rebuild_time[kind] + seconds
+        for hook in self.hooks:
+            hook('rebuild', kind, seconds)
+
+    def record_operation(self, name, seconds):
+        operation = self.operations.get(name)
+        if operation is None:
+            operation = self.operations[name] = OperationStats()
+        operation.add(seconds)
+        for hook in self.hooks:
+            hook('operation', name, seconds)
+
+    # Returns method, wrapped so that its calls are recorded under name
+    def timed(self, name, method):
+        def timed_method(*args, **kwargs):
+            if self._timing:
+                return method(*args, **kwargs)
+            self._timing = True
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds = perf_counter() - start
+                self._timing = False
+                self.record_operation(name, seconds)
+        return timed_method
+
+    # Returns the stats as a dict of plain values (see LinkedList.stats())
+    def snapshot(self):
+        accesses = sum(self.accesses.values())
+        return {'accesses': dict(self.accesses, total=accesses),
+                'hops': self.hops,
+                'mean_hops': self.hops / accesses if accesses > 0 else 0.0,
+                'max_hops': self.max_hops,
+                'hop_histogram': dict(sorted(self.hop_histogram.items())),
+                'rebuilds': dict(self.rebuilds),
+                'rebuild_time': dict(self.rebuild_time),
+                'operations': {name: operation.snapshot() for name, operation in sorted(self.operations.items())}}
+
+# Call count and latencies of one method
+class OperationStats(object):
+    __slots__ = ('calls', 'total_time', 'max_time', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = {}
+
+    def add(self, seconds):
+        self.calls = self.calls + 1
+        self.total_time = self.total_time + seconds
+        if seconds > self.max_time:
+            self.max_time = seconds
+        _add_to_histogram(self.histogram, int(seconds * 1e6))
+
+    def snapshot(self):
+        return {'calls': self.calls, 'total_time': self.total_time, 'max_time': self.max_time,
+                'mean_time': self.total_time / self.calls if self.calls > 0 else 0.0,
+                'histogram': dict(sorted(self.histogram.items()))}
+
+def _add_to_histogram(histogram, value):
+    bucket = 1 << value.bit_length()
+    histogram[bucket] = histogram.get(bucket, 0) + 1
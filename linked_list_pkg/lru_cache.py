@@ -0,0 +1,338 @@
+import functools
+
+from .linked_list_impl import ListNode
+
+# Caches of bounded size, for keeping recently or frequently used values. Each keeps a dict from key to node, and its
+# nodes in doubly-linked lists, so that a hit moves a node with a few link changes rather than a search, and the next
+# entry to evict is always at the end of a list.
+#
+# LRUCache evicts the least recently used entry. Its nodes are in one list, most recently used first; a hit moves the
+# node to the front, and eviction takes the node at the back.
+#
+# LFUCache evicts the least frequently used entry, and of those, the least recently used. Its nodes are in one list per
+# use count (a "bucket"), most recently used first, and the buckets are themselves in a list, lowest count first. A hit
+# moves the node to the front of the next bucket up, making that bucket if it isn't there, and dropping the old one if
+# it's left empty; eviction takes the node at the back of the first bucket. Everything is O(1).
+#
+# The lists are rings around a sentinel node, so that no link is ever None and linking needs no special cases. Putting
+# a new entry counts as its first use. Capacity is a number of entries by default; with a weigh function, it's a total
+# weight instead, and as many entries are evicted as it takes to make room.
+#
+# Like LinkedList, the caches aren't thread-safe: to share one between threads, put a lock around its calls.
+
+_MISSING = object() # default for get() in memoize(), to tell a cached None from a miss
+_KWARGS_MARK = object() # separates positional arguments from keyword ones in memoize()'s keys
+
+# A node holding a cache entry: its value is the item
+class CacheNode(ListNode):
+    __slots__ = ('key', 'weight')
+
+    def __init__(self, key, value, weight):
+        self.item = value
+        self.next = None
+        self.prev = None
+        self.key = key
+        self.weight = weight
+
+# A node of LFUCache, which knows its bucket
+class FrequencyNode(CacheNode):
+    __slots__ = ('bucket',)
+
+    def __init__(self, key, value, weight):
+        CacheNode.__init__(self, key, value, weight)
+        self.bucket = None
+
+# A list of the LFUCache entries used count times, itself a node in the list of buckets
+class FrequencyBucket(ListNode):
+    __slots__ = ('count', 'entries')
+
+    def __init__(self, count):
+        ListNode.__init__(self, None)
+        self.count = count
+        self.entries = _new_ring()
+
+# Returns a sentinel node, linked to itself: an empty ring
+def _new_ring():
+    root = ListNode(None)
+    root.next = root
+    root.prev = root
+    return root
+
+# Links node into a ring, after prev_node
+def _link_after(prev_node, node):
+    node.prev = prev_node
+    node.next = prev_node.next
+    prev_node.next.prev = node
+    prev_node.next = node
+
+# Takes node out of its ring
+def _unlink(node):
+    node.prev.next = node.next
+    node.next.prev = node.prev
+
+# What LRUCache and LFUCache have in common. Subclasses keep the nodes in order, with _clear_order(), _insert(),
+# _touch(), _unlink_node(), _victim() and _ordered_nodes().
+class _BoundedCache(object):
+
+    # Params
+    #   capacity: the most entries the cache holds or, with weigh, the most total weight
+    #   weigh: if given, weigh(key, value) gives each entry's weight (a number, at least 0), instead of 1 each
+    #   on_evict: if given, on_evict(key, value) is called for each entry evicted to make room (but not for entries
+    #     replaced, popped or cleared)
+    def __init__(self, capacity, weigh=None, on_evict=None):
+        if capacity < 0:
+            raise ValueError("capacity can't be negative")
+        self.capacity = capacity
+        self.weigh = weigh
+        self.on_evict = on_evict
+        self.weight = 0 # total weight of the entries (their number, without weigh)
+        self._nodes = {} # key -> node
+        self.reset_stats()
+        self._clear_order()
+
+    def __len__(self):
+        return len(self._nodes)
+
+    # Support for 'in'. Doesn't count as a use of the entry, or a hit or miss.
+    def __contains__(self, key):
+        return key in self._nodes
+
+    # Support for iteration: the keys, from the one that would be evicted last to the one that would go first
+    def __iter__(self):
+        for node in self._ordered_nodes():
+            yield node.key
+
+    # Support for cache[key]. Raises KeyError on a miss.
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+    # Returns the value for key, or default on a miss. A hit counts as a use of the entry.
+    def get(self, key, default=None):
+        node = self._nodes.get(key)
+        if node is None:
+            self.misses = self.misses + 1
+            return default
+        self.hits = self.hits + 1
+        self._touch(node)
+        return node.item
+
+    # Returns the value for key, or default if it isn't there, without counting it as a use, a hit or a miss
+    def peek(self, key, default=None):
+        node = self._nodes.get(key)
+        return default if node is None else node.item
+
+    # Puts value in the cache under key, evicting entries to make room if need be. Replacing the value of a key already
+    # there counts as a use. A value that weighs more than the whole capacity isn't kept (and the old value for its
+    # key, if any, is dropped).
+    def put(self, key, value):
+        weight = 1 if self.weigh is None else self.weigh(key, value)
+        node = self._nodes.get(key)
+        if weight > self.capacity:
+            if node is not None:
+                self._remove(node)
+            return
+        if node is None:
+            # Make room first, so that the new entry can't be the one evicted
+            self._evict(weight, None)
+            node = self._new_node(key, value, weight)
+            self._nodes[key] = node
+            self._insert(node)
+            self.weight = self.weight + weight
+        else:
+            self.weight = self.weight - node.weight + weight
+            node.item = value
+            node.weight = weight
+            self._touch(node)
+            self._evict(0, node)
+
+    # Removes the entry for key, returns its value. If there isn't one, returns default if given, otherwise raises
+    # KeyError.
+    def pop(self, key, default=_MISSING):
+        node = self._nodes.get(key)
+        if node is None:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        self._remove(node)
+        return node.item
+
+    # Removes all the entries (without calling on_evict). The stats are kept.
+    def clear(self):
+        self._nodes = {}
+        self.weight = 0
+        self._clear_order()
+
+    # Changes the capacity, evicting entries if they no longer fit
+    def resize(self, capacity):
+        if capacity < 0:
+            raise ValueError("capacity can't be negative")
+        self.capacity = capacity
+        self._evict(0, None)
+
+    # Returns a list of (key, value) pairs, in the same order as iteration
+    def items(self):
+        return [(node.key, node.item) for node in self._ordered_nodes()]
+
+    # Returns the stats, in a dict: 'hits' and 'misses' (from get() and cache[key]), 'hit_rate', 'evictions', and the
+    # 'size', 'weight' and 'capacity' of the cache. If reset is True, the counts start over after being read.
+    def stats(self, reset=False):
+        lookups = self.hits + self.misses
+        stats = {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups > 0 else 0.0,
+                 'evictions': self.evictions, 'size': len(self._nodes), 'weight': self.weight,
+                 'capacity': self.capacity}
+        if reset:
+            self.reset_stats()
+        return stats
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Decorator: returns a wrapper of func that keeps its results in this cache, keyed by the arguments it's called
+    # with (which have to be hashable). The wrapper's cache attribute is this cache.
+    def memoize(self, func):
+        def wrapper(*args, **kwargs):
+            key = args if not kwargs else args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                self.put(key, value)
+            return value
+        functools.update_wrapper(wrapper, func)
+        wrapper.cache = self
+        return wrapper
+
+    # Evicts entries, other than keep, until there's room for extra more weight
+    def _evict(self, extra, keep):
+        while self.weight + extra > self.capacity:
+            node = self._victim(keep)
+            if node is None:
+                return
+            self._remove(node)
+            self.evictions = self.evictions + 1
+            if self.on_evict is not None:
+                self.on_evict(node.key, node.item)
+
+    def _remove(self, node):
+        self._unlink_node(node)
+        del self._nodes[node.key]
+        self.weight = self.weight - node.weight
+
+    def _new_node(self, key, value, weight):
+        return CacheNode(key, value, weight)
+
+# Cache that evicts the least recently used entry. Params are the same as for _BoundedCache.
+class LRUCache(_BoundedCache):
+
+    def _clear_order(self):
+        self._root = _new_ring() # root.next is the most recently used node, root.prev the least
+
+    # Same as _BoundedCache.get(), with the move to the front done here, as this is the call made most
+    def get(self, key, default=None):
+        node = self._nodes.get(key)
+        if node is None:
+            self.misses = self.misses + 1
+            return default
+        self.hits = self.hits + 1
+        root = self._root
+        if root.next is not node:
+            node.prev.next = node.next
+            node.next.prev = node.prev
+            node.prev = root
+            node.next = root.next
+            root.next.prev = node
+            root.next = node
+        return node.item
+
+    def _insert(self, node):
+        _link_after(self._root, node)
+
+    def _touch(self, node):
+        _unlink(node)
+        _link_after(self._root, node)
+
+    def _unlink_node(self, node):
+        _unlink(node)
+
+    def _victim(self, keep):
+        node = self._root.prev
+        if node is keep:
+            node = node.prev
+        return None if node is self._root else node
+
+    def _ordered_nodes(self):
+        node = self._root.next
+        while node is not self._root:
+            yield node
+            node = node.next
+
+# Cache that evicts the least frequently used entry, and of those, the least recently used. Params are the same as for
+# _BoundedCache.
+class LFUCache(_BoundedCache):
+
+    def _clear_order(self):
+        self._buckets = _new_ring() # buckets.next is the bucket with the lowest count
+
+    # Returns the use count of the entry for key (0 if there isn't one), without counting this as a use
+    def use_count(self, key):
+        node = self._nodes.get(key)
+        return 0 if node is None else node.bucket.count
+
+    def _new_node(self, key, value, weight):
+        return FrequencyNode(key, value, weight)
+
+    def _insert(self, node):
+        bucket = self._buckets.next
+        if bucket is self._buckets or bucket.count != 1:
+            bucket = FrequencyBucket(1)
+            _link_after(self._buckets, bucket)
+        node.bucket = bucket
+        _link_after(bucket.entries, node)
+
+    def _touch(self, node):
+        bucket = node.bucket
+        next_bucket = bucket.next
+        if next_bucket is self._buckets or next_bucket.count != bucket.count + 1:
+            next_bucket = FrequencyBucket(bucket.count + 1)
+            _link_after(bucket, next_bucket)
+        self._unlink_node(node)
+        node.bucket = next_bucket
+        _link_after(next_bucket.entries, node)
+
+    # Takes node out of its bucket, and the bucket out of the list if that leaves it empty
+    def _unlink_node(self, node):
+        _unlink(node)
+        bucket = node.bucket
+        if bucket.entries.next is bucket.entries:
+            _unlink(bucket)
+
+    def _victim(self, keep):
+        bucket = self._buckets.next
+        while bucket is not self._buckets:
+            node = bucket.entries.prev
+            if node is keep:
+                node = node.prev
+            if node is not bucket.entries:
+                return node
+            bucket = bucket.next
+        return None
+
+    # Most used first, and most recently used first among those used as often
+    def _ordered_nodes(self):
+        bucket = self._buckets.prev
+        while bucket is not self._buckets:
+            node = bucket.entries.next
+            while node is not bucket.entries:
+                yield node
+                node = node.next
+            bucket = bucket.prev
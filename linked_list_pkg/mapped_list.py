@@ -0,0 +1,485 @@
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+
+# A doubly-linked list kept in files rather than in memory, for lists too big for RAM. It works like
+# CompactLinkedList, with nodes as numbered slots rather than objects, but the slots are fixed-size records in a
+# memory-mapped file, and the items are pickled into a second, append-only file, the item heap:
+#   path          a header (see HEADER below), then one record per slot: the offset and length of the item's bytes
+#                 in the heap, and the next and prev slot numbers (NO_RECORD for none)
+#   path.heap     the items' pickled bytes, one after another
+# Only the pages holding the records and items that are actually touched get read in, so walking part of the list, or
+# adding and removing at the ends, costs the same no matter how big the list is. The public functions are the same as
+# CompactLinkedList's, so code can switch between them, plus flush(), close() and compact().
+#
+# Freed records go onto a free list (chained through their next fields) and get reused, but an item's bytes stay in
+# the heap until compact() rewrites both files. The header is written after every change, as the records and items
+# are, so a list that's dropped without being closed reopens as it was left. Changes are only certain to be on disk
+# (rather than just in the system's cache) after flush() or close(); an existing path is reopened with the list it
+# holds. Items have to be picklable, and, as with any pickle, the files should only be opened if they come from a
+# trusted source.
+
+MAGIC = b'LLMAP\x00\x00\x01' # the last byte is the version
+HEADER = struct.Struct('<8sqqqqqq') # magic, head, tail, length, record count, free list head, heap end
+HEADER_SIZE = 64
+RECORD = struct.Struct('<qqqq') # item offset, item length, next, prev
+RECORD_SIZE = RECORD.size
+ITEM_OFFSET, ITEM_LENGTH, NEXT, PREV = 0, 8, 16, 24 # where each field is within a record
+FIELD = struct.Struct('<q')
+ITEM_REF = struct.Struct('<qq') # item offset and length together
+NO_RECORD = -1
+FREE = -1 # item length of a free record
+INITIAL_RECORDS = 1024
+INITIAL_HEAP_SIZE = 65536
+
+class MappedLinkedList(object):
+
+    # Params
+    #   path: the file holding the records. The item heap goes in path + '.heap'. If path holds a list already, that
+    #     list is opened; otherwise, a new empty one is made.
+    #   iterable: if given, its items are added to the tail of the list
+    def __init__(self, path, iterable=None):
+        self.path = path
+        self._temporary = False # True if close() deletes the files, as for a copy or split made without a path
+        self._open()
+        if iterable is not None:
+            for item in iterable:
+                self.add_tail(item)
+
+    # Support for iteration using 'for'
+    def __iter__(self):
+        slot = self.head
+        while slot != NO_RECORD:
+            yield self._item(slot)
+            slot = self._field(slot, NEXT)
+
+    def __len__(self):
+        return self.length
+
+    # Support for 'with': the list is closed at the end of the block
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # --------------------------------------
+    # Functions for adding items
+    # --------------------------------------
+
+    # Adds item to head of linked list
+    def add_head(self, item):
+        slot = self._alloc(item)
+        if self.length == 0:
+            self.head = slot
+            self.tail = slot
+        else:
+            self._set_field(slot, NEXT, self.head)
+            self._set_field(self.head, PREV, slot)
+            self.head = slot
+        self.length = self.length + 1
+        self._finger = None
+        self._write_header()
+
+    # Adds item to tail of linked list
+    def add_tail(self, item):
+        self._link_tail(self._alloc(item))
+
+    # Inserts item into list, before item at specified index. If index == length of list, place after last item.
+    def insert(self, item, index=0):
+        if index < 0 or index > self.length:
+            raise IndexError("linked list index out of range")
+        if index == 0:
+            self.add_head(item)
+        elif index == self.length:
+            self.add_tail(item)
+        else:
+            slot_to_precede = self._get_to_index(index)
+            slot = self._alloc(item)
+            prev_slot = self._field(slot_to_precede, PREV)
+            self._set_field(slot, PREV, prev_slot)
+            self._set_field(slot, NEXT, slot_to_precede)
+            self._set_field(prev_slot, NEXT, slot)
+            self._set_field(slot_to_precede, PREV, slot)
+            self.length = self.length + 1
+            self._finger = None
+            self._write_header()
+
+    # --------------------------------------
+    # Functions for removing items
+    # --------------------------------------
+
+    # Pops item from head of list, returns item
+    def pop_head(self):
+        if self.length == 0: return
+        return self._unlink(self.head)
+
+    # Pops item from tail of list, returns item
+    def pop_tail(self):
+        if self.length == 0: return
+        return self._unlink(self.tail)
+
+    # Removes item at specified index, returns item
+    def remove(self, index=0):
+        if index < 0 or (index > 0 and index >= self.length):
+            raise IndexError("linked list index {} out of range".format(index))
+        if self.length == 0: return
+        return self._unlink(self._get_to_index(index))
+
+    # --------------------------------------
+    # Functions for getting items or information
+    # --------------------------------------
+
+    # Returns current size of list
+    def size(self):
+        return self.length
+
+    def empty(self):
+        return self.length == 0
+
+    # Gets item at index
+    def get_item(self, index):
+        if index < 0 or index >= self.length:
+            raise IndexError("linked list index out of range")
+        return self._item(self._get_to_index(index))
+
+    # Locates item in list, starting from start_index. Params and return value are the same as for LinkedList.
+    def find_item(self, item, start_index=None, backwards=False):
+        if start_index is None or start_index == -1:
+            start_index = self.length-1 if backwards else 0
+        if start_index < 0 or start_index >= self.length:
+            raise IndexError("linked list index out of range")
+        link = PREV if backwards else NEXT
+        step = -1 if backwards else 1
+        slot = self._get_to_index(start_index)
+        idx = start_index
+        while slot != NO_RECORD:
+            if self._item(slot) == item:
+                return idx
+            idx = idx + step
+            slot = self._field(slot, link)
+        raise ValueError("Item not found in linked list")
+
+    # Returns a Python list of items in list
+    def get_items(self):
+        return list(self)
+
+    # --------------------------------------
+    # Functions for broadly changing list
+    # --------------------------------------
+
+    # Empties the list, and shrinks its files back to their starting size
+    def clear(self):
+        self._resize_records(INITIAL_RECORDS)
+        self._resize_heap(INITIAL_HEAP_SIZE)
+        self._reset_header()
+
+    # Makes a copy of this list in new files at path. The items' bytes are copied over as they are, without being
+    # unpickled. Without a path, the files are temporary ones next to this list's (see the new list's path), which are
+    # deleted when the new list is closed; to keep the copy, give a path.
+    def copy(self, path=None):
+        new_list = self._new_list(path)
+        new_list._copy_slots_from(self, self.head)
+        return new_list
+
+    # Reverses the list in place. Every record's links are swapped, so this touches the whole file.
+    def reverse_list(self):
+        slot = self.head
+        while slot != NO_RECORD:
+            next_slot = self._field(slot, NEXT)
+            self._set_field(slot, NEXT, self._field(slot, PREV))
+            self._set_field(slot, PREV, next_slot)
+            slot = next_slot
+        self.head, self.tail = self.tail, self.head
+        self._finger = None
+        self._write_header()
+
+    # Sorts the list. Params are the same as for LinkedList.sort(). The items are sorted in memory (so they have to
+    # fit), then the item references are written back along the existing chain of records, so no links change and no
+    # item is pickled again.
+    def sort(self, reverse=False, val_func=None, key=None):
+        if key is None: key = val_func
+        if self.length < 2: return
+        slots = []
+        slot = self.head
+        while slot != NO_RECORD:
+            slots.append(slot)
+            slot = self._field(slot, NEXT)
+        items = [self._item(slot) for slot in slots]
+        item_refs = [self._item_ref(slot) for slot in slots]
+        if key is None:
+            order = sorted(range(len(items)), key=items.__getitem__, reverse=reverse)
+        else:
+            keys = [key(item) for item in items]
+            order = sorted(range(len(items)), key=keys.__getitem__, reverse=reverse)
+        for slot, n in zip(slots, order):
+            self._set_item_ref(slot, item_refs[n])
+        self._finger = None
+
+    # Given another list, join its contents to the tail of this one. The other list is cleared. If it's a mapped
+    # list, its items' bytes are copied over as they are; otherwise, its items are added one by one.
+    def join(self, other_list):
+        if isinstance(other_list, MappedLinkedList):
+            self._copy_slots_from(other_list, other_list.head)
+        else:
+            for item in other_list:
+                self.add_tail(item)
+        other_list.clear()
+
+    # Splits off a separate linked list, beginning with the item at index. If index is the same as the size of
+    # the list, then return an empty linked list. The new list goes in new files at path (or, as for copy(), temporary
+    # ones deleted when it's closed), and the split-off part is copied over, so this is O(size - index).
+    def split(self, index, path=None):
+        size = self.length
+        if index < 0 or index > size:
+            raise IndexError("linked list index out of range")
+        new_list = self._new_list(path)
+        if index == size:
+            return new_list
+        if index == 0:
+            new_list._copy_slots_from(self, self.head)
+            self.clear()
+            return new_list
+        split_slot = self._get_to_index(index)
+        new_list._copy_slots_from(self, split_slot)
+        new_tail = self._field(split_slot, PREV)
+        self._set_field(new_tail, NEXT, NO_RECORD)
+        slot = split_slot
+        while slot != NO_RECORD:
+            next_slot = self._field(slot, NEXT)
+            self._free_slot(slot)
+            slot = next_slot
+        self.tail = new_tail
+        self.length = index
+        self._finger = None
+        self._write_header()
+        return new_list
+
+    # --------------------------------------
+    # Functions for the files
+    # --------------------------------------
+
+    # Writes all changes out to the files
+    def flush(self):
+        self._write_header()
+        self._records.flush()
+        self._heap.flush()
+
+    # Flushes the list and closes its files. After this, the list can't be used, but the files can be reopened. If
+    # delete is True, or the files are temporary ones made by copy() or split(), they're deleted instead.
+    def close(self, delete=False):
+        if not self._records.closed:
+            self.flush()
+            self._close_files()
+        if delete or self._temporary:
+            self._temporary = False
+            os.remove(self.path)
+            os.remove(self.path + '.heap')
+
+    # Reclaims the space of freed records and of removed items' bytes, by rewriting both files with the records in
+    # list order and the items packed together. Afterwards, walking the list reads both files front to back.
+    def compact(self):
+        compacted = MappedLinkedList(self._new_path())
+        compacted._copy_slots_from(self, self.head)
+        compacted._resize_records(max(INITIAL_RECORDS, compacted._record_count))
+        compacted._resize_heap(max(INITIAL_HEAP_SIZE, compacted._heap_end))
+        compacted_path = compacted.path
+        compacted.close()
+        self._close_files()
+        os.replace(compacted_path, self.path)
+        os.replace(compacted_path + '.heap', self.path + '.heap')
+        self._open()
+
+    # --------------------------------------
+    # Private helper functions, for internal use
+    # --------------------------------------
+
+    # Opens and maps the files at self.path, creating them if there's no list there yet. An existing file is checked
+    # before anything is opened for writing, so that opening a file that isn't a list leaves it as it was.
+    def _open(self):
+        heap_path = self.path + '.heap'
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        if not new:
+            with open(self.path, 'rb') as records_file:
+                header = records_file.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+                raise ValueError("not a linked list file")
+            if not os.path.exists(heap_path) or os.path.getsize(heap_path) == 0:
+                raise ValueError("item heap {} missing or empty".format(heap_path))
+        opened = [] # closed again, without writing anything, if opening fails part way
+        try:
+            self._records_file = open(self.path, 'w+b' if new else 'r+b')
+            opened.append(self._records_file)
+            self._heap_file = open(heap_path, 'w+b' if new else 'r+b')
+            opened.append(self._heap_file)
+            if new:
+                self._records_file.truncate(HEADER_SIZE + INITIAL_RECORDS * RECORD_SIZE)
+                self._heap_file.truncate(INITIAL_HEAP_SIZE)
+            self._records = mmap.mmap(self._records_file.fileno(), 0)
+            opened.append(self._records)
+            self._heap = mmap.mmap(self._heap_file.fileno(), 0)
+            opened.append(self._heap)
+            if new:
+                self._reset_header()
+                return
+            magic, self.head, self.tail, self.length, self._record_count, self._free, self._heap_end = \
+                HEADER.unpack_from(self._records, 0)
+            if HEADER_SIZE + self._record_count * RECORD_SIZE > len(self._records) or \
+                    self._heap_end > len(self._heap):
+                raise ValueError("linked list file damaged")
+        except BaseException:
+            for handle in reversed(opened):
+                handle.close()
+            raise
+        self._finger = None # (index, slot) of the last index reached, or None
+
+    def _close_files(self):
+        self._records.close()
+        self._heap.close()
+        self._records_file.close()
+        self._heap_file.close()
+
+    def _reset_header(self):
+        self.head = NO_RECORD
+        self.tail = NO_RECORD
+        self.length = 0
+        self._record_count = 0 # slots ever used; those not in the list are on the free list
+        self._free = NO_RECORD # first slot of the free list
+        self._heap_end = 0 # where the next item's bytes go in the heap
+        self._finger = None
+        self._write_header()
+
+    # Writes head, tail, length and the rest into the header of the records file. Called after every change to them,
+    # once the records they refer to have been written.
+    def _write_header(self):
+        HEADER.pack_into(self._records, 0, MAGIC, self.head, self.tail, self.length, self._record_count,
+                         self._free, self._heap_end)
+
+    # Returns a new, empty list in files at path or, if path is None, in temporary files next to this list's
+    def _new_list(self, path):
+        if path is not None:
+            return MappedLinkedList(path)
+        new_list = MappedLinkedList(self._new_path())
+        new_list._temporary = True
+        return new_list
+
+    # Returns a path for a new list in the same folder as this one
+    def _new_path(self):
+        folder, name = os.path.split(os.path.abspath(self.path))
+        handle, path = tempfile.mkstemp(prefix=name + '.', dir=folder)
+        os.close(handle)
+        return path
+
+    def _field(self, slot, field):
+        return FIELD.unpack_from(self._records, HEADER_SIZE + slot * RECORD_SIZE + field)[0]
+
+    def _set_field(self, slot, field, value):
+        FIELD.pack_into(self._records, HEADER_SIZE + slot * RECORD_SIZE + field, value)
+
+    # Returns the offset and length of the bytes of the item at slot
+    def _item_ref(self, slot):
+        return ITEM_REF.unpack_from(self._records, HEADER_SIZE + slot * RECORD_SIZE + ITEM_OFFSET)
+
+    def _set_item_ref(self, slot, item_ref):
+        ITEM_REF.pack_into(self._records, HEADER_SIZE + slot * RECORD_SIZE + ITEM_OFFSET, *item_ref)
+
+    def _item(self, slot):
+        offset, length = self._item_ref(slot)
+        return pickle.loads(self._heap[offset:offset + length])
+
+    # Returns a free slot holding item, with no links
+    def _alloc(self, item):
+        return self._alloc_bytes(pickle.dumps(item, pickle.HIGHEST_PROTOCOL))
+
+    # Returns a free slot holding an item already pickled to item_bytes, with no links. The bytes go on the end of
+    # the heap.
+    def _alloc_bytes(self, item_bytes):
+        offset = self._heap_end
+        if offset + len(item_bytes) > len(self._heap):
+            self._resize_heap(max(2 * len(self._heap), offset + len(item_bytes)))
+        self._heap[offset:offset + len(item_bytes)] = item_bytes
+        self._heap_end = offset + len(item_bytes)
+        if self._free != NO_RECORD:
+            slot = self._free
+            self._free = self._field(slot, NEXT)
+        else:
+            slot = self._record_count
+            if (slot + 1) * RECORD_SIZE + HEADER_SIZE > len(self._records):
+                self._resize_records(max(INITIAL_RECORDS, 2 * slot))
+            self._record_count = slot + 1
+        RECORD.pack_into(self._records, HEADER_SIZE + slot * RECORD_SIZE, offset, len(item_bytes), NO_RECORD,
+                         NO_RECORD)
+        return slot
+
+    # Puts slot on the free list
+    def _free_slot(self, slot):
+        RECORD.pack_into(self._records, HEADER_SIZE + slot * RECORD_SIZE, 0, FREE, self._free, NO_RECORD)
+        self._free = slot
+
+    def _link_tail(self, slot):
+        if self.length == 0:
+            self.head = slot
+            self.tail = slot
+        else:
+            self._set_field(slot, PREV, self.tail)
+            self._set_field(self.tail, NEXT, slot)
+            self.tail = slot
+        self.length = self.length + 1
+        self._write_header()
+
+    # Unlinks the record at slot and frees it. Returns the item it held.
+    def _unlink(self, slot):
+        prev_slot = self._field(slot, PREV)
+        next_slot = self._field(slot, NEXT)
+        if prev_slot == NO_RECORD:
+            self.head = next_slot
+        else:
+            self._set_field(prev_slot, NEXT, next_slot)
+        if next_slot == NO_RECORD:
+            self.tail = prev_slot
+        else:
+            self._set_field(next_slot, PREV, prev_slot)
+        item = self._item(slot)
+        self.length = self.length - 1
+        self._finger = None
+        if self.length == 0:
+            # Nothing left, so everything in the files can be reused
+            self._reset_header()
+        else:
+            self._free_slot(slot)
+            self._write_header()
+        return item
+
+    # Adds copies of the records of other_list from slot to its tail onto the tail of this list, copying the items'
+    # bytes as they are
+    def _copy_slots_from(self, other_list, slot):
+        while slot != NO_RECORD:
+            offset, length = other_list._item_ref(slot)
+            self._link_tail(self._alloc_bytes(other_list._heap[offset:offset + length]))
+            slot = other_list._field(slot, NEXT)
+
+    # Makes the records file big enough for record_count records, mapping it again
+    def _resize_records(self, record_count):
+        self._records.close()
+        self._records_file.truncate(HEADER_SIZE + record_count * RECORD_SIZE)
+        self._records = mmap.mmap(self._records_file.fileno(), 0)
+
+    def _resize_heap(self, size):
+        self._heap.close()
+        self._heap_file.truncate(size)
+        self._heap = mmap.mmap(self._heap_file.fileno(), 0)
+
+    # Returns slot at target_idx, starting from whichever of head, tail or last index reached is closest
+    def _get_to_index(self, target_idx):
+        start_idx, slot = 0, self.head
+        if self.length - 1 - target_idx < target_idx:
+            start_idx, slot = self.length - 1, self.tail
+        if self._finger is not None and abs(self._finger[0] - target_idx) < abs(start_idx - target_idx):
+            start_idx, slot = self._finger
+        link = NEXT if target_idx >= start_idx else PREV
+        for i in range(abs(target_idx - start_idx)):
+            slot = self._field(slot, link)
+        self._finger = (target_idx, slot)
+        return slot
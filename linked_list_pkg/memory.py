@@ -0,0 +1,27 @@
+import sys
+
+# Helpers for the lists' memory_usage() and __sizeof__(). Sizes are as sys.getsizeof() gives them, so they include
+# the garbage collector's header on objects that have one. They count what the list itself owns; with deep=True,
+# memory_usage() adds the items, each distinct item object once (by identity), but not what the items refer to in
+# turn. Small ints and other objects the interpreter shares are counted like any other item.
+
+# Ints from -5 to 256 are shared by the interpreter, so an int field holding one costs nothing extra
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 256
+
+# Returns the size of an int field's value: 0 if the interpreter shares it
+def int_size(value):
+    return 0 if SMALL_INT_MIN <= value <= SMALL_INT_MAX else sys.getsizeof(value)
+
+# Returns the total size of the distinct objects in items. seen, if given, is a set of ids of objects already counted,
+# which is updated.
+def items_size(items, seen=None):
+    if seen is None:
+        seen = set()
+    total = 0
+    for item in items:
+        item_id = id(item)
+        if item_id not in seen:
+            seen.add(item_id)
+            total = total + sys.getsizeof(item)
+    return total
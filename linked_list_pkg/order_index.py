@@ -0,0 +1,244 @@
+import random
+
+# Order-statistic index, used by LinkedList when index_mode is 'tree'. The list nodes themselves double as the nodes
+# of an implicit treap (a binary tree that is also a heap on random priorities). A node's position in the linked
+# list is its in-order position in the tree, and each node records the size of its subtree. That gets us to any
+# index, and lets us insert, remove, split and join, in O(log n) expected time regardless of the length of the list.
+#
+# The nodes must carry left, right, parent, size and prio fields (see IndexedListNode).
+
+def _size(node):
+    return node.size if node is not None else 0
+
+class OrderIndex(object):
+
+    # Private random generator, so that building trees doesn't disturb the caller's random sequence
+    _rng = random.Random()
+
+    def __init__(self):
+        self.root = None
+
+    def size(self):
+        return _size(self.root)
+
+    def clear(self):
+        self.root = None
+
+    # Builds the tree from scratch, for the chain of nodes starting at head. Runs in O(n), no recursion.
+    def build(self, head):
+        rng = self._rng.random
+        stack = [] # right spine of the tree built so far
+        node = head
+        while node is not None:
+            node.prio = rng()
+            node.left = None
+            node.right = None
+            node.parent = None
+            last = None
+            while stack and stack[-1].prio < node.prio:
+                last = stack.pop()
+            if last is not None:
+                node.left = last
+                last.parent = node
+            if stack:
+                stack[-1].right = node
+                node.parent = stack[-1]
+            stack.append(node)
+            node = node.next
+        self.root = stack[0] if stack else None
+        self._recompute_sizes()
+
+    # Returns the node at index. Index must be in range.
+    def node_at(self, index):
+        node = self.root
+        while True:
+            left_size = _size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node
+            else:
+                index = index - left_size - 1
+                node = node.right
+
+    # Returns index of node
+    def rank(self, node):
+        idx = _size(node.left)
+        while node.parent is not None:
+            parent = node.parent
+            if node is parent.right:
+                idx = idx + _size(parent.left) + 1
+            node = parent
+        return idx
+
+    # Adds node to the tree, just before ref_node. If ref_node is None, node goes at the end.
+    def insert_before(self, ref_node, node):
+        node.left = None
+        node.right = None
+        node.size = 1
+        node.prio = self._rng.random()
+        if self.root is None:
+            node.parent = None
+            self.root = node
+            return
+        if ref_node is None:
+            parent = self.root
+            while parent.right is not None:
+                parent = parent.right
+            parent.right = node
+        elif ref_node.left is None:
+            parent = ref_node
+            parent.left = node
+        else:
+            parent = ref_node.left
+            while parent.right is not None:
+                parent = parent.right
+            parent.right = node
+        node.parent = parent
+        while parent is not None:
+            parent.size = parent.size + 1
+            parent = parent.parent
+        while node.parent is not None and node.parent.prio < node.prio:
+            self._rotate_up(node)
+
+    # Takes node out of the tree
+    def remove(self, node):
+        # Rotate node down until it has at most one child, then splice it out
+        while node.left is not None and node.right is not None:
+            self._rotate_up(node.left if node.left.prio > node.right.prio else node.right)
+        child = node.left if node.left is not None else node.right
+        parent = node.parent
+        if child is not None:
+            child.parent = parent
+        if parent is None:
+            self.root = child
+        elif parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
+        while parent is not None:
+            parent.size = parent.size - 1
+            parent = parent.parent
+        node.left = None
+        node.right = None
+        node.parent = None
+        node.size = 1
+
+    # Splits off the nodes at index and beyond. They are returned in a new OrderIndex.
+    def split(self, index):
+        left, right = self._split(self.root, index)
+        if left is not None: left.parent = None
+        if right is not None: right.parent = None
+        self.root = left
+        new_index = OrderIndex()
+        new_index.root = right
+        return new_index
+
+    # Appends the nodes of another index to the end of this one. The other index is emptied.
+    def join(self, other_index):
+        self.root = self._merge(self.root, other_index.root)
+        if self.root is not None:
+            self.root.parent = None
+        other_index.root = None
+
+    # Debugging feature. Checks tree against the chain of nodes starting at head. Returns False, error string if bad.
+    def validate(self, head, length):
+        if _size(self.root) != length:
+            return False, "tree size doesn't match length"
+        if self.root is not None and self.root.parent is not None:
+            return False, "tree root has a parent"
+        # In-order walk of the tree must visit the nodes in list order
+        stack = []
+        node = self.root
+        list_node = head
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            if node is not list_node:
+                return False, "tree order doesn't match list order"
+            if node.size != 1 + _size(node.left) + _size(node.right):
+                return False, "bad subtree size"
+            for child in (node.left, node.right):
+                if child is not None and (child.parent is not node or child.prio > node.prio):
+                    return False, "bad tree link"
+            list_node = list_node.next
+            node = node.right
+        return True, ""
+
+    # --------------------------------------
+    # Private helper functions, for internal use
+    # --------------------------------------
+
+    # Rotates node above its parent, keeping the in-order sequence intact
+    def _rotate_up(self, node):
+        parent = node.parent
+        grandparent = parent.parent
+        if node is parent.left:
+            moved = node.right
+            parent.left = moved
+            node.right = parent
+        else:
+            moved = node.left
+            parent.right = moved
+            node.left = parent
+        if moved is not None:
+            moved.parent = parent
+        parent.parent = node
+        node.parent = grandparent
+        if grandparent is None:
+            self.root = node
+        elif grandparent.left is parent:
+            grandparent.left = node
+        else:
+            grandparent.right = node
+        node.size = parent.size
+        parent.size = 1 + _size(parent.left) + _size(parent.right)
+
+    # Recomputes every subtree size. Reversed pre-order visits children before their parents.
+    def _recompute_sizes(self):
+        if self.root is None: return
+        order = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            if node.left is not None: stack.append(node.left)
+            if node.right is not None: stack.append(node.right)
+        for node in reversed(order):
+            left, right = node.left, node.right
+            node.size = 1 + (left.size if left is not None else 0) + (right.size if right is not None else 0)
+
+    # Splits the subtree at node into the first count nodes and the rest. Recursion depth is the tree depth.
+    def _split(self, node, count):
+        if node is None:
+            return None, None
+        left_size = _size(node.left)
+        if count <= left_size:
+            left, right = self._split(node.left, count)
+            node.left = right
+            if right is not None: right.parent = node
+            node.size = 1 + _size(right) + _size(node.right)
+            return left, node
+        else:
+            left, right = self._split(node.right, count - left_size - 1)
+            node.right = left
+            if left is not None: left.parent = node
+            node.size = 1 + _size(node.left) + _size(left)
+            return node, right
+
+    # Merges two subtrees, where every node of first comes before every node of second
+    def _merge(self, first, second):
+        if first is None: return second
+        if second is None: return first
+        if first.prio > second.prio:
+            first.right = self._merge(first.right, second)
+            first.right.parent = first
+            first.size = 1 + _size(first.left) + _size(first.right)
+            return first
+        else:
+            second.left = self._merge(first, second.left)
+            second.left.parent = second
+            second.size = 1 + _size(second.left) + _size(second.right)
+            return second
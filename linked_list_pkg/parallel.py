@@ -0,0 +1,52 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Helpers for LinkedList.parallel_sort() and parallel_map(). The list's items are cut into contiguous segments, one per
+# worker, as split() would cut the list, and each segment is sent to a process of its own. The results come back in
+# segment order, so they don't depend on which worker finishes first.
+#
+# Everything sent to a worker gets pickled: the items, and the key or func passed in by the caller (which must then be
+# defined at module level, not be a lambda). What comes back is kept small: a sorted segment is returned as the
+# positions of its items, in an array, which pickles as raw bytes, rather than as the items themselves.
+
+# Returns the number of workers to use for size items: workers (by default, one per CPU), but no more than leaves each
+# at least min_segment items
+def worker_count(size, workers, min_segment):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    return max(1, min(workers, size // min_segment))
+
+# Cuts a Python list into count contiguous segments, as near the same size as can be. Returns them in a Python list.
+def segments_of(items, count):
+    size = len(items)
+    bounds = [size * n // count for n in range(count + 1)]
+    return [items[bounds[n]:bounds[n + 1]] for n in range(count)]
+
+# Calls func(segment, *args) for each segment, in a process pool if there's more than one segment. executor, if given,
+# is used instead of a new pool. Returns the results in segment order.
+def run_segments(func, segments, args, executor=None):
+    if len(segments) == 1:
+        return [func(segments[0], *args)]
+    if executor is not None:
+        return _run_in(executor, func, segments, args)
+    with ProcessPoolExecutor(max_workers=len(segments)) as pool:
+        return _run_in(pool, func, segments, args)
+
+def _run_in(executor, func, segments, args):
+    futures = [executor.submit(func, segment, *args) for segment in segments]
+    return [future.result() for future in futures]
+
+# Sorts a segment of items. Returns the positions of the items in sorted order, in an array, and, if there's a key
+# function, the keys in that order (so that the segments can be merged without calling key again). Like sort(), the
+# sort is stable, and each key is computed just once.
+def sort_segment(items, key, reverse):
+    keys = items if key is None else [key(item) for item in items]
+    order = sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+    return array('q', order), None if key is None else [keys[n] for n in order]
+
+# Returns a Python list of func(item) for each item of a segment
+def map_segment(items, func):
+    return [func(item) for item in items]
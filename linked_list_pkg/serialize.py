@@ -0,0 +1,43 @@
+import pickle
+from itertools import islice
+
+# The file format used by LinkedList.dump() and load(). It's a stream of pickles, written and read one at a time, so
+# that memory use stays bounded however big the list:
+#   MAGIC                  to recognize the format (the last byte is the version)
+#   settings               a dict of the list's constructor arguments
+#   chunk, chunk, ...      Python lists of up to CHUNK_SIZE items, in order
+#   None                   end of list
+# Each chunk is pickled on its own, so items that appear in more than one chunk are stored more than once. Only the
+# items are stored, never nodes or the cache, which the loaded list builds for itself. As with any pickle, only load
+# files from a trusted source.
+
+MAGIC = b'LLST\x01'
+CHUNK_SIZE = 10000
+
+# Writes settings, then the items of iterable, to fp, a binary file
+def dump_items(fp, settings, iterable):
+    fp.write(MAGIC)
+    pickle.dump(settings, fp, pickle.HIGHEST_PROTOCOL)
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, CHUNK_SIZE))
+        if len(chunk) == 0:
+            break
+        pickle.dump(chunk, fp, pickle.HIGHEST_PROTOCOL)
+    pickle.dump(None, fp, pickle.HIGHEST_PROTOCOL)
+
+# Reads what dump_items() wrote from fp, a binary file. Returns the settings, and an iterator over the chunks of
+# items, which reads each one only when it's needed. Raises ValueError if fp isn't in this format. If it's cut short,
+# reading the chunks raises EOFError or pickle.UnpicklingError.
+def load_items(fp):
+    if fp.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a linked list file")
+    settings = pickle.load(fp)
+    return settings, _read_chunks(fp)
+
+def _read_chunks(fp):
+    while True:
+        chunk = pickle.load(fp)
+        if chunk is None:
+            return
+        yield chunk
@@ -0,0 +1,237 @@
+from bisect import bisect_right
+
+# Read-only snapshots of a LinkedList, made by LinkedList.snapshot(). Taking one is O(1): rather than copy the items,
+# the snapshot shares the list's nodes. It's made of runs, each either a stretch of nodes still in the list (shared),
+# or a Python list of items it has copied. To begin with, it's a single shared run over the whole list.
+#
+# The list keeps (weak) references to its snapshots, and before any change to itself, tells them which nodes are about
+# to be removed or given new items, and where new nodes are going in. Each snapshot then copies the items of just
+# those nodes, and splits its shared runs wherever a link it follows is about to change. The rest of it stays shared,
+# so the cost of a change to the list grows with the part of it changed, not its length. A change to the whole list
+# (sort(), reverse_list()) copies the lot. A snapshot nobody refers to any more goes away, and costs the list nothing.
+#
+# Within a shared run, a snapshot gets to an index through the list itself, as its nodes are still there, at indices
+# that the list keeps up to date as it changes. So reading a snapshot by index is about as quick as reading the list.
+# If the list is cleared, the nodes it let go of are handed to a list of their own, which goes on indexing them; when
+# a list is joined on to another, or split, the shared runs move along with their nodes.
+#
+# Each change to the list splits a run or two, so after a lot of them, a snapshot would be in a lot of small pieces.
+# Once there are more than MAX_RUNS, the short shared runs are copied, and copied runs next to each other merged.
+#
+# A snapshot reads the list's nodes, so like the list, it isn't thread-safe: to read one in a thread while another
+# changes the list, both need to hold the same lock.
+
+MAX_RUNS = 64
+
+# A stretch of a snapshot. A shared run is count nodes from first on, at index start in owner, the list they're in. A
+# copied run has its items, and no owner.
+class Run(object):
+    __slots__ = ('owner', 'first', 'start', 'count', 'items')
+
+    def __init__(self, owner, first, start, count, items=None):
+        self.owner = owner
+        self.first = first
+        self.start = start
+        self.count = count
+        self.items = items
+
+    @classmethod
+    def copied(cls, items):
+        return cls(None, None, -1, len(items), items)
+
+class ListSnapshot(object):
+
+    def __init__(self, owner):
+        self.length = owner.length
+        self._runs = [Run(owner, owner.head, 0, owner.length)] if owner.length > 0 else []
+        self._offsets = None # index in the snapshot of each run's first item, worked out when needed
+        self._version = 0 # goes up every time the runs are split, copied or merged
+
+    def __len__(self):
+        return self.length
+
+    def size(self):
+        return self.length
+
+    def empty(self):
+        return self.length == 0
+
+    # Support for iteration using 'for'. It goes on giving the items as they were when the snapshot was taken, however
+    # the list changes in the meantime.
+    def __iter__(self):
+        return self._iter_items(0, self.length)
+
+    # Support for reversed(). Iterates from the last item to the first.
+    def __reversed__(self):
+        index = self.length - 1
+        while index >= 0:
+            version = self._version
+            run, offset = self._find_run(index)
+            if run.items is not None:
+                items = run.items
+                for n in range(offset, -1, -1):
+                    yield items[n]
+                index = index - offset - 1
+                continue
+            node = run.owner._get_to_index(run.start + offset)
+            count = offset + 1
+            for n in range(count):
+                yield node.item
+                if self._version != version:
+                    count = n + 1
+                    break
+                node = node.prev
+            index = index - count
+
+    # Support for snapshot[index] and snapshot[start:stop:step]. Negative indices count from the end. A slice is
+    # returned as a Python list.
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(*index.indices(self.length))
+            if len(indices) == 0:
+                return []
+            low = min(indices[0], indices[-1])
+            items = list(self._iter_items(low, max(indices[0], indices[-1]) + 1))
+            return [items[n - low] for n in indices]
+        if index < 0:
+            index = index + self.length
+        return self.get_item(index)
+
+    # Gets item at index
+    def get_item(self, index):
+        if index < 0 or index >= self.length:
+            raise IndexError("snapshot index out of range")
+        run, offset = self._find_run(index)
+        if run.items is not None:
+            return run.items[offset]
+        return run.owner._get_to_index(run.start + offset).item
+
+    # Returns a Python list of the items in the snapshot
+    def get_items(self):
+        return list(self._iter_items(0, self.length))
+
+    # Returns an iterator over the items from start up to, but not including, stop, which work as in a slice
+    def iter_range(self, start, stop):
+        start, stop, step = slice(start, stop).indices(self.length)
+        return self._iter_items(start, max(start, stop))
+
+    # Generator behind the iterators. Within a shared run, it follows the nodes' links. If the runs change while it's
+    # paused, it finds its place again before going on, as the links past that point may have changed.
+    def _iter_items(self, start, stop):
+        index = start
+        while index < stop:
+            version = self._version
+            run, offset = self._find_run(index)
+            count = min(run.count - offset, stop - index)
+            if run.items is not None:
+                items = run.items
+                for n in range(offset, offset + count):
+                    yield items[n]
+                index = index + count
+                continue
+            node = run.first if offset == 0 else run.owner._get_to_index(run.start + offset)
+            for n in range(count):
+                yield node.item
+                if self._version != version:
+                    count = n + 1
+                    break
+                node = node.next
+            index = index + count
+
+    # Returns the run holding the item at index, and the item's offset in it
+    def _find_run(self, index):
+        if self._offsets is None:
+            offsets = []
+            total = 0
+            for run in self._runs:
+                offsets.append(total)
+                total = total + run.count
+            self._offsets = offsets
+        n = bisect_right(self._offsets, index) - 1
+        return self._runs[n], index - self._offsets[n]
+
+    # Called by owner before it changes: the count nodes from index start on are about to be removed (or given new
+    # items), and added new ones put in their place. Copies the items of those nodes, and shifts the later shared runs
+    # by the change in length. start_node is the node at start, if owner has already found it for another snapshot.
+    # Returns it, if it was needed.
+    def _change(self, owner, start, count, added, start_node=None):
+        end = start + count
+        shift = added - count
+        runs = []
+        split = False
+        for run in self._runs:
+            if run.owner is not owner or run.start + run.count <= start:
+                runs.append(run)
+            elif run.start >= end:
+                run.start = run.start + shift
+                runs.append(run)
+            else:
+                # The run has nodes in the changed part, or a link into it is about to change
+                split = True
+                run_end = run.start + run.count
+                node = run.first
+                if run.start < start:
+                    runs.append(Run(owner, run.first, run.start, start - run.start))
+                    if start_node is None:
+                        start_node = owner._get_to_index(start)
+                    node = start_node
+                items = []
+                for n in range(min(run_end, end) - max(run.start, start)):
+                    items.append(node.item)
+                    node = node.next
+                if items:
+                    runs.append(Run.copied(items))
+                if run_end > end:
+                    runs.append(Run(owner, node, end + shift, run_end - end))
+        if split:
+            self._set_runs(runs)
+            if len(runs) > MAX_RUNS:
+                self._compact()
+        return start_node
+
+    # Returns True if the snapshot shares any of owner's nodes
+    def _shares(self, owner):
+        for run in self._runs:
+            if run.owner is owner:
+                return True
+        return False
+
+    # Called by owner when it hands its nodes from index start on over to new_owner, where their indices will be shift
+    # more (shift can be negative)
+    def _move_runs(self, owner, new_owner, start, shift):
+        for run in self._runs:
+            if run.owner is owner and run.start >= start:
+                run.owner = new_owner
+                run.start = run.start + shift
+
+    # Copies the shared runs shorter than a few times the average that MAX_RUNS runs would have, and merges copied runs
+    # next to each other, which leaves well under MAX_RUNS runs. Copied runs are merged into new lists, rather than
+    # extended, as iterators may be part way through them.
+    def _compact(self):
+        min_shared = 4 * self.length // MAX_RUNS + 1
+        runs = []
+        items = None # items of copied runs in a row, to be merged into one
+        for run in self._runs:
+            if run.items is None and run.count >= min_shared:
+                if items is not None:
+                    runs.append(Run.copied(items))
+                    items = None
+                runs.append(run)
+                continue
+            if items is None:
+                items = []
+            if run.items is not None:
+                items.extend(run.items)
+            else:
+                node = run.first
+                for n in range(run.count):
+                    items.append(node.item)
+                    node = node.next
+        if items is not None:
+            runs.append(Run.copied(items))
+        self._set_runs(runs)
+
+    def _set_runs(self, runs):
+        self._runs = runs
+        self._offsets = None
+        self._version = self._version + 1
@@ -0,0 +1,432 @@
+import sys
+from array import array
+
+from . import memory
+
+# Implementation of an unrolled linked list. It is doubly-linked, but rather than holding one item, each node (a
+# "block") holds a Python list of up to block_capacity items. Scanning, iterating and getting to an index then run
+# mostly over contiguous Python lists, with a lot less pointer chasing. Blocks are split when they overflow and merged
+# with a neighbor when they get too small. The public functions are the same as LinkedList's.
+#
+# For lists of numbers, a typecode (as for the array module, e.g. 'q' for 64-bit ints, 'd' for doubles) makes each
+# block an array instead: the values are stored unboxed, side by side, at 8 bytes each rather than a pointer plus an
+# object. Searching, counting and the aggregates (sum(), min(), max()) then run in C over whole blocks, and
+# get_array() returns the values as one array. Adding a value that doesn't fit the typecode raises TypeError or
+# OverflowError, and leaves the list as it was.
+
+class ListBlock(object):
+    __slots__ = ('items', 'next', 'prev')
+
+    def __init__(self, items=None):
+        self.items = [] if items is None else items
+        self.next = None
+        self.prev = None
+
+class UnrolledLinkedList(object):
+
+    DEFAULT_BLOCK_CAPACITY = 64
+    DEFAULT_TYPED_BLOCK_CAPACITY = 512 # typed blocks are cheap to shift, so they can be bigger
+
+    # Params
+    #   iterable: if given, the list is filled with its items
+    #   block_capacity: the most items a block holds (by default, DEFAULT_BLOCK_CAPACITY, or
+    #     DEFAULT_TYPED_BLOCK_CAPACITY if there's a typecode)
+    #   typecode: if given, an array module typecode, and the blocks are arrays of that type
+    def __init__(self, iterable=None, block_capacity=None, typecode=None):
+        if block_capacity is None:
+            block_capacity = UnrolledLinkedList.DEFAULT_BLOCK_CAPACITY if typecode is None \
+                else UnrolledLinkedList.DEFAULT_TYPED_BLOCK_CAPACITY
+        if block_capacity < 2:
+            raise ValueError("block capacity must be at least 2")
+        self.block_capacity = block_capacity
+        self.typecode = typecode
+        self._new_items() # raises ValueError if typecode is bad
+        self.head = None # first block
+        self.tail = None # last block
+        self.length = 0
+        if iterable is not None:
+            self._add_items_to_tail(iterable)
+
+    # Support for iteration using 'for'
+    def __iter__(self):
+        block = self.head
+        while block is not None:
+            yield from block.items
+            block = block.next
+
+    # Support for sys.getsizeof(). Counts the list object and its blocks, but not the items, unless the blocks are
+    # typed arrays, which hold the values themselves (see memory_usage()).
+    def __sizeof__(self):
+        size = object.__sizeof__(self) + sys.getsizeof(vars(self))
+        for block in self._blocks():
+            size = size + sys.getsizeof(block) + sys.getsizeof(block.items)
+        return size
+
+    # Support for pickling, and for copy.copy() and copy.deepcopy(). The blocks' items are stored as a flat Python list
+    # of Python lists (or arrays, which pickle as raw bytes), rather than by following block links recursively.
+    def __reduce__(self):
+        return (self.__class__, (None, self.block_capacity, self.typecode), [block.items for block in self._blocks()])
+
+    def __setstate__(self, block_items):
+        for items in block_items:
+            self._link_block_after(self.tail, ListBlock(self._new_items(items)))
+            self.length = self.length + len(items)
+
+    # --------------------------------------
+    # Functions for adding items
+    # --------------------------------------
+
+    # Adds item to head of linked list
+    def add_head(self, item):
+        if self.head is None or len(self.head.items) >= self.block_capacity:
+            self._link_block_after(None, ListBlock(self._new_items([item])))
+        else:
+            self.head.items.insert(0, item)
+        self.length = self.length + 1
+
+    # Adds item to tail of linked list
+    def add_tail(self, item):
+        if self.tail is None or len(self.tail.items) >= self.block_capacity:
+            self._link_block_after(self.tail, ListBlock(self._new_items([item])))
+        else:
+            self.tail.items.append(item)
+        self.length = self.length + 1
+
+    # Inserts item into list, before item at specified index. If index == length of list, place after last item.
+    def insert(self, item, index=0):
+        if index < 0 or index > self.length:
+            raise IndexError("linked list index out of range")
+        if index == 0:
+            self.add_head(item)
+        elif index == self.length:
+            self.add_tail(item)
+        else:
+            block, offset = self._get_to_index(index)
+            if len(block.items) >= self.block_capacity:
+                self._new_items([item]) # make sure item fits before changing anything
+                self._split_block(block)
+                if offset > len(block.items):
+                    offset = offset - len(block.items)
+                    block = block.next
+            block.items.insert(offset, item)
+            self.length = self.length + 1
+
+    # --------------------------------------
+    # Functions for removing items
+    # --------------------------------------
+
+    # Pops item from head of list, returns item
+    def pop_head(self):
+        if self.length == 0: return
+        return self._remove_from_block(self.head, 0)
+
+    # Pops item from tail of list, returns item
+    def pop_tail(self):
+        if self.length == 0: return
+        return self._remove_from_block(self.tail, len(self.tail.items) - 1)
+
+    # Removes item at specified index, returns item
+    def remove(self, index=0):
+        if index < 0 or (index > 0 and index >= self.length):
+            raise IndexError("linked list index {} out of range".format(index))
+        if self.length == 0: return
+        block, offset = self._get_to_index(index)
+        return self._remove_from_block(block, offset)
+
+    # --------------------------------------
+    # Functions for getting items or information
+    # --------------------------------------
+
+    # Returns current size of list
+    def size(self):
+        return self.length
+
+    def empty(self):
+        return self.length == 0
+
+    # Gets item at index
+    def get_item(self, index):
+        if index < 0 or index >= self.length:
+            raise IndexError("linked list index out of range")
+        block, offset = self._get_to_index(index)
+        return block.items[offset]
+
+    # Locates item in list, starting from start_index. Params and return value are the same as for LinkedList.
+    # Going forwards, each block is searched with list.index(), so the scan runs at C speed.
+    def find_item(self, item, start_index=None, backwards=False):
+        if start_index is None or start_index == -1:
+            start_index = self.length-1 if backwards else 0
+        if start_index < 0 or start_index >= self.length:
+            raise IndexError("linked list index out of range")
+        block, offset = self._get_to_index(start_index)
+        block_start = start_index - offset # list index of the block's first item
+        if backwards:
+            while block is not None:
+                items = block.items
+                for n in range(offset, -1, -1):
+                    if items[n] == item:
+                        return block_start + n
+                block = block.prev
+                if block is not None:
+                    offset = len(block.items) - 1
+                    block_start = block_start - len(block.items)
+        else:
+            while block is not None:
+                try:
+                    return block_start + block.items.index(item, offset)
+                except ValueError:
+                    pass
+                block_start = block_start + len(block.items)
+                block = block.next
+                offset = 0
+        raise ValueError("Item not found in linked list")
+
+    # Returns number of items equal to item
+    def count(self, item):
+        total = 0
+        block = self.head
+        while block is not None:
+            total = total + block.items.count(item)
+            block = block.next
+        return total
+
+    # Returns the sum of the items, adding them up a block at a time
+    def sum(self):
+        total = 0
+        block = self.head
+        while block is not None:
+            total = sum(block.items, total)
+            block = block.next
+        return total
+
+    # Returns the smallest item. Raises ValueError if the list is empty.
+    def min(self):
+        return min(min(block.items) for block in self._blocks())
+
+    # Returns the largest item. Raises ValueError if the list is empty.
+    def max(self):
+        return max(max(block.items) for block in self._blocks())
+
+    # Returns a Python list of items in list
+    def get_items(self):
+        ret_list = []
+        block = self.head
+        while block is not None:
+            ret_list.extend(block.items)
+            block = block.next
+        return ret_list
+
+    # Returns the items in an array of the list's typecode. Each block is copied over whole. Raises ValueError if the
+    # list has no typecode.
+    def get_array(self):
+        if self.typecode is None:
+            raise ValueError("list has no typecode")
+        ret_array = array(self.typecode)
+        block = self.head
+        while block is not None:
+            ret_array.extend(block.items)
+            block = block.next
+        return ret_array
+
+    # Returns the number of bytes of memory the list takes: what sys.getsizeof() gives, and, if deep is True, the items
+    # too. Each distinct item is counted once. Typed blocks already hold their values, so deep makes no difference.
+    def memory_usage(self, deep=False):
+        size = sys.getsizeof(self)
+        if deep and self.typecode is None:
+            size = size + memory.items_size(self)
+        return size
+
+    # --------------------------------------
+    # Functions for broadly changing list
+    # --------------------------------------
+
+    # Empties the list
+    def clear(self):
+        self.head = None
+        self.tail = None
+        self.length = 0
+
+    # Makes a copy of this list, with the blocks packed full
+    def copy(self):
+        new_list = UnrolledLinkedList(block_capacity=self.block_capacity, typecode=self.typecode)
+        new_list._add_packed(self.get_items())
+        return new_list
+
+    # Reverses the list in place
+    def reverse_list(self):
+        block = self.head
+        while block is not None:
+            block.items.reverse()
+            block.next, block.prev = block.prev, block.next
+            block = block.prev
+        self.head, self.tail = self.tail, self.head
+
+    # Sorts the list. Params are the same as for LinkedList.sort(). The sorted items are packed into full blocks.
+    def sort(self, reverse=False, val_func=None, key=None):
+        if key is None: key = val_func
+        if self.length < 2: return
+        sorted_items = sorted(self.get_items(), key=key, reverse=reverse)
+        self.clear()
+        self._add_packed(sorted_items)
+
+    # Given another unrolled list, join its contents to the tail of this one. The other list is cleared. The blocks
+    # are relinked, not copied, unless the two blocks at the seam are small enough to merge. If the other list has a
+    # different typecode, its items are copied over instead, and have to fit this list's typecode.
+    def join(self, other_list):
+        if other_list.length == 0:
+            return
+        if other_list.typecode != self.typecode:
+            items = self._new_items(other_list.get_items())
+            self._add_items_to_tail(items)
+            other_list.clear()
+            return
+        seam_block = self.tail
+        if seam_block is None:
+            self.head = other_list.head
+        else:
+            seam_block.next = other_list.head
+            other_list.head.prev = seam_block
+        self.tail = other_list.tail
+        self.length = self.length + other_list.length
+        other_list.clear()
+        if seam_block is not None:
+            self._merge_if_small(seam_block)
+
+    # Splits off a separate linked list, beginning with the item at index. If index is the same as the size of
+    # the list, then return an empty linked list. If index falls at a block boundary, no items are copied; otherwise,
+    # only the block holding index is divided.
+    def split(self, index):
+        size = self.length
+        if index < 0 or index > size:
+            raise IndexError("linked list index out of range")
+        new_list = UnrolledLinkedList(block_capacity=self.block_capacity, typecode=self.typecode)
+        if index == size:
+            return new_list
+        block, offset = self._get_to_index(index)
+        if offset > 0:
+            self._split_block(block, offset)
+            block = block.next
+        new_tail = block.prev
+        if new_tail is not None:
+            new_tail.next = None
+        else:
+            self.head = None
+        block.prev = None
+        new_list.head = block
+        new_list.tail = self.tail
+        new_list.length = size - index
+        self.tail = new_tail
+        self.length = index
+        return new_list
+
+    # --------------------------------------
+    # Private helper functions, for internal use
+    # --------------------------------------
+
+    # Returns a new, empty block item store: a Python list, or an array if the list has a typecode. If items is given,
+    # the store starts with those.
+    def _new_items(self, items=()):
+        if self.typecode is None:
+            return list(items)
+        return array(self.typecode, items)
+
+    # Yields the blocks, from head to tail
+    def _blocks(self):
+        block = self.head
+        while block is not None:
+            yield block
+            block = block.next
+
+    # Appends items to the tail, packing them into full blocks
+    def _add_items_to_tail(self, iterable):
+        capacity = self.block_capacity
+        block = self.tail
+        for item in iterable:
+            if block is None or len(block.items) >= capacity:
+                # The block gets its first item before it's linked in, in case the item doesn't fit the typecode
+                new_block = ListBlock(self._new_items([item]))
+                self._link_block_after(block, new_block)
+                block = new_block
+            else:
+                block.items.append(item)
+            self.length = self.length + 1
+
+    # Appends the items of a Python list to the tail, a whole block at a time. The list must be empty.
+    def _add_packed(self, items):
+        capacity = self.block_capacity
+        for start in range(0, len(items), capacity):
+            self._link_block_after(self.tail, ListBlock(self._new_items(items[start:start + capacity])))
+        self.length = len(items)
+
+    # Links new_block in after block. If block is None, new_block becomes the head.
+    def _link_block_after(self, block, new_block):
+        if block is None:
+            new_block.next = self.head
+            self.head = new_block
+        else:
+            new_block.next = block.next
+            block.next = new_block
+        new_block.prev = block
+        if new_block.next is None:
+            self.tail = new_block
+        else:
+            new_block.next.prev = new_block
+
+    def _unlink_block(self, block):
+        if block.prev is None:
+            self.head = block.next
+        else:
+            block.prev.next = block.next
+        if block.next is None:
+            self.tail = block.prev
+        else:
+            block.next.prev = block.prev
+        block.next = None
+        block.prev = None
+
+    # Moves the items of block from offset on into a new block that follows it. By default, splits it in half.
+    def _split_block(self, block, offset=None):
+        if offset is None:
+            offset = len(block.items) // 2
+        new_block = ListBlock(block.items[offset:])
+        del block.items[offset:]
+        self._link_block_after(block, new_block)
+
+    # If block and its successor (or predecessor) fit together into one block, merges them
+    def _merge_if_small(self, block):
+        limit = self.block_capacity // 2
+        if len(block.items) > limit // 2:
+            return
+        if block.next is not None and len(block.items) + len(block.next.items) <= limit:
+            block.items.extend(block.next.items)
+            self._unlink_block(block.next)
+        elif block.prev is not None and len(block.items) + len(block.prev.items) <= limit:
+            block.prev.items.extend(block.items)
+            self._unlink_block(block)
+
+    # Removes the item at offset within block, returns it. Empty blocks are unlinked, small ones merged.
+    def _remove_from_block(self, block, offset):
+        item = block.items.pop(offset)
+        self.length = self.length - 1
+        if len(block.items) == 0:
+            self._unlink_block(block)
+        elif block is not self.head and block is not self.tail:
+            # Blocks at the ends are left alone, so that pushes and pops there stay O(1)
+            self._merge_if_small(block)
+        return item
+
+    # Returns block holding target_idx, and the offset of the item within the block. Walks blocks from whichever end
+    # of the list is closer.
+    def _get_to_index(self, target_idx):
+        if target_idx < self.length // 2:
+            block = self.head
+            while target_idx >= len(block.items):
+                target_idx = target_idx - len(block.items)
+                block = block.next
+            return block, target_idx
+        from_end = self.length - 1 - target_idx
+        block = self.tail
+        while from_end >= len(block.items):
+            from_end = from_end - len(block.items)
+            block = block.prev
+        return block, len(block.items) - 1 - from_end
@@ -1,12 +1,38 @@
+import asyncio
+import copy
+import io
+import json
+import operator
+import os
+import pickle
 import random
+import tempfile
+import threading
 import time
+import tracemalloc
 import argparse
+import sys
 import tests as tl
+from tests import benchmark
+from linked_list_pkg import LinkedList, LRUCache, LFUCache
+from linked_list_pkg.snapshot import MAX_RUNS
 
 parser = argparse.ArgumentParser(description='Tester program for LinkedListClass.')
 parser.add_argument("--verbosity", help="Verbosity level (0=verbose, 1=semi-verbose, 2=silent)", type=int, default=1)
 parser.add_argument("--seed", help="A seed for random number generation (to reproduce same tests)", type=int, default=-1)
 parser.add_argument("--test", help="Number of test to run (don't specify to run all)", type=int, default=-1)
+parser.add_argument("--bench", help="Run the benchmark suite instead of the tests", action="store_true")
+parser.add_argument("--bench-sizes", help="Comma-separated list sizes to benchmark (default 1e2 to 1e7)", type=str)
+parser.add_argument("--bench-targets", help="Comma-separated targets to benchmark (default all)", type=str)
+parser.add_argument("--bench-workloads", help="Comma-separated workloads to benchmark (default all)", type=str)
+parser.add_argument("--bench-ops", help="Number of operations timed per workload", type=int,
+                    default=benchmark.DEFAULT_OPS)
+parser.add_argument("--bench-repeat", help="Times each workload is run (the fastest counts)", type=int,
+                    default=benchmark.DEFAULT_REPEAT)
+parser.add_argument("--bench-output", help="File to save benchmark results to, as JSON", type=str)
+parser.add_argument("--bench-baseline", help="Benchmark results file to check for regressions against", type=str)
+parser.add_argument("--bench-tolerance", help="How much slower than the baseline counts as a regression (0.25=25%%)",
+                    type=float, default=benchmark.DEFAULT_TOLERANCE)
 args = parser.parse_args()
 
 verbosity = args.verbosity
@@ -19,9 +45,20 @@ random.seed(random_seed)
 
 failed_tests = []
 default_tests = ["BASIC TEST A", "BASIC TEST B", "BASIC TEST C", "FIND TEST", "RANDOM TEST", "RANDOM SEARCH",
-                 "SORTING", "JOINING", "SPLITTING", "ITERATOR", "CACHE", "GIANT LIST"]
+                 "SORTING", "JOINING", "SPLITTING", "ITERATOR", "CACHE", "GIANT LIST", "INDEX TREE",
+                 "COMPACT STORAGE", "UNROLLED LIST", "BULK OPERATIONS",
+                 "CURSORS", "STABLE SORT", "HASH INDEX", "LAZY INDEX", "FINGER CACHE",
+                 "BATCH ACCESS", "SEQUENCE PROTOCOL",
+                 "CONCURRENT LIST", "ASYNC LIST", "PARALLEL SORT AND MAP",
+                 "TYPED UNROLLED LIST", "PICKLING",
+                 "MAPPED LIST", "BENCHMARK SUITE", "RUNTIME STATS",
+                 "MEMORY USAGE", "NODE POOL", "ITERATORS", "SNAPSHOTS",
+                 "BULK REMOVAL", "LRU CACHE"]
 tests_to_run = set()
-if args.test == -1:
+if args.bench:
+    # Benchmarks only, no tests
+    pass
+elif args.test == -1:
     for i in range(len(default_tests)):
         tests_to_run.add(i+1)
 else:
@@ -251,6 +288,1837 @@ if should_run_test(12):
         if tl.validity_failure: break
     handle_test_failure(12)
 
+# Thirteenth test: random operations on a list in tree index mode, mirrored with a Python list. Then finds, splits
+# and joins, some of them with lists in the other index mode.
+
+if should_run_test(13):
+    print("seed={}".format(random_seed))
+    tree_ll = tl.TestList([random.randrange(1000) for i in range(200)], index_mode='tree')
+    python_list = tree_ll.get_items()
+    for i in range(300):
+        random_num = random.randrange(1000)
+        rand_op = random.randrange(6)
+        if rand_op == 0:
+            tree_ll.add_head(random_num)
+            python_list.insert(0, random_num)
+        elif rand_op == 1:
+            tree_ll.add_tail(random_num)
+            python_list.append(random_num)
+        elif rand_op == 2 and len(python_list) > 0:
+            tree_ll.pop_head()
+            python_list.pop(0)
+        elif rand_op == 3 and len(python_list) > 0:
+            tree_ll.pop_tail()
+            python_list.pop()
+        elif rand_op == 4:
+            rand_index = random.randrange(len(python_list) + 1)
+            tree_ll.insert(random_num, rand_index)
+            python_list.insert(rand_index, random_num)
+        elif rand_op == 5 and len(python_list) > 0:
+            rand_index = random.randrange(len(python_list))
+            tree_ll.remove(rand_index)
+            python_list.pop(rand_index)
+        if tl.validity_failure: break
+    for i in range(20):
+        rand_index = random.randrange(len(python_list))
+        if tree_ll.get_item(rand_index) != python_list[rand_index]:
+            print("get_item mismatch at", rand_index)
+            tl.validity_failure = True
+        if tree_ll.find_item(python_list[rand_index]) != python_list.index(python_list[rand_index]):
+            print("find_item mismatch for", python_list[rand_index])
+            tl.validity_failure = True
+    split_index = len(python_list) // 3
+    tree_split_ll = tree_ll.split(split_index, expected_list=python_list[:split_index])
+    tree_ll.join(tree_split_ll, expected_list=python_list)
+    tree_ll.join(tl.TestList(["x", "y"]), expected_list=python_list + ["x", "y"])
+    tree_ll.split(0, expected_list=[])
+    tree_ll.join(tl.TestList(["z"], index_mode='tree'), expected_list=["z"])
+    tree_ll.sort(expected_list=["z"])
+    handle_test_failure(13)
+
+# Fourteenth test: random operations on a CompactLinkedList, mirrored with a Python list, then the whole-list
+# operations
+
+if should_run_test(14):
+    print("seed={}".format(random_seed))
+    compact_ll = tl.CompactLinkedList([random.randrange(1000) for i in range(50)])
+    python_list = compact_ll.get_items()
+    operations = ["add_head", "add_tail", "pop_head", "pop_tail", "insert", "remove", "get_item", "find_item"]
+    for i in range(500):
+        random_num = random.randrange(1000)
+        rand_op = random.randrange(len(operations))
+        rand_index = random.randrange(len(python_list) + 1)
+        if rand_op == 0:
+            compact_ll.add_head(random_num)
+            python_list.insert(0, random_num)
+        elif rand_op == 1:
+            compact_ll.add_tail(random_num)
+            python_list.append(random_num)
+        elif rand_op == 2:
+            if compact_ll.pop_head() != (python_list.pop(0) if python_list else None):
+                tl.validity_failure = True
+        elif rand_op == 3:
+            if compact_ll.pop_tail() != (python_list.pop() if python_list else None):
+                tl.validity_failure = True
+        elif rand_op == 4:
+            compact_ll.insert(random_num, rand_index)
+            python_list.insert(rand_index, random_num)
+        elif rand_op == 5 and rand_index < len(python_list):
+            if compact_ll.remove(rand_index) != python_list.pop(rand_index):
+                tl.validity_failure = True
+        elif rand_op == 6 and rand_index < len(python_list):
+            if compact_ll.get_item(rand_index) != python_list[rand_index]:
+                tl.validity_failure = True
+        elif rand_op == 7 and rand_index < len(python_list):
+            if compact_ll.find_item(python_list[rand_index]) != python_list.index(python_list[rand_index]):
+                tl.validity_failure = True
+        valid, error_str = tl.validate_compact(compact_ll)
+        if not valid or compact_ll.get_items() != python_list:
+            print("compact list failure after {}: {}".format(operations[rand_op], error_str))
+            tl.validity_failure = True
+        if tl.validity_failure: break
+    compact_ll.add_tail(-1)
+    python_list.append(-1)
+    compact_ll.reverse_list()
+    python_list.reverse()
+    compact_ll.sort()
+    python_list.sort()
+    split_index = len(python_list) // 3
+    compact_split_ll = compact_ll.split(split_index)
+    compact_split_ll2 = compact_split_ll.split(len(python_list) - split_index - 1)
+    compact_ll.join(compact_split_ll)
+    compact_split_ll2.join(compact_ll)
+    for ll, expected_list in [(compact_ll, []), (compact_split_ll, []),
+                              (compact_split_ll2, python_list[-1:] + python_list[:-1])]:
+        valid, error_str = tl.validate_compact(ll)
+        if not valid or ll.get_items() != expected_list:
+            print("compact list failure after split/join:", error_str)
+            tl.validity_failure = True
+    handle_test_failure(14)
+
+# Fifteenth test: random operations on an UnrolledLinkedList with small blocks, mirrored with a Python list, then
+# the whole-list operations
+
+if should_run_test(15):
+    print("seed={}".format(random_seed))
+    unrolled_ll = tl.UnrolledLinkedList([random.randrange(100) for i in range(50)], block_capacity=4)
+    python_list = unrolled_ll.get_items()
+    operations = ["add_head", "add_tail", "pop_head", "pop_tail", "insert", "remove", "get_item", "find_item"]
+    for i in range(500):
+        random_num = random.randrange(100)
+        rand_op = random.randrange(len(operations))
+        rand_index = random.randrange(len(python_list) + 1)
+        if rand_op == 0:
+            unrolled_ll.add_head(random_num)
+            python_list.insert(0, random_num)
+        elif rand_op == 1:
+            unrolled_ll.add_tail(random_num)
+            python_list.append(random_num)
+        elif rand_op == 2:
+            if unrolled_ll.pop_head() != (python_list.pop(0) if python_list else None):
+                tl.validity_failure = True
+        elif rand_op == 3:
+            if unrolled_ll.pop_tail() != (python_list.pop() if python_list else None):
+                tl.validity_failure = True
+        elif rand_op == 4:
+            unrolled_ll.insert(random_num, rand_index)
+            python_list.insert(rand_index, random_num)
+        elif rand_op == 5 and rand_index < len(python_list):
+            if unrolled_ll.remove(rand_index) != python_list.pop(rand_index):
+                tl.validity_failure = True
+        elif rand_op == 6 and rand_index < len(python_list):
+            if unrolled_ll.get_item(rand_index) != python_list[rand_index]:
+                tl.validity_failure = True
+        elif rand_op == 7 and rand_index < len(python_list):
+            # Search backwards from the end, and forwards from just before the item
+            item = python_list[rand_index]
+            last_index = len(python_list) - 1 - python_list[::-1].index(item)
+            if unrolled_ll.find_item(item, -1, True) != last_index:
+                tl.validity_failure = True
+            if unrolled_ll.find_item(item, max(0, rand_index - 3)) != python_list.index(item, max(0, rand_index - 3)):
+                tl.validity_failure = True
+        valid, error_str = tl.validate_unrolled(unrolled_ll)
+        if not valid or unrolled_ll.get_items() != python_list:
+            print("unrolled list failure after {}: {}".format(operations[rand_op], error_str))
+            tl.validity_failure = True
+        if tl.validity_failure: break
+    unrolled_ll.add_tail(-1)
+    python_list.append(-1)
+    unrolled_ll.reverse_list()
+    python_list.reverse()
+    unrolled_ll.sort(reverse=True)
+    python_list.sort(reverse=True)
+    split_index = len(python_list) // 3
+    unrolled_split_ll = unrolled_ll.split(split_index)
+    unrolled_split_ll2 = unrolled_split_ll.split(len(python_list) - split_index - 1)
+    unrolled_ll.join(unrolled_split_ll)
+    unrolled_split_ll2.join(unrolled_ll)
+    for ll, expected_list in [(unrolled_ll, []), (unrolled_split_ll, []),
+                              (unrolled_split_ll2, python_list[-1:] + python_list[:-1])]:
+        valid, error_str = tl.validate_unrolled(ll)
+        if not valid or ll.get_items() != expected_list:
+            print("unrolled list failure after split/join:", error_str)
+            tl.validity_failure = True
+    handle_test_failure(15)
+
+# Sixteenth test: bulk additions, in both index modes. Big enough batches that the cache gets rebuilt along the way.
+
+if should_run_test(16):
+    for mode in LinkedList.INDEX_MODES:
+        bulk_ll = tl.TestList(index_mode=mode)
+        bulk_ll.extend([], expected_list=[])
+        bulk_ll.extend(range(5), expected_list=list(range(5)))
+        bulk_ll.extend_head("ab", expected_list=["a", "b"] + list(range(5)))
+        python_list = bulk_ll.get_items()
+        for i in range(30):
+            rand_index = random.randrange(len(python_list) + 1)
+            batch = [random.randrange(1000) for n in range(random.randrange(100))]
+            python_list[rand_index:rand_index] = batch
+            bulk_ll.insert_many(rand_index, batch, expected_list=python_list)
+            bulk_ll.get_item(random.randrange(len(python_list)))
+            if tl.validity_failure: break
+        bulk_copy_ll = tl.TestList.from_iterable(bulk_ll, index_mode=mode)
+        bulk_copy_ll.extend(bulk_ll.copy(), expected_list=python_list + python_list)
+    handle_test_failure(16)
+
+# Seventeenth test: editing through cursors, in both index modes, mirrored with a Python list. Some edits are made by
+# index in between, which the cursors must survive.
+
+if should_run_test(17):
+    print("seed={}".format(random_seed))
+    for mode in LinkedList.INDEX_MODES:
+        cursor_ll = tl.TestList([random.randrange(1000) for i in range(40)], index_mode=mode)
+        python_list = cursor_ll.get_items()
+        cursor = cursor_ll.cursor(random.randrange(len(python_list)))
+        cursor_pos = cursor.index()
+        for i in range(300):
+            random_num = random.randrange(1000)
+            rand_op = random.randrange(7)
+            if rand_op == 0:
+                cursor = cursor.insert_before(random_num)
+                python_list.insert(cursor_pos, random_num)
+            elif rand_op == 1:
+                cursor.insert_after(random_num)
+                python_list.insert(cursor_pos + 1, random_num)
+            elif rand_op == 2 and len(python_list) > 1:
+                if cursor.remove() != python_list.pop(cursor_pos):
+                    tl.validity_failure = True
+                if not cursor.valid():
+                    cursor = cursor_ll.cursor(len(python_list) - 1)
+                    cursor_pos = len(python_list) - 1
+            elif rand_op == 3:
+                for n in range(random.randrange(5)):
+                    if cursor_pos < len(python_list) - 1:
+                        cursor.move_next()
+                        cursor_pos = cursor_pos + 1
+            elif rand_op == 4:
+                for n in range(random.randrange(5)):
+                    if cursor_pos > 0:
+                        cursor.move_prev()
+                        cursor_pos = cursor_pos - 1
+            elif rand_op == 5:
+                # Change elsewhere in the list, by index
+                rand_index = random.randrange(len(python_list) + 1)
+                cursor_ll.insert(random_num, rand_index)
+                python_list.insert(rand_index, random_num)
+                if rand_index <= cursor_pos:
+                    cursor_pos = cursor_pos + 1
+            elif rand_op == 6:
+                cursor = cursor_ll.find_cursor(python_list[cursor_pos], cursor_pos)
+            valid, error_str = cursor_ll.validate()
+            if not valid or cursor.index() != cursor_pos or cursor.item != python_list[cursor_pos]:
+                print("cursor failure, index mode {}: {}".format(mode, error_str))
+                tl.validity_failure = True
+            if tl.validity_failure: break
+        if not cursor_ll.compare(python_list):
+            tl.validity_failure = True
+        if [c.item for c in cursor_ll.cursors()] != python_list:
+            tl.validity_failure = True
+
+        # Two cursors far apart, edited in turn with changes by index in between, so that neither knows its index
+        # when it's used. The edits relink without walking to an index, and the list stays right. Without fingers,
+        # there's none near the cursors, so in cache mode each edit marks the cache stale.
+        for finger_count in [LinkedList.DEFAULT_FINGER_COUNT, 0]:
+            python_list = list(range(200))
+            cursor_ll = tl.TestList(python_list, index_mode=mode, finger_count=finger_count)
+            cursors = [cursor_ll.cursor(50), cursor_ll.cursor(150)]
+            items = [50, 150] # item at each cursor, to find its position in python_list
+            for i in range(300):
+                n = i % 2
+                rand_op = random.randrange(4)
+                cursor_pos = python_list.index(items[n])
+                if rand_op == 0:
+                    cursors[n].insert_before(1000 + i)
+                    python_list.insert(cursor_pos, 1000 + i)
+                elif rand_op == 1:
+                    cursors[n].insert_after(1000 + i)
+                    python_list.insert(cursor_pos + 1, 1000 + i)
+                elif rand_op == 2 and cursor_pos < len(python_list) - 1 and python_list[cursor_pos + 1] not in items:
+                    if cursors[n].remove() != python_list.pop(cursor_pos):
+                        tl.validity_failure = True
+                    items[n] = python_list[cursor_pos]
+                else:
+                    rand_index = random.randrange(len(python_list) + 1)
+                    cursor_ll.insert(2000 + i, rand_index)
+                    python_list.insert(rand_index, 2000 + i)
+                    if cursor_ll.get_item(rand_index // 2) != python_list[rand_index // 2]:
+                        tl.validity_failure = True
+                valid, error_str = cursor_ll.validate()
+                if not valid or cursor_ll.get_items() != python_list or cursors[n].item != items[n]:
+                    print("two cursor failure, index mode {}: {}".format(mode, error_str))
+                    tl.validity_failure = True
+                if tl.validity_failure: break
+            if [cursor.index() for cursor in cursors] != [python_list.index(item) for item in items]:
+                tl.validity_failure = True
+    handle_test_failure(17)
+
+# Eighteenth test: sorting by key must be stable, forwards and in reverse, including on lists that are already
+# sorted or reverse-sorted. Cursors must stay on their items.
+
+if should_run_test(18):
+    records = [(random.randrange(10), n) for n in range(500)]
+    inputs = [records, sorted(records), sorted(records, reverse=True), sorted(records, key=lambda r: r[0])]
+    for mode in LinkedList.INDEX_MODES:
+        for input_list in inputs:
+            for reverse in (False, True):
+                record_ll = tl.TestList(input_list, index_mode=mode)
+                cursor = record_ll.cursor(0)
+                record_ll.sort(reverse=reverse, key=lambda r: r[0],
+                               expected_list=sorted(input_list, key=lambda r: r[0], reverse=reverse))
+                if cursor.item != input_list[0] or record_ll.get_item(cursor.index()) != input_list[0]:
+                    print("cursor lost its item in sort")
+                    tl.validity_failure = True
+        record_ll.sort(val_func=lambda r: r[1], expected_list=sorted(records, key=lambda r: r[1]))
+    for ll_class in (tl.CompactLinkedList, tl.UnrolledLinkedList):
+        record_ll = ll_class(records)
+        record_ll.sort(reverse=True, key=lambda r: r[0])
+        if record_ll.get_items() != sorted(records, key=lambda r: r[0], reverse=True):
+            print("bad sort for", ll_class.__name__)
+            tl.validity_failure = True
+    handle_test_failure(18)
+
+# Nineteenth test: a hash-indexed list, in both index modes. Random changes, with finds, counts and membership tests
+# checked against a Python list. Unhashable items are added partway through, so the scan fallback gets used too.
+
+if should_run_test(19):
+    print("seed={}".format(random_seed))
+    for mode in LinkedList.INDEX_MODES:
+        hash_ll = tl.TestList([random.randrange(50) for i in range(100)], index_mode=mode, hash_index=True)
+        python_list = hash_ll.get_items()
+        for i in range(400):
+            random_num = random.randrange(60)
+            rand_op = random.randrange(6)
+            rand_index = random.randrange(len(python_list) + 1)
+            if rand_op == 0:
+                hash_ll.insert(random_num, rand_index)
+                python_list.insert(rand_index, random_num)
+            elif rand_op == 1 and rand_index < len(python_list):
+                hash_ll.remove(rand_index)
+                python_list.pop(rand_index)
+            elif rand_op == 2:
+                if random_num in python_list:
+                    hash_ll.remove_value(random_num)
+                    python_list.remove(random_num)
+            elif rand_op == 3 and rand_index < len(python_list):
+                hash_ll.cursor(rand_index).item = random_num
+                python_list[rand_index] = random_num
+            elif rand_op == 4:
+                start_index = random.randrange(len(python_list))
+                backwards = random.randrange(2) == 1
+                try:
+                    found_index = hash_ll.find_item(random_num, start_index, backwards)
+                except ValueError:
+                    found_index = -1
+                expected_index = -1
+                search_range = range(start_index, -1, -1) if backwards else range(start_index, len(python_list))
+                for n in search_range:
+                    if python_list[n] == random_num:
+                        expected_index = n
+                        break
+                if found_index != expected_index:
+                    print("find_item mismatch for {}: {} vs {}".format(random_num, found_index, expected_index))
+                    tl.validity_failure = True
+            elif rand_op == 5:
+                if (random_num in hash_ll) != (random_num in python_list):
+                    tl.validity_failure = True
+                if hash_ll.count(random_num) != python_list.count(random_num):
+                    tl.validity_failure = True
+            if i == 200:
+                hash_ll.add_tail([random_num])
+                python_list.append([random_num])
+            if tl.validity_failure: break
+        if not hash_ll.compare(python_list):
+            tl.validity_failure = True
+        split_index = len(python_list) // 4
+        hash_split_ll = LinkedList.split(hash_ll, split_index)
+        hash_ll.join(hash_split_ll)
+        hash_ll.join(tl.TestList([1000, 1001], hash_index=True))
+        hash_ll.join(tl.TestList([1002], index_mode=mode), expected_list=python_list + [1000, 1001, 1002])
+        if hash_ll.find_item(1001) != len(python_list) + 1 or hash_ll.count(python_list[0]) == 0:
+            tl.validity_failure = True
+
+        # Items that are in the list once are removed without working out their index: in cache mode, with no fingers
+        # close by, there's a walk to it at most for the first few after the cache is built, then none
+        python_list = list(range(1000))
+        random.shuffle(python_list)
+        hash_ll = tl.TestList(python_list, index_mode=mode, hash_index=True, finger_count=0)
+        for i in range(300):
+            item = random.choice(python_list)
+            python_list.remove(item)
+            hash_ll.remove_value(item, expected_list=python_list)
+            if i % 50 == 0 and hash_ll.get_item(i) != python_list[i]:
+                tl.validity_failure = True
+            if hash_ll._edit_walks > hash_ll._cache_size():
+                print("too many walks to find indices for remove_value")
+                tl.validity_failure = True
+            if tl.validity_failure: break
+    handle_test_failure(19)
+
+# Twentieth test: a pipeline of joins, splits, reverses and sorts, with positional operations in between, in both
+# index modes. The cache is maintained lazily through all this, so validate every list after every step.
+
+if should_run_test(20):
+    print("seed={}".format(random_seed))
+    for mode in LinkedList.INDEX_MODES:
+        lists = [tl.TestList([random.randrange(1000) for n in range(random.randrange(300))], index_mode=mode)
+                 for i in range(4)]
+        python_lists = [ll.get_items() for ll in lists]
+        for i in range(200):
+            a, b = random.randrange(4), random.randrange(4)
+            rand_op = random.randrange(7)
+            ll, python_list = lists[a], python_lists[a]
+            if rand_op == 0 and a != b:
+                # Joining mustn't walk the list: the cache entries can only come from the two lists' caches
+                cached_before = set(cache_entry.node for cache_entry in ll.cached_nodes + lists[b].cached_nodes)
+                LinkedList.join(ll, lists[b])
+                python_list.extend(python_lists[b])
+                python_lists[b] = []
+                if not set(cache_entry.node for cache_entry in ll.cached_nodes) <= cached_before:
+                    print("join rebuilt the cache")
+                    tl.validity_failure = True
+            elif rand_op == 1 and a != b and lists[b].size() == 0:
+                split_index = random.randrange(len(python_list) + 1)
+                lists[b] = LinkedList.split(ll, split_index)
+                python_lists[b] = python_list[split_index:]
+                del python_list[split_index:]
+            elif rand_op == 2:
+                ll.reverse_list()
+                python_list.reverse()
+            elif rand_op == 3 and random.randrange(4) == 0:
+                ll.sort()
+                python_list.sort()
+            elif rand_op == 4:
+                rand_index = random.randrange(len(python_list) + 1)
+                ll.insert(i, rand_index)
+                python_list.insert(rand_index, i)
+            elif rand_op == 5 and len(python_list) > 0:
+                rand_index = random.randrange(len(python_list))
+                ll.remove(rand_index)
+                python_list.pop(rand_index)
+            elif rand_op == 6 and len(python_list) > 0:
+                rand_index = random.randrange(len(python_list))
+                if ll.get_item(rand_index) != python_list[rand_index]:
+                    tl.validity_failure = True
+            for ll, python_list in zip(lists, python_lists):
+                # Split-off lists are plain LinkedLists, so use TestList's checks directly
+                valid, error_str = tl.TestList.validate(ll)
+                if not valid or not tl.TestList.compare(ll, python_list):
+                    print("lazy index failure, index mode {}: {}".format(mode, error_str))
+                    tl.validity_failure = True
+            if tl.validity_failure: break
+    handle_test_failure(20)
+
+if should_run_test(21):
+    print("seed={}".format(random_seed))
+    for policy in LinkedList.CACHE_POLICIES:
+        ll = tl.TestList([random.randrange(1000) for n in range(random.randrange(500, 1500))], cache_policy=policy,
+                         finger_count=4)
+        python_list = ll.get_items()
+        position = 0
+        for i in range(300):
+            rand_op = random.randrange(8)
+            if rand_op <= 2 and len(python_list) > 0:
+                # A run of sequential reads, from around the last position
+                position = min(max(position + random.randrange(-20, 21), 0), len(python_list) - 1)
+                step = random.choice((-1, 1))
+                for n in range(random.randrange(1, 50)):
+                    if position < 0 or position >= len(python_list): break
+                    if ll.get_item(position) != python_list[position]:
+                        tl.validity_failure = True
+                    if ll.finger_count > 0 and ll._fingers[-1].idx != position:
+                        print("finger not moved to last index reached")
+                        tl.validity_failure = True
+                    position = position + step
+                position = min(max(position, 0), len(python_list) - 1)
+            elif rand_op == 3:
+                rand_index = min(max(position + random.randrange(-5, 6), 0), len(python_list))
+                ll.insert(i, rand_index)
+                python_list.insert(rand_index, i)
+            elif rand_op == 4 and len(python_list) > 0:
+                rand_index = min(max(position + random.randrange(-5, 6), 0), len(python_list) - 1)
+                ll.remove(rand_index)
+                python_list.pop(rand_index)
+            elif rand_op == 5:
+                new_items = [random.randrange(1000) for n in range(random.randrange(1, 20))]
+                rand_index = random.randrange(len(python_list) + 1)
+                ll.insert_many(rand_index, new_items)
+                python_list[rand_index:rand_index] = new_items
+            elif rand_op == 6:
+                if random.randrange(2) == 0:
+                    ll.reverse_list()
+                    python_list.reverse()
+                elif len(python_list) > 0:
+                    ll.pop_head()
+                    python_list.pop(0)
+            elif rand_op == 7:
+                split_index = random.randrange(len(python_list) + 1)
+                back_list = LinkedList.split(ll, split_index)
+                if random.randrange(2) == 0:
+                    valid, error_str = tl.TestList.validate(back_list)
+                    if not valid or not tl.TestList.compare(back_list, python_list[split_index:]):
+                        print("finger cache failure after split, policy {}: {}".format(policy, error_str))
+                        tl.validity_failure = True
+                LinkedList.join(ll, back_list)
+            valid, error_str = ll.validate()
+            if not valid or not ll.compare(python_list):
+                print("finger cache failure, policy {}: {}".format(policy, error_str))
+                tl.validity_failure = True
+            if tl.validity_failure: break
+        if policy == 'finger' and len(ll.cached_nodes) > 0:
+            print("finger policy made cache entries")
+            tl.validity_failure = True
+        if policy == 'stride' and len(ll._fingers) > 0:
+            print("stride policy made fingers")
+            tl.validity_failure = True
+    handle_test_failure(21)
+
+if should_run_test(22):
+    print("seed={}".format(random_seed))
+    for mode, policy in (('cache', 'mixed'), ('cache', 'stride'), ('cache', 'finger'), ('tree', 'mixed')):
+        python_list = [random.randrange(1000) for n in range(random.randrange(1, 2000))]
+        ll = tl.TestList(python_list, index_mode=mode, cache_policy=policy)
+        python_list = list(python_list)
+        for i in range(60):
+            if len(python_list) == 0:
+                ll.extend(range(100), expected_list=list(range(100)))
+                python_list = list(range(100))
+            # Big batches, small batches, and duplicate indices
+            k = random.choice((1, 5, 50, len(python_list) // 2 + 1))
+            indices = [random.randrange(len(python_list)) for n in range(k)]
+            rand_op = random.randrange(3)
+            if rand_op == 0:
+                if ll.get_items_at(indices) != [python_list[idx] for idx in indices]:
+                    print("get_items_at failure, mode {}/{}".format(mode, policy))
+                    tl.validity_failure = True
+            elif rand_op == 1:
+                new_items = [random.randrange(1000) for idx in indices]
+                for idx, item in zip(indices, new_items):
+                    python_list[idx] = item
+                ll.set_items_at(indices, new_items, expected_list=python_list)
+            else:
+                expected_items = [python_list[idx] for idx in indices]
+                for idx in sorted(set(indices), reverse=True):
+                    python_list.pop(idx)
+                if ll.remove_at(indices, expected_list=python_list) != expected_items:
+                    print("remove_at failure, mode {}/{}".format(mode, policy))
+                    tl.validity_failure = True
+            # Get to a few indices one at a time, to check on the cache after the batch
+            for n in range(3):
+                if len(python_list) > 0:
+                    idx = random.randrange(len(python_list))
+                    ll.get_item(idx, expected_list=python_list)
+            if tl.validity_failure: break
+        try:
+            ll.get_items_at([0, ll.size()])
+            print("out-of-range index not caught")
+            tl.validity_failure = True
+        except IndexError:
+            pass
+    handle_test_failure(22)
+
+if should_run_test(23):
+    print("seed={}".format(random_seed))
+
+    def _rand_slice(size):
+        # Random slice, with negative and out-of-range bounds, and steps other than 1, now and then
+        def _bound():
+            return random.choice((None, random.randrange(-size - 3, size + 4)))
+        step = random.choice((None, 1, 1, 2, 3, -1, -2, 7))
+        return slice(_bound(), _bound(), step)
+
+    for mode in LinkedList.INDEX_MODES:
+        python_list = [random.randrange(100) for n in range(random.randrange(300))]
+        ll = tl.TestList(python_list, index_mode=mode, hash_index=(mode == 'cache'))
+        python_list = list(python_list)
+        for i in range(300):
+            rand_op = random.randrange(6)
+            size = len(python_list)
+            if rand_op == 0 and size > 0:
+                idx = random.randrange(-size, size)
+                if ll[idx] != python_list[idx]:
+                    tl.validity_failure = True
+            elif rand_op == 1:
+                index_slice = _rand_slice(size)
+                if ll[index_slice].get_items() != python_list[index_slice]:
+                    print("bad slice read:", index_slice)
+                    tl.validity_failure = True
+            elif rand_op == 2 and size > 0:
+                idx = random.randrange(-size, size)
+                ll[idx] = i
+                python_list[idx] = i
+            elif rand_op == 3:
+                index_slice = _rand_slice(size)
+                if index_slice.step in (None, 1):
+                    new_items = [random.randrange(100) for n in range(random.randrange(10))]
+                else:
+                    new_items = [random.randrange(100) for n in range(len(python_list[index_slice]))]
+                ll[index_slice] = new_items
+                python_list[index_slice] = new_items
+            elif rand_op == 4:
+                index_slice = _rand_slice(size)
+                del ll[index_slice]
+                del python_list[index_slice]
+            elif rand_op == 5 and size > 0:
+                idx = random.randrange(-size, size)
+                del ll[idx]
+                del python_list[idx]
+            # Read back through the index, which must have been fixed up
+            if len(python_list) > 0:
+                idx = random.randrange(len(python_list))
+                if ll.get_item(idx) != python_list[idx] or len(ll) != len(python_list):
+                    tl.validity_failure = True
+            valid, error_str = ll.validate()
+            if not valid or not ll.compare(python_list):
+                print("sequence protocol failure, index mode {}: {}".format(mode, error_str))
+                tl.validity_failure = True
+            if tl.validity_failure: break
+        for bad_op in (lambda: ll[len(python_list)], lambda: ll[-len(python_list) - 1]):
+            try:
+                bad_op()
+                print("out-of-range index not caught")
+                tl.validity_failure = True
+            except IndexError:
+                pass
+        try:
+            ll[::2] = [1] * (len(python_list[::2]) + 1)
+            print("bad extended slice assignment not caught")
+            tl.validity_failure = True
+        except ValueError:
+            pass
+    handle_test_failure(23)
+
+if should_run_test(24):
+    print("seed={}".format(random_seed))
+    # Single thread, against a Python list
+    concurrent_ll = tl.ConcurrentLinkedList(range(5), capacity=20)
+    python_list = list(range(5))
+    for i in range(500):
+        rand_op = random.randrange(5)
+        if rand_op == 0:
+            if concurrent_ll.add_tail(i, timeout=0) != (len(python_list) < 20):
+                tl.validity_failure = True
+            if len(python_list) < 20: python_list.append(i)
+        elif rand_op == 1:
+            if concurrent_ll.add_head(i, timeout=0) != (len(python_list) < 20):
+                tl.validity_failure = True
+            if len(python_list) < 20: python_list.insert(0, i)
+        elif rand_op == 2:
+            if concurrent_ll.pop_head() != (python_list.pop(0) if python_list else None):
+                tl.validity_failure = True
+        elif rand_op == 3:
+            if concurrent_ll.pop_tail() != (python_list.pop() if python_list else None):
+                tl.validity_failure = True
+        elif rand_op == 4 and random.randrange(4) == 0:
+            max_items = random.randrange(10)
+            if concurrent_ll.drain(max_items) != python_list[:max_items]:
+                tl.validity_failure = True
+            del python_list[:max_items]
+        valid, error_str = tl.validate_concurrent(concurrent_ll)
+        if not valid or concurrent_ll.get_items() != python_list:
+            print("concurrent list failure: {}".format(error_str))
+            tl.validity_failure = True
+        if tl.validity_failure: break
+
+    # Producers and consumers at both ends, with a small capacity so that producers have to wait
+    for capacity in (None, 8):
+        concurrent_ll = tl.ConcurrentLinkedList(capacity=capacity)
+        num_producers, num_consumers, items_per_producer = 4, 4, 2000
+        consumed = [[] for n in range(num_consumers)]
+        over_capacity = []
+
+        def _produce(producer_n):
+            for n in range(items_per_producer):
+                item = (producer_n, n)
+                if n % 5 == 0:
+                    concurrent_ll.add_head(item)
+                else:
+                    concurrent_ll.add_tail(item)
+
+        def _consume(consumer_n):
+            while True:
+                if capacity is not None:
+                    # size() can be off by one while others add and pop, but a snapshot of the items can't
+                    snapshot_size = len(concurrent_ll.get_items())
+                    if snapshot_size > capacity:
+                        over_capacity.append(snapshot_size)
+                if consumer_n == 0:
+                    items = concurrent_ll.drain(10)
+                    if len(items) == 0:
+                        items = [concurrent_ll.pop_head(timeout=0.5)]
+                else:
+                    items = [concurrent_ll.pop_tail(timeout=0.5) if consumer_n == 1 else
+                             concurrent_ll.pop_head(timeout=0.5)]
+                if items == [None]:
+                    return # producers are done
+                consumed[consumer_n].extend(items)
+
+        threads = [threading.Thread(target=_produce, args=(n,)) for n in range(num_producers)]
+        threads.extend(threading.Thread(target=_consume, args=(n,)) for n in range(num_consumers))
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        all_consumed = sorted(item for items in consumed for item in items)
+        expected = sorted((p, n) for p in range(num_producers) for n in range(items_per_producer))
+        valid, error_str = tl.validate_concurrent(concurrent_ll)
+        if all_consumed != expected or not valid or concurrent_ll.size() != 0:
+            print("concurrent list failure with threads, capacity {}: {}".format(capacity, error_str))
+            tl.validity_failure = True
+        if len(over_capacity) > 0:
+            print("list went over capacity:", over_capacity[:5])
+            tl.validity_failure = True
+    handle_test_failure(24)
+
+if should_run_test(25):
+    print("seed={}".format(random_seed))
+
+    def _check(condition, message):
+        if not condition:
+            print("async list failure:", message)
+            tl.validity_failure = True
+
+    async def _async_list_test():
+        # Consumers waiting on an empty list are handed items in the order they started waiting
+        async_ll = tl.AsyncLinkedList()
+        consumers = [asyncio.ensure_future(async_ll.pop_head()) for n in range(100)]
+        await asyncio.sleep(0)
+        await async_ll.extend(range(250))
+        _check([await consumer for consumer in consumers] == list(range(100)), "bad handover order")
+        _check(async_ll.get_items() == list(range(100, 250)), "wrong items left")
+
+        # Middle-of-list changes, then 'async for' until closed
+        async_ll.insert(-1, 0)
+        async_ll.remove_value(200)
+        expected = [-1] + [n for n in range(100, 250) if n != 200]
+        async_ll.close()
+        _check([item async for item in async_ll] == expected, "async for gave wrong items")
+        _check(await async_ll.pop_head() is None and await async_ll.pop_many(5) == [], "pop from closed list")
+        try:
+            async_ll.add_tail_nowait(1)
+            _check(False, "add to closed list not caught")
+        except ValueError:
+            pass
+
+        # With a capacity, producers wait for room, and the list never holds more than that
+        for capacity in (1, 7):
+            async_ll = tl.AsyncLinkedList(capacity=capacity)
+            sizes = []
+
+            async def _produce(start):
+                for n in range(start, start + 30, 5):
+                    await async_ll.extend(range(n, n + 5))
+                    sizes.append(async_ll.size())
+                await async_ll.add_head(start + 1000)
+
+            async def _consume(consumer_n):
+                items = []
+                while True:
+                    if consumer_n % 3 == 0:
+                        batch = await async_ll.pop_many(random.randrange(1, 4))
+                        if batch == []: return items
+                        items.extend(batch)
+                    else:
+                        item = await (async_ll.pop_tail() if consumer_n % 3 == 1 else async_ll.pop_head())
+                        if item is None: return items
+                        items.append(item)
+                    sizes.append(async_ll.size())
+                    if random.randrange(3) == 0: await asyncio.sleep(0)
+
+            producers = [asyncio.ensure_future(_produce(n * 100)) for n in range(4)]
+            consumers = [asyncio.ensure_future(_consume(n)) for n in range(6)]
+            await asyncio.gather(*producers)
+            async_ll.close()
+            results = await asyncio.gather(*consumers)
+            all_items = sorted(item for items in results for item in items)
+            _check(all_items == sorted(p * 100 + n for p in range(4) for n in list(range(30)) + [1000]),
+                   "items lost or duplicated, capacity {}".format(capacity))
+            _check(max(sizes) <= capacity, "went over capacity {}".format(capacity))
+            try:
+                full_ll = tl.AsyncLinkedList([1], capacity=1)
+                full_ll.add_tail_nowait(2)
+                _check(False, "full list not caught")
+            except asyncio.QueueFull:
+                pass
+
+        # A consumer cancelled while waiting doesn't take an item with it
+        async_ll = tl.AsyncLinkedList()
+        consumers = [asyncio.ensure_future(async_ll.pop_head()) for n in range(3)]
+        await asyncio.sleep(0)
+        consumers[0].cancel()
+        async_ll.add_tail_nowait("a")
+        consumers[1].cancel() # cancelled after being handed "a"
+        await asyncio.sleep(0)
+        async_ll.add_tail_nowait("b")
+        results = await asyncio.gather(*consumers, return_exceptions=True)
+        _check(results[2] == "a" and async_ll.get_items() == ["b"], "item lost to a cancelled consumer")
+
+    asyncio.run(_async_list_test())
+    handle_test_failure(25)
+
+# Twenty-sixth test: parallel_sort() must give the same result as sort(), stability included, in both index modes.
+# parallel_map() must keep the items in order. One process pool is shared by all the calls.
+
+if should_run_test(26):
+    print("seed={}".format(random_seed))
+    from concurrent.futures import ProcessPoolExecutor
+    size = LinkedList.PARALLEL_MIN_SEGMENT * 3 + random.randrange(100)
+    records = [(random.randrange(100), n) for n in range(size)]
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        for mode in LinkedList.INDEX_MODES:
+            for reverse in (False, True):
+                record_ll = tl.TestList(records, index_mode=mode)
+                cursor = record_ll.cursor(size // 2)
+                record_ll.parallel_sort(reverse=reverse, key=operator.itemgetter(0), workers=3, executor=pool,
+                                        expected_list=sorted(records, key=operator.itemgetter(0), reverse=reverse))
+                if cursor.item != records[size // 2] or record_ll.get_item(cursor.index()) != records[size // 2]:
+                    print("cursor lost its item in parallel sort")
+                    tl.validity_failure = True
+        int_ll = tl.TestList([random.randrange(-1000, 1000) for n in range(size)])
+        python_list = int_ll.get_items()
+        mapped_ll = int_ll.parallel_map(abs, workers=3, executor=pool)
+        if mapped_ll.get_items() != [abs(n) for n in python_list] or int_ll.get_items() != python_list:
+            print("bad parallel map")
+            tl.validity_failure = True
+        int_ll.parallel_sort(reverse=True, workers=2, executor=pool, expected_list=sorted(python_list, reverse=True))
+        # With one worker, or too few items for more, nothing goes to the pool
+        int_ll.parallel_sort(workers=1, expected_list=sorted(python_list))
+        small_ll = tl.TestList([3, 1, 2])
+        small_ll.parallel_sort(workers=4, expected_list=[1, 2, 3])
+        if small_ll.parallel_map(operator.neg).get_items() != [-1, -2, -3]:
+            print("bad parallel map of a small list")
+            tl.validity_failure = True
+        # Lists made from a subclass's list are of the subclass too
+        if type(mapped_ll) is not tl.TestList or type(small_ll[0:2]) is not tl.TestList or \
+                type(small_ll.split(1)) is not tl.TestList or type(small_ll.copy()) is not tl.TestList:
+            print("new lists not of the subclass")
+            tl.validity_failure = True
+    handle_test_failure(26)
+
+# Twenty-seventh test: unrolled lists with typed blocks, of ints and of floats, checked against a Python list through
+# random changes, then the aggregates, sort, split and join (including with an untyped list). Values that don't fit
+# the typecode must be refused without changing the list.
+
+if should_run_test(27):
+    print("seed={}".format(random_seed))
+    for typecode, rand_value in (('q', lambda: random.randrange(-50, 50)), ('d', lambda: random.randrange(100) / 4)):
+        typed_ll = tl.UnrolledLinkedList([rand_value() for i in range(50)], block_capacity=4, typecode=typecode)
+        python_list = typed_ll.get_items()
+        for i in range(500):
+            value = rand_value()
+            rand_op = random.randrange(6)
+            rand_index = random.randrange(len(python_list) + 1)
+            if rand_op == 0:
+                typed_ll.insert(value, rand_index)
+                python_list.insert(rand_index, value)
+            elif rand_op == 1:
+                if random.randrange(2) == 0:
+                    typed_ll.add_head(value)
+                    python_list.insert(0, value)
+                else:
+                    typed_ll.add_tail(value)
+                    python_list.append(value)
+            elif rand_op == 2 and rand_index < len(python_list):
+                if typed_ll.remove(rand_index) != python_list.pop(rand_index):
+                    tl.validity_failure = True
+            elif rand_op == 3 and rand_index < len(python_list):
+                start_index = max(0, rand_index - 3)
+                if typed_ll.find_item(python_list[rand_index], start_index) != \
+                        python_list.index(python_list[rand_index], start_index):
+                    tl.validity_failure = True
+            elif rand_op == 4:
+                if typed_ll.count(value) != python_list.count(value):
+                    tl.validity_failure = True
+            elif rand_op == 5 and len(python_list) > 0:
+                if (typed_ll.sum(), typed_ll.min(), typed_ll.max()) != \
+                        (sum(python_list), min(python_list), max(python_list)):
+                    tl.validity_failure = True
+            valid, error_str = tl.validate_unrolled(typed_ll)
+            if not valid or typed_ll.get_items() != python_list:
+                print("typed list failure, typecode {}, op {}: {}".format(typecode, rand_op, error_str))
+                tl.validity_failure = True
+            if tl.validity_failure: break
+        for bad_value in ("a", None, 2 ** 64 if typecode == 'q' else 10 ** 400, 1.5 if typecode == 'q' else "1.5"):
+            for add in (typed_ll.add_tail, typed_ll.add_head, lambda item: typed_ll.insert(item, 2)):
+                try:
+                    add(bad_value)
+                    print("bad value {!r} not refused by typecode {}".format(bad_value, typecode))
+                    tl.validity_failure = True
+                except (TypeError, OverflowError):
+                    pass
+        if typed_ll.get_items() != python_list or typed_ll.get_array().tolist() != python_list:
+            print("typed list changed by refused values")
+            tl.validity_failure = True
+        typed_ll.sort(reverse=True)
+        python_list.sort(reverse=True)
+        split_ll = typed_ll.split(len(python_list) // 2)
+        copy_ll = split_ll.copy()
+        typed_ll.join(tl.UnrolledLinkedList([1, 2], typecode=None))
+        split_ll.join(typed_ll)
+        expected = python_list[len(python_list) // 2:] + python_list[:len(python_list) // 2] + [1, 2]
+        for ll, expected_list in [(split_ll, expected), (typed_ll, []),
+                                  (copy_ll, python_list[len(python_list) // 2:])]:
+            valid, error_str = tl.validate_unrolled(ll)
+            if not valid or ll.get_items() != expected_list:
+                print("typed list failure after split/join:", error_str)
+                tl.validity_failure = True
+        try:
+            tl.UnrolledLinkedList([1]).get_array()
+            print("get_array() of untyped list not refused")
+            tl.validity_failure = True
+        except ValueError:
+            pass
+    handle_test_failure(27)
+
+# Twenty-eighth test: pickling, copying, and dump() and load(), of lists far too long to pickle node by node. The
+# loaded lists must have the same items and settings, and a valid cache, tree or hash index.
+
+if should_run_test(28):
+    print("seed={}".format(random_seed))
+    items = [random.randrange(1000) for i in range(3000)] + [None, "text", [1, 2]]
+    for mode in LinkedList.INDEX_MODES:
+        pickle_ll = tl.TestList(items, index_mode=mode, hash_index=True, hash_key=repr)
+        copies = [pickle.loads(pickle.dumps(pickle_ll, protocol)) for protocol in range(1, pickle.HIGHEST_PROTOCOL + 1)]
+        copies.append(copy.copy(pickle_ll))
+        copies.append(copy.deepcopy(pickle_ll))
+        dump_file = io.BytesIO()
+        pickle_ll.dump(dump_file)
+        dump_file.seek(0)
+        copies.append(tl.TestList.load(dump_file))
+        for copy_ll in copies:
+            valid, error_str = copy_ll.validate()
+            if not valid or copy_ll.get_items() != items or type(copy_ll) is not tl.TestList or \
+                    copy_ll.index_mode != mode or copy_ll._hash_index is None or copy_ll._hash_index.key is not repr:
+                print("bad copy of list, {} mode: {}".format(mode, error_str))
+                tl.validity_failure = True
+            if copy_ll.find_item("text") != len(items) - 2 or copy_ll.get_item(1234) != items[1234]:
+                print("copied list can't find its items")
+                tl.validity_failure = True
+        if copies[-2][-1] is items[-1] or copies[-3][-1] is not items[-1]:
+            print("deepcopy() or copy() made the wrong kind of copy")
+            tl.validity_failure = True
+    # A dump that's cut short, or isn't a dump at all, is refused
+    truncated_errors = (EOFError, pickle.UnpicklingError)
+    for bad_data, error in ((dump_file.getvalue()[:-100], truncated_errors),
+                            (dump_file.getvalue()[:-1], truncated_errors), (b"not a list", ValueError)):
+        try:
+            LinkedList.load(io.BytesIO(bad_data))
+            print("bad dump not refused")
+            tl.validity_failure = True
+        except error:
+            pass
+    for typecode in (None, 'q'):
+        unrolled_ll = tl.UnrolledLinkedList(items[:-3], block_capacity=8, typecode=typecode)
+        for copy_ll in (pickle.loads(pickle.dumps(unrolled_ll)), copy.copy(unrolled_ll), copy.deepcopy(unrolled_ll)):
+            valid, error_str = tl.validate_unrolled(copy_ll)
+            copy_ll.add_head(-1)
+            if not valid or copy_ll.get_items() != [-1] + items[:-3] or unrolled_ll.get_items() != items[:-3]:
+                print("bad copy of unrolled list, typecode {}: {}".format(typecode, error_str))
+                tl.validity_failure = True
+    handle_test_failure(28)
+
+# Twenty-ninth test: a file-backed list, checked against a Python list through random changes, with the files closed
+# and reopened, and compacted, along the way. The records file and the item heap both have to grow past their starting
+# size. Then split, join, reverse, sort and copy.
+
+if should_run_test(29):
+    print("seed={}".format(random_seed))
+
+    def _check_mapped(mapped_ll, expected_list, operation):
+        valid, error_str = tl.validate_mapped(mapped_ll)
+        if not valid or mapped_ll.get_items() != expected_list:
+            print("mapped list failure after {}: {}".format(operation, error_str))
+            tl.validity_failure = True
+
+    def _rand_item():
+        return random.choice([random.randrange(100), "s{}".format(random.randrange(100)), (random.randrange(10),),
+                              b"x" * random.randrange(2000)])
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "list")
+        python_list = [_rand_item() for i in range(1200)]
+        mapped_ll = tl.MappedLinkedList(path, python_list)
+        operations = ["add_head", "add_tail", "pop_head", "pop_tail", "insert", "remove", "get_item", "find_item",
+                      "reopen", "compact"]
+        for i in range(600):
+            item = _rand_item()
+            rand_op = random.randrange(len(operations)) if i % 50 == 49 else random.randrange(8)
+            rand_index = random.randrange(len(python_list) + 1)
+            if rand_op == 0:
+                mapped_ll.add_head(item)
+                python_list.insert(0, item)
+            elif rand_op == 1:
+                mapped_ll.add_tail(item)
+                python_list.append(item)
+            elif rand_op == 2:
+                if mapped_ll.pop_head() != (python_list.pop(0) if python_list else None):
+                    tl.validity_failure = True
+            elif rand_op == 3:
+                if mapped_ll.pop_tail() != (python_list.pop() if python_list else None):
+                    tl.validity_failure = True
+            elif rand_op == 4:
+                mapped_ll.insert(item, rand_index)
+                python_list.insert(rand_index, item)
+            elif rand_op == 5 and rand_index < len(python_list):
+                if mapped_ll.remove(rand_index) != python_list.pop(rand_index):
+                    tl.validity_failure = True
+            elif rand_op == 6 and rand_index < len(python_list):
+                if mapped_ll.get_item(rand_index) != python_list[rand_index]:
+                    tl.validity_failure = True
+            elif rand_op == 7 and rand_index < len(python_list):
+                item = python_list[rand_index]
+                last_index = len(python_list) - 1 - python_list[::-1].index(item)
+                start_index = max(0, rand_index - 3)
+                if mapped_ll.find_item(item, -1, True) != last_index or \
+                        mapped_ll.find_item(item, start_index) != python_list.index(item, start_index):
+                    tl.validity_failure = True
+            elif rand_op == 8:
+                mapped_ll.close()
+                mapped_ll = tl.MappedLinkedList(path)
+            elif rand_op == 9:
+                heap_size = os.path.getsize(path + ".heap")
+                mapped_ll.compact()
+                if os.path.getsize(path + ".heap") > heap_size or mapped_ll._free != -1:
+                    print("compaction didn't reclaim space")
+                    tl.validity_failure = True
+            _check_mapped(mapped_ll, python_list, operations[rand_op])
+            if tl.validity_failure: break
+        mapped_ll.reverse_list()
+        python_list.reverse()
+        _check_mapped(mapped_ll, python_list, "reverse_list")
+        mapped_ll.sort(key=repr, reverse=True)
+        python_list.sort(key=repr, reverse=True)
+        _check_mapped(mapped_ll, python_list, "sort")
+        split_index = len(python_list) // 3
+        split_ll = mapped_ll.split(split_index)
+        _check_mapped(mapped_ll, python_list[:split_index], "split")
+        _check_mapped(split_ll, python_list[split_index:], "split")
+        split_ll.join(mapped_ll)
+        split_ll.join(tl.LinkedList([1, 2]))
+        expected = python_list[split_index:] + python_list[:split_index] + [1, 2]
+        _check_mapped(split_ll, expected, "join")
+        _check_mapped(mapped_ll, [], "join")
+        temp_copy_ll = split_ll.copy()
+        copy_ll = split_ll.copy(os.path.join(temp_dir, "copy"))
+        _check_mapped(temp_copy_ll, expected, "copy")
+        split_ll.close()
+        temp_copy_ll.close()
+        copy_ll.close()
+        with tl.MappedLinkedList(copy_ll.path) as reopened_ll:
+            _check_mapped(reopened_ll, expected, "copy")
+        # The files split() and copy() made without a path are gone, and the rest are kept
+        if sorted(os.listdir(temp_dir)) != ["copy", "copy.heap", "list", "list.heap"]:
+            print("unexpected files left:", os.listdir(temp_dir))
+            tl.validity_failure = True
+        mapped_ll.close()
+
+        # Files that aren't lists, and lists whose item heap is missing or empty, are refused and left as they were
+        def _file_bytes(file_path):
+            if not os.path.exists(file_path):
+                return None
+            with open(file_path, "rb") as fp:
+                return fp.read()
+        with open(path, "r+b") as fp:
+            fp.write(b"garbage!")
+        short_path = os.path.join(temp_dir, "short")
+        with open(short_path, "wb") as fp:
+            fp.write(b"not a list")
+        no_heap_path = os.path.join(temp_dir, "no_heap")
+        tl.MappedLinkedList(no_heap_path, range(10)).close()
+        os.remove(no_heap_path + ".heap")
+        empty_heap_path = os.path.join(temp_dir, "empty_heap")
+        tl.MappedLinkedList(empty_heap_path, range(10)).close()
+        open(empty_heap_path + ".heap", "wb").close()
+        for bad_path in [path, short_path, no_heap_path, empty_heap_path]:
+            before = (_file_bytes(bad_path), _file_bytes(bad_path + ".heap"))
+            try:
+                tl.MappedLinkedList(bad_path)
+                print("bad file not refused:", bad_path)
+                tl.validity_failure = True
+            except ValueError:
+                pass
+            if (_file_bytes(bad_path), _file_bytes(bad_path + ".heap")) != before:
+                print("bad file changed by opening it:", bad_path)
+                tl.validity_failure = True
+
+        # A list dropped without flush() or close() reopens as it was left, including after being emptied, when the
+        # heap is reused from the start
+        dropped_path = os.path.join(temp_dir, "dropped")
+        dropped_ll = tl.MappedLinkedList(dropped_path, range(5))
+        dropped_ll.flush()
+        dropped_ll.add_tail(99)
+        dropped_ll.insert(98, 2)
+        dropped_ll.pop_head()
+        del dropped_ll
+        dropped_ll = tl.MappedLinkedList(dropped_path)
+        _check_mapped(dropped_ll, [1, 98, 2, 3, 4, 99], "reopening without flush")
+        if dropped_ll.pop_tail() != 99 or dropped_ll.size() != 5:
+            tl.validity_failure = True
+        while dropped_ll.pop_head() is not None:
+            pass
+        dropped_ll.add_tail("after emptying")
+        del dropped_ll
+        with tl.MappedLinkedList(dropped_path) as dropped_ll:
+            _check_mapped(dropped_ll, ["after emptying"], "reopening an emptied list without flush")
+    handle_test_failure(29)
+
+# Thirtieth test: the benchmark suite, run quickly on small lists, and its comparison against a baseline
+
+if should_run_test(30):
+    results = benchmark.run_benchmarks(sizes=[50, 200], ops=20, repeat=1, seed=random_seed)
+    targets = list(benchmark.TARGETS)
+    workloads = [w[0] for w in benchmark.WORKLOADS]
+    # Every workload runs on every target, except sort, which deque doesn't have
+    expected = [(w, t, s) for s in [50, 200] for t in targets for w in workloads if (w, t) != ('sort', 'deque')]
+    if [(r['workload'], r['target'], r['size']) for r in results] != expected:
+        print("wrong benchmark results:", [(r['workload'], r['target'], r['size']) for r in results])
+        tl.validity_failure = True
+    if any(r['us_per_op'] < 0 for r in results):
+        print("negative benchmark time")
+        tl.validity_failure = True
+    if benchmark.op_count(1000, 10 ** 7, benchmark.BUDGET_SCAN) != 1 or \
+            benchmark.op_count(1000, 100, benchmark.BUDGET_SHIFT) != 1000:
+        print("wrong op counts")
+        tl.validity_failure = True
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.json")
+        benchmark.save_results(path, results, random_seed)
+        loaded = benchmark.load_results(path)
+        if loaded != results:
+            print("benchmark results changed when saved")
+            tl.validity_failure = True
+        # Against itself, nothing is slower; against a baseline twice as fast, everything is
+        if benchmark.compare_results(results, loaded) != []:
+            print("regressions against own results")
+            tl.validity_failure = True
+        faster = [dict(r, us_per_op=r['us_per_op'] / 2) for r in loaded if r['us_per_op'] > 0]
+        slower = benchmark.compare_results(results, faster, tolerance=0.5)
+        if len(slower) != len(faster) or any(abs(ratio - 2) > 1e-9 for result, base, ratio in slower):
+            print("regressions not found against faster baseline")
+            tl.validity_failure = True
+        if benchmark.compare_results(results, faster, tolerance=1.5) != []:
+            print("regressions found within tolerance")
+            tl.validity_failure = True
+        # Bench mode uses a fixed seed, unless one is given, so that runs compared against each other match
+        for seed, expected_seed in [(None, benchmark.DEFAULT_SEED), (5, 5)]:
+            bench_args = argparse.Namespace(bench_sizes="20", bench_targets="list", bench_workloads=workloads[0],
+                                            bench_ops=5, bench_repeat=1, bench_output=path, bench_baseline=None)
+            benchmark.run_bench_mode(bench_args, seed, 2)
+            with open(path) as fp:
+                if json.load(fp)['seed'] != expected_seed:
+                    print("bench mode used the wrong seed")
+                    tl.validity_failure = True
+        with open(path, 'w') as fp:
+            fp.write("[]")
+        try:
+            benchmark.load_results(path)
+            print("bad results file not refused")
+            tl.validity_failure = True
+        except ValueError:
+            pass
+    try:
+        benchmark.run_benchmarks(sizes=[10], targets=['vector'])
+        print("unknown target not refused")
+        tl.validity_failure = True
+    except ValueError:
+        pass
+    handle_test_failure(30)
+
+# Thirty-first test: runtime stats. Where accesses by index start from and how far they walk, cache rebuilds, and
+# method timings, along with the hooks that get them as they happen.
+
+if should_run_test(31):
+    stats_ll = LinkedList(range(1000))
+    if stats_ll.stats() is not None:
+        print("stats before they were turned on")
+        tl.validity_failure = True
+    events = []
+    stats_ll.enable_stats(hooks=[lambda event, name, value: events.append((event, name, value))])
+    stats_ll.get_item(0)
+    stats_ll.get_item(999)
+    stats_ll.get_item(3)
+    stats_ll.get_item(500)
+    stats_ll.get_item(502)
+    stats = stats_ll.stats()
+    if stats['accesses'] != {'head': 2, 'tail': 1, 'finger': 1, 'cache': 1, 'tree': 0, 'total': 5}:
+        print("wrong access sources:", stats['accesses'])
+        tl.validity_failure = True
+    access_events = [e for e in events if e[0] == 'access']
+    if [e[1] for e in access_events] != ['head', 'tail', 'head', 'cache', 'finger'] or \
+            stats['hops'] != sum(e[2] for e in access_events) or stats['max_hops'] != max(e[2] for e in access_events):
+        print("access events don't match stats:", access_events, stats)
+        tl.validity_failure = True
+    if stats['hops'] != 3 + 2 + access_events[3][2] or sum(stats['hop_histogram'].values()) != 5:
+        print("wrong hops:", stats)
+        tl.validity_failure = True
+
+    # insert() at the head calls add_head(), but only insert() is counted
+    stats_ll.insert(-1, 0)
+    stats_ll.pop_head()
+    stats = stats_ll.stats(reset=True)
+    if stats['operations']['get_item']['calls'] != 5 or stats['operations']['insert']['calls'] != 1 or \
+            'add_head' in stats['operations'] or sum(stats['operations']['pop_head']['histogram'].values()) != 1:
+        print("wrong operation counts:", stats['operations'])
+        tl.validity_failure = True
+    if [e[1] for e in events if e[0] == 'operation'] != ['get_item'] * 5 + ['insert', 'pop_head']:
+        print("wrong operation events:", events)
+        tl.validity_failure = True
+    if stats_ll.stats()['accesses']['total'] != 0 or stats_ll.stats()['operations'] != {}:
+        print("stats not reset")
+        tl.validity_failure = True
+
+    # sort() leaves the cache to be rebuilt at the next access; joining a sorted list leaves part of it to refresh
+    stats_ll.sort(reverse=True)
+    stats_ll.get_item(500)
+    other_ll = LinkedList(range(1000))
+    other_ll.sort(reverse=True)
+    stats_ll.join(other_ll)
+    stats_ll.get_item(1500)
+    stats = stats_ll.stats()
+    if stats['rebuilds'] != {'rebuild': 1, 'refresh': 1} or min(stats['rebuild_time'].values()) <= 0:
+        print("wrong rebuild stats:", stats['rebuilds'], stats['rebuild_time'])
+        tl.validity_failure = True
+    if stats_ll.get_items() != list(range(999, -1, -1)) * 2:
+        print("list changed by stats")
+        tl.validity_failure = True
+
+    stats_ll.disable_stats()
+    if stats_ll.stats() is not None or any(name in vars(stats_ll) for name in LinkedList.TIMED_METHODS):
+        print("stats not turned off")
+        tl.validity_failure = True
+    event_count = len(events)
+    stats_ll.get_item(10)
+    if len(events) != event_count:
+        print("hooks called after stats turned off")
+        tl.validity_failure = True
+
+    tree_ll = LinkedList(range(100), index_mode='tree')
+    tree_ll.enable_stats(time_methods=False)
+    tree_ll.get_item(50)
+    tree_ll[60]
+    stats = tree_ll.stats()
+    if stats['accesses']['tree'] != 2 or stats['hops'] != 0 or stats['operations'] != {}:
+        print("wrong tree mode stats:", stats)
+        tl.validity_failure = True
+    handle_test_failure(31)
+
+# Thirty-second test: memory accounting. memory_usage() and sys.getsizeof() should agree with what tracemalloc sees
+# being allocated, for each kind of list.
+
+if should_run_test(32):
+    memory_size = 20000
+    memory_items = [i % 256 for i in range(memory_size)]
+    memory_builds = [("cache", lambda: LinkedList(memory_items)),
+                     ("tree", lambda: LinkedList(memory_items, index_mode='tree')),
+                     ("hash index", lambda: LinkedList(memory_items, hash_index=True)),
+                     ("compact", lambda: tl.CompactLinkedList(memory_items)),
+                     ("unrolled", lambda: tl.UnrolledLinkedList(memory_items)),
+                     ("typed", lambda: tl.UnrolledLinkedList(memory_items, typecode='q'))]
+    for name, build in memory_builds:
+        tracemalloc.start()
+        memory_ll = build()
+        memory_ll.get_item(memory_size // 2) # so the cache has fingers
+        traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        usage = memory_ll.memory_usage()
+        if usage != sys.getsizeof(memory_ll) or abs(usage - traced) > traced * 0.02:
+            print("{} memory_usage() {}, getsizeof {}, traced {}".format(name, usage, sys.getsizeof(memory_ll), traced))
+            tl.validity_failure = True
+        if verbosity < 2:
+            print("{}: {:.1f} bytes per item".format(name, usage / memory_size))
+        # The items are all small ints, each counted once
+        extra = 0 if name == 'typed' else sum(sys.getsizeof(i) for i in range(256))
+        if memory_ll.memory_usage(deep=True) != usage + extra:
+            print("{} deep memory_usage() {}, expected {}".format(name, memory_ll.memory_usage(deep=True),
+                                                                  usage + extra))
+            tl.validity_failure = True
+        del memory_ll
+
+    # Bigger items count for more, but each object only once, however often it's in the list
+    text = "x" * 1000
+    text_ll = LinkedList([text] * 10 + ["y" * 1000])
+    if text_ll.memory_usage(deep=True) != text_ll.memory_usage() + sys.getsizeof(text) + sys.getsizeof("y" * 1000):
+        print("shared items counted more than once")
+        tl.validity_failure = True
+    # With a key function, the hash keys are counted too
+    keyed_ll = LinkedList(["a" * 100, "b" * 100], hash_index=True, hash_key=str.upper)
+    if keyed_ll.memory_usage(deep=True) != keyed_ll.memory_usage() + 4 * sys.getsizeof("a" * 100):
+        print("hash keys not counted")
+        tl.validity_failure = True
+    if sys.getsizeof(LinkedList(range(1000))) < 1000 * sys.getsizeof(LinkedList([0]).head):
+        print("getsizeof doesn't count the nodes")
+        tl.validity_failure = True
+    handle_test_failure(32)
+
+# Thirty-third test: the node pool. Popped and removed nodes are scrubbed and reused, up to the pool size; TestList
+# checks after every operation that pooled nodes hold nothing and aren't in the list.
+
+if should_run_test(33):
+    for mode in ['cache', 'tree']:
+        pool_ll = tl.TestList(range(10), index_mode=mode, node_pool=4)
+        pool_ll.verbosity = verbosity
+        popped_node = pool_ll.tail
+        pool_ll.pop_tail(expected_list=list(range(9)))
+        pool_ll.pop_head(expected_list=list(range(1, 9)))
+        pool_ll.remove(3, expected_list=[1, 2, 3, 5, 6, 7, 8])
+        pool_ll.remove_value(7)
+        cursor = pool_ll.cursor(0)
+        cursor.remove()
+        # Building the list allocated 10 nodes, with the pool empty
+        if pool_ll.node_pool_stats() != {'size': 4, 'capacity': 4, 'hits': 0, 'misses': 10, 'discards': 1,
+                                         'hit_rate': 0.0}:
+            print(mode, "wrong pool stats after removals:", pool_ll.node_pool_stats())
+            tl.validity_failure = True
+        # The last node pooled is the first reused, and the first (the old tail) is reused last, for 'd'
+        pool_ll.add_tail('a', expected_list=[2, 3, 5, 6, 8, 'a'])
+        pool_ll.add_head('b', expected_list=['b', 2, 3, 5, 6, 8, 'a'])
+        pool_ll.insert('c', 3, expected_list=['b', 2, 3, 'c', 5, 6, 8, 'a'])
+        pool_ll.extend(['d', 'e'], expected_list=['b', 2, 3, 'c', 5, 6, 8, 'a', 'd', 'e'])
+        if pool_ll.tail.prev is not popped_node:
+            print(mode, "pooled node not reused")
+            tl.validity_failure = True
+        stats = pool_ll.node_pool_stats()
+        if stats['size'] != 0 or stats['hits'] != 4 or stats['misses'] != 11 or stats['hit_rate'] != 4 / 15:
+            print(mode, "wrong pool stats after adds:", stats)
+            tl.validity_failure = True
+
+        # Random churn, checked against a Python list
+        churn_ll = tl.TestList(range(20), index_mode=mode, node_pool=8)
+        churn_model = list(range(20))
+        for i in range(300):
+            op = random.randrange(4)
+            if op == 0 or len(churn_model) == 0:
+                index = random.randrange(len(churn_model) + 1)
+                churn_ll.insert(i, index)
+                churn_model.insert(index, i)
+            elif op == 1:
+                churn_ll.add_tail(i)
+                churn_model.append(i)
+            elif op == 2:
+                churn_model.pop(0)
+                churn_ll.pop_head()
+            else:
+                index = random.randrange(len(churn_model))
+                churn_model.pop(index)
+                churn_ll.remove(index)
+        if churn_ll.get_items() != churn_model:
+            print(mode, "churn with node pool went wrong")
+            tl.validity_failure = True
+        if churn_ll.node_pool_stats()['hits'] == 0:
+            print(mode, "no nodes reused in churn")
+            tl.validity_failure = True
+
+        # Bulk removals and slice deletions pool their nodes too, whether they remove nodes one by one or all at once
+        bulk_ll = tl.TestList(range(100), index_mode=mode, node_pool=100)
+        bulk_ll.remove_if(lambda item: item % 2 == 0, expected_list=list(range(1, 100, 2)))
+        pool_sizes = [bulk_ll.node_pool_stats()['size']]
+        bulk_ll.remove_all(1, expected_list=list(range(3, 100, 2)))
+        pool_sizes.append(bulk_ll.node_pool_stats()['size'])
+        del bulk_ll[0:10]
+        del bulk_ll[::2]
+        del bulk_ll[0]
+        pool_sizes.append(bulk_ll.node_pool_stats()['size'])
+        if bulk_ll.get_items() != list(range(29, 100, 4)) or pool_sizes != [50, 51, 82]:
+            print(mode, "bulk removals not pooled:", pool_sizes)
+            tl.validity_failure = True
+        bulk_ll.extend(range(100), expected_list=list(range(29, 100, 4)) + list(range(100)))
+        if bulk_ll.node_pool_stats()['size'] != 0:
+            print(mode, "pooled nodes from bulk removals not reused")
+            tl.validity_failure = True
+
+        # Copies, pickles and split-off lists get a pool of the same size
+        settings_ll = LinkedList(churn_model, index_mode=mode, node_pool=8)
+        if copy.copy(settings_ll).node_pool != 8 or pickle.loads(pickle.dumps(settings_ll)).node_pool != 8 or \
+                settings_ll.split(1).node_pool != 8:
+            print(mode, "node pool size not kept")
+            tl.validity_failure = True
+
+    # Without a pool, nothing is kept or counted
+    no_pool_ll = LinkedList(range(10))
+    no_pool_ll.pop_head()
+    no_pool_ll.add_tail(10)
+    if no_pool_ll.node_pool_stats() != {'size': 0, 'capacity': 0, 'hits': 0, 'misses': 0, 'discards': 0,
+                                        'hit_rate': 0.0}:
+        print("pool stats without a pool:", no_pool_ll.node_pool_stats())
+        tl.validity_failure = True
+    try:
+        LinkedList(node_pool=-1)
+        print("negative node pool not refused")
+        tl.validity_failure = True
+    except ValueError:
+        pass
+    handle_test_failure(33)
+
+# Thirty-fourth test: iterators. Forwards, backwards, from an index and over a range, and the check that the list
+# isn't changed while they're in use.
+
+if should_run_test(34):
+    for mode in ['cache', 'tree']:
+        iter_items = [random.randrange(1000) for i in range(300)]
+        iter_ll = LinkedList(iter_items, index_mode=mode)
+        if list(iter_ll) != iter_items or list(reversed(iter_ll)) != iter_items[::-1]:
+            print(mode, "wrong items from iteration")
+            tl.validity_failure = True
+        for index in [0, 1, 17, 150, 298, 299, -1, -300]:
+            if list(iter_ll.iter_from(index)) != iter_items[index:] or \
+                    list(iter_ll.iter_from(index, backwards=True)) != iter_items[index::-1]:
+                print(mode, "wrong items iterating from", index)
+                tl.validity_failure = True
+        if list(iter_ll.iter_from(300)) != []:
+            print(mode, "items iterating from the end")
+            tl.validity_failure = True
+        for bad_index in [301, -301]:
+            try:
+                iter_ll.iter_from(bad_index)
+                print(mode, "bad index not refused:", bad_index)
+                tl.validity_failure = True
+            except IndexError:
+                pass
+        try:
+            iter_ll.iter_from(300, backwards=True)
+            print(mode, "bad index not refused going backwards")
+            tl.validity_failure = True
+        except IndexError:
+            pass
+        for i in range(50):
+            start, stop = random.randrange(-350, 350), random.randrange(-350, 350)
+            if list(iter_ll.iter_range(start, stop)) != iter_items[start:stop]:
+                print(mode, "wrong items in range", start, stop)
+                tl.validity_failure = True
+
+        # Changing the list's structure stops iterators; setting items and reading by index doesn't
+        for make_iterator in [lambda: iter(iter_ll), lambda: reversed(iter_ll), lambda: iter_ll.iter_from(5),
+                              lambda: iter_ll.iter_range(5, 50), lambda: iter_ll.iter_from(50, backwards=True)]:
+            for change in [lambda: iter_ll.add_tail(1), lambda: iter_ll.pop_head(), lambda: iter_ll.insert(2, 10),
+                           lambda: iter_ll.sort(), lambda: iter_ll.reverse_list(), lambda: iter_ll.clear()]:
+                iter_ll = LinkedList(iter_items, index_mode=mode)
+                iterator = make_iterator()
+                next(iterator)
+                iter_ll[3] = -1
+                iter_ll.get_item(200)
+                next(iterator)
+                change()
+                try:
+                    next(iterator)
+                    print(mode, "change during iteration not caught")
+                    tl.validity_failure = True
+                except RuntimeError:
+                    pass
+
+        # Cache rebuilds don't count as changes
+        iter_ll = LinkedList(iter_items, index_mode=mode)
+        iter_ll.sort()
+        iterator = iter(iter_ll)
+        next(iterator)
+        iter_ll.get_item(250)
+        if list(iterator) != sorted(iter_items)[1:]:
+            print(mode, "iteration stopped by cache rebuild")
+            tl.validity_failure = True
+
+        # Cursors are still the way to remove items while going through the list
+        for cursor in iter_ll.cursors():
+            if cursor.item % 2 == 0:
+                cursor.remove()
+        if iter_ll.get_items() != [item for item in sorted(iter_items) if item % 2 == 1]:
+            print(mode, "removal through cursors went wrong")
+            tl.validity_failure = True
+    handle_test_failure(34)
+
+# Thirty-fifth test: snapshots. A snapshot should go on giving the items the list had when it was taken, by iteration
+# and by index, whatever the list does after, while copying only the items the list changes.
+if should_run_test(35):
+    def check_snapshot(name, snapshot, expected):
+        if len(snapshot) != len(expected) or list(snapshot) != expected or list(reversed(snapshot)) != expected[::-1] \
+                or snapshot.get_items() != expected:
+            print(name, "snapshot has the wrong items:", list(snapshot), "expected:", expected)
+            tl.validity_failure = True
+            return
+        for index in random.sample(range(len(expected)), min(10, len(expected))):
+            if snapshot[index] != expected[index] or snapshot[-index - 1] != expected[-index - 1]:
+                print(name, "snapshot has the wrong item at", index)
+                tl.validity_failure = True
+        start, stop = random.randrange(-5, len(expected) + 5), random.randrange(-5, len(expected) + 5)
+        if snapshot[start:stop] != expected[start:stop] or snapshot[stop:start:-2] != expected[stop:start:-2] or \
+                list(snapshot.iter_range(start, stop)) != expected[start:stop]:
+            print(name, "snapshot has the wrong items from", start, "to", stop)
+            tl.validity_failure = True
+
+    for mode in ['cache', 'tree']:
+        # Each change goes through TestList, which checks the list, and the snapshots taken along the way have to stay
+        # as they were
+        snap_ll = tl.TestList(range(20), index_mode=mode)
+        taken = [(snap_ll.snapshot(), list(range(20)))]
+        expected = list(range(20))
+        changes = [(lambda: snap_ll.add_head(-1), lambda: expected.insert(0, -1)),
+                   (lambda: snap_ll.add_tail(-2), lambda: expected.append(-2)),
+                   (lambda: snap_ll.insert(-3, 5), lambda: expected.insert(5, -3)),
+                   (lambda: snap_ll.insert_many(10, [-4, -5]), lambda: expected.__setitem__(slice(10, 10), [-4, -5])),
+                   (lambda: snap_ll.remove(7), lambda: expected.pop(7)),
+                   (lambda: snap_ll.pop_head(), lambda: expected.pop(0)),
+                   (lambda: snap_ll.pop_tail(), lambda: expected.pop()),
+                   (lambda: snap_ll.remove_value(12), lambda: expected.remove(12)),
+                   (lambda: snap_ll.remove_at([1, 3, 15]), lambda: [expected.pop(i) for i in [15, 3, 1]]),
+                   (lambda: snap_ll.set_items_at([2, 4], [-6, -7]), lambda: expected.__setitem__(2, -6) or
+                    expected.__setitem__(4, -7)),
+                   (lambda: snap_ll.__setitem__(slice(3, 6), [-8]), lambda: expected.__setitem__(slice(3, 6), [-8])),
+                   (lambda: snap_ll.__delitem__(slice(0, 12, 3)), lambda: expected.__delitem__(slice(0, 12, 3))),
+                   (lambda: snap_ll.cursor(2).insert_after(-9), lambda: expected.insert(3, -9)),
+                   (lambda: snap_ll.cursor(4).remove(), lambda: expected.pop(4)),
+                   (lambda: setattr(snap_ll.cursor(1), 'item', -10), lambda: expected.__setitem__(1, -10)),
+                   (lambda: snap_ll.reverse_list(), lambda: expected.reverse()),
+                   (lambda: snap_ll.sort(), lambda: expected.sort())]
+        for change, expected_change in changes:
+            change()
+            expected_change()
+            if snap_ll.get_items() != expected:
+                print(mode, "list went wrong with snapshots taken:", snap_ll.get_items(), "expected:", expected)
+                tl.validity_failure = True
+            taken.append((snap_ll.snapshot(), list(expected)))
+            for snapshot, snapshot_items in taken:
+                check_snapshot(mode, snapshot, snapshot_items)
+
+        # Snapshots with no change in between are the same; the list doesn't keep them alive
+        snap_ll = LinkedList(range(1000), index_mode=mode)
+        snapshot = snap_ll.snapshot()
+        if snap_ll.snapshot() is not snapshot:
+            print(mode, "new snapshot taken with no change to the list")
+            tl.validity_failure = True
+        snap_ll[500] = -1
+        if snap_ll.snapshot() is snapshot:
+            print(mode, "old snapshot given after a change to the list")
+            tl.validity_failure = True
+        # Only the item changed gets copied
+        copied = sum(len(run.items) for run in snapshot._runs if run.items is not None)
+        if copied != 1 or snapshot[500] != 500:
+            print(mode, copied, "items copied for one change")
+            tl.validity_failure = True
+        del snapshot
+        snap_ll.add_tail(1)
+        if len(snap_ll._snapshots) != 0:
+            print(mode, "snapshots kept after they're gone")
+            tl.validity_failure = True
+
+        # Lots of changes, with snapshots and iterators on them left part way through; then the list is cleared
+        snap_ll = LinkedList(range(300), index_mode=mode, node_pool=16)
+        expected = list(range(300))
+        taken = []
+        iterators = []
+        for i in range(400):
+            index = random.randrange(len(expected) + 1)
+            if i % 3 == 0 or index == len(expected):
+                snap_ll.insert(i, index)
+                expected.insert(index, i)
+            elif i % 3 == 1:
+                snap_ll.remove(index)
+                expected.pop(index)
+            else:
+                snap_ll[index] = -i
+                expected[index] = -i
+            if i % 40 == 0:
+                taken.append((snap_ll.snapshot(), list(expected)))
+                iterators.append((iter(taken[-1][0]), [], taken[-1][1]))
+                iterators.append((reversed(taken[-1][0]), [], taken[-1][1][::-1]))
+            for iterator, items, iterator_expected in iterators:
+                items.extend(next(iterator) for n in range(min(2, len(iterator_expected) - len(items))))
+        snap_ll.clear()
+        snap_ll.extend(range(5))
+        for iterator, items, iterator_expected in iterators:
+            items.extend(iterator)
+            if items != iterator_expected:
+                print(mode, "snapshot iterator went wrong")
+                tl.validity_failure = True
+        for snapshot, snapshot_items in taken:
+            check_snapshot(mode, snapshot, snapshot_items)
+            if len(snapshot._runs) > MAX_RUNS:
+                print(mode, "snapshot has", len(snapshot._runs), "runs")
+                tl.validity_failure = True
+
+        # Snapshots' nodes move over with join() and split()
+        snap_ll = LinkedList(range(100), index_mode=mode)
+        other_ll = LinkedList(range(100, 150), index_mode=mode)
+        snapshot = snap_ll.snapshot()
+        other_snapshot = other_ll.snapshot()
+        snap_ll.join(other_ll)
+        split_ll = snap_ll.split(30)
+        split_ll.remove(80)
+        split_ll[10] = -1
+        snap_ll.join(split_ll)
+        snap_ll.sort(key=lambda item: -item)
+        check_snapshot(mode, snapshot, list(range(100)))
+        check_snapshot(mode, other_snapshot, list(range(100, 150)))
+    handle_test_failure(35)
+
+# Thirty-sixth test: bulk removal. remove_if(), retain(), dedupe() and remove_all() should each leave the same items as
+# a Python list comprehension, and return what they removed.
+if should_run_test(36):
+    for mode in ['cache', 'tree']:
+        for hash_index in [False, True]:
+            # Big enough to take the path that unlinks everything first, and small enough for TestList to check often
+            bulk_items = [random.randrange(30) for i in range(200)]
+            bulk_ll = tl.TestList(bulk_items, index_mode=mode, hash_index=hash_index)
+            expected = [item for item in bulk_items if item % 3 != 0]
+            removed = bulk_ll.remove_if(lambda item: item % 3 == 0, expected_list=expected)
+            if removed != [item for item in bulk_items if item % 3 == 0]:
+                print(mode, hash_index, "remove_if returned", removed)
+                tl.validity_failure = True
+            removed = bulk_ll.retain(lambda item: item > 4, expected_list=[item for item in expected if item > 4])
+            if removed != [item for item in expected if item <= 4]:
+                print(mode, hash_index, "retain returned", removed)
+                tl.validity_failure = True
+            expected = [item for item in expected if item > 4]
+            if bulk_ll.filter_in_place(lambda item: True) != [] or bulk_ll.remove_if(lambda item: False) != []:
+                print(mode, hash_index, "items removed for nothing")
+                tl.validity_failure = True
+
+            # A few removals take each node out in turn
+            count = expected.count(expected[0])
+            value = expected[0]
+            expected = [item for item in expected if item != value]
+            if bulk_ll.remove_all(value, expected_list=expected) != count or bulk_ll.remove_all(-1) != 0:
+                print(mode, hash_index, "remove_all gave the wrong count")
+                tl.validity_failure = True
+            if hash_index and bulk_ll.find_item(expected[0]) != 0:
+                print(mode, hash_index, "hash index wrong after bulk removal")
+                tl.validity_failure = True
+
+            runs = [1, 1, 2, 2, 2, 1, 3, 3, 1]
+            bulk_ll = tl.TestList(runs, index_mode=mode, hash_index=hash_index)
+            if bulk_ll.dedupe(consecutive=True, expected_list=[1, 2, 1, 3, 1]) != [1, 2, 2, 3]:
+                print(mode, hash_index, "consecutive dedupe returned the wrong items")
+                tl.validity_failure = True
+            if bulk_ll.dedupe(expected_list=[1, 2, 3]) != [1, 1]:
+                print(mode, hash_index, "dedupe returned the wrong items")
+                tl.validity_failure = True
+            words = ["a", "B", "b", "A", "c", "C", "c"]
+            bulk_ll = tl.TestList(words, index_mode=mode)
+            bulk_ll.dedupe(key=str.lower, consecutive=True, expected_list=["a", "B", "A", "c"])
+            bulk_ll.dedupe(key=str.lower, expected_list=["a", "B", "c"])
+            bulk_ll = tl.TestList([[1], [1], [2], [1]], index_mode=mode)
+            bulk_ll.dedupe(consecutive=True, expected_list=[[1], [2], [1]])
+
+            # Everything goes, then the list is used again
+            bulk_ll = tl.TestList(bulk_items, index_mode=mode, hash_index=hash_index)
+            bulk_ll.remove_if(lambda item: True, expected_list=[])
+            bulk_ll.add_tail(5, expected_list=[5])
+            bulk_ll.insert(4, 0, expected_list=[4, 5])
+
+        # A predicate that fails, or that changes the list's structure, leaves the list as it was
+        bulk_ll = tl.TestList(range(100), index_mode=mode)
+        def failing(item):
+            if item == 50:
+                raise KeyError(item)
+            return item % 2 == 0
+        def changing(item):
+            if item == 50:
+                bulk_ll.add_tail(100)
+            return item % 2 == 0
+        for pred, error in [(failing, KeyError), (changing, RuntimeError)]:
+            try:
+                bulk_ll.remove_if(pred)
+                print(mode, "predicate's", error.__name__, "not raised")
+                tl.validity_failure = True
+            except error:
+                pass
+        if bulk_ll.get_items() != list(range(101)):
+            print(mode, "items removed by a predicate that failed")
+            tl.validity_failure = True
+
+        # Snapshots keep the items removed
+        bulk_ll = LinkedList(range(100), index_mode=mode)
+        snapshot = bulk_ll.snapshot()
+        bulk_ll.remove_if(lambda item: item % 4 == 1)
+        bulk_ll.dedupe(key=lambda item: item // 10)
+        if list(snapshot) != list(range(100)) or bulk_ll.get_items() != list(range(0, 100, 10)):
+            print(mode, "bulk removal went wrong with a snapshot")
+            tl.validity_failure = True
+    handle_test_failure(36)
+
+if should_run_test(37):
+    def check_cache(cache, expected_keys, label):
+        valid, error_str = tl.validate_cache(cache)
+        if not valid or list(cache) != expected_keys:
+            print(label, "cache failure: {}".format(error_str), list(cache), expected_keys)
+            tl.validity_failure = True
+
+    # LRU order and eviction
+    evicted = []
+    lru = LRUCache(3, on_evict=lambda key, value: evicted.append((key, value)))
+    for key in "abc":
+        lru.put(key, key.upper())
+    check_cache(lru, ["c", "b", "a"], "lru")
+    if lru.get("a") != "A" or lru["b"] != "B" or lru.get("z") is not None:
+        tl.validity_failure = True
+    lru["d"] = "D"
+    check_cache(lru, ["d", "b", "a"], "lru")
+    lru.put("a", "AA") # a key already there: no eviction
+    check_cache(lru, ["a", "d", "b"], "lru")
+    if evicted != [("c", "C")] or "c" in lru or "a" not in lru or len(lru) != 3:
+        print("lru eviction went wrong", evicted)
+        tl.validity_failure = True
+    if lru.peek("b") != "B" or lru.peek("z", 0) != 0:
+        tl.validity_failure = True
+    check_cache(lru, ["a", "d", "b"], "lru peek")
+    try:
+        lru["z"]
+        print("lru KeyError not raised")
+        tl.validity_failure = True
+    except KeyError:
+        pass
+    stats = lru.stats(reset=True)
+    if stats['hits'] != 2 or stats['misses'] != 2 or stats['evictions'] != 1 or stats['size'] != 3:
+        print("lru stats wrong", stats)
+        tl.validity_failure = True
+    if lru.stats()['hits'] != 0 or lru.stats()['hit_rate'] != 0.0:
+        print("lru stats not reset")
+        tl.validity_failure = True
+    if lru.pop("d") != "D" or lru.pop("d", None) is not None:
+        tl.validity_failure = True
+    del lru["a"]
+    check_cache(lru, ["b"], "lru pop")
+    lru.put("e", "E")
+    lru.put("f", "F")
+    lru.resize(1)
+    check_cache(lru, ["f"], "lru resize")
+    if lru.items() != [("f", "F")] or evicted[-2:] != [("b", "B"), ("e", "E")]:
+        tl.validity_failure = True
+    lru.clear()
+    check_cache(lru, [], "lru clear")
+    lru.resize(0)
+    lru.put("g", "G")
+    check_cache(lru, [], "lru zero capacity")
+    try:
+        LRUCache(-1)
+        print("negative capacity allowed")
+        tl.validity_failure = True
+    except ValueError:
+        pass
+
+    # Capacity by weight
+    for cache_class in [LRUCache, LFUCache]:
+        evicted = []
+        weighed = cache_class(10, weigh=lambda key, value: len(value),
+                              on_evict=lambda key, value: evicted.append(key))
+        weighed.put("a", "xxxx")
+        weighed.put("b", "xxxx")
+        weighed.put("c", "xxxxxxx") # a and b both have to go
+        check_cache(weighed, ["c"], cache_class.__name__ + " weight")
+        weighed.put("c", "x" * 11) # too heavy: not kept, and the old value goes too
+        weighed.put("d", "x" * 11)
+        check_cache(weighed, [], cache_class.__name__ + " too heavy")
+        weighed.put("e", "xxxxx")
+        weighed.put("f", "xxxxx")
+        weighed.put("f", "xxxxxx") # heavier, so e goes, but not f itself
+        check_cache(weighed, ["f"], cache_class.__name__ + " reweigh")
+        if evicted != ["a", "b", "e"] or weighed.weight != 6:
+            print(cache_class.__name__, "weight eviction went wrong", evicted, weighed.weight)
+            tl.validity_failure = True
+
+    # LFU order: most used first, then most recently used
+    evicted = []
+    lfu = LFUCache(3, on_evict=lambda key, value: evicted.append(key))
+    for key in "abc":
+        lfu.put(key, key.upper())
+    lfu.get("a")
+    lfu.get("b")
+    lfu.get("b")
+    check_cache(lfu, ["b", "a", "c"], "lfu")
+    lfu.put("d", "D")
+    check_cache(lfu, ["b", "a", "d"], "lfu")
+    lfu.put("e", "E") # d and e have been used once each, and d less recently
+    check_cache(lfu, ["b", "a", "e"], "lfu")
+    if evicted != ["c", "d"] or [lfu.use_count(key) for key in "bae"] != [3, 2, 1] or lfu.use_count("z") != 0:
+        print("lfu eviction went wrong", evicted)
+        tl.validity_failure = True
+    lfu.put("e", "EE")
+    lfu.put("e", "EEE")
+    check_cache(lfu, ["e", "b", "a"], "lfu put")
+    lfu.pop("b")
+    lfu.pop("e")
+    check_cache(lfu, ["a"], "lfu pop")
+    lfu.clear()
+    check_cache(lfu, [], "lfu clear")
+
+    # memoize
+    for cache_class in [LRUCache, LFUCache]:
+        calls = []
+        @cache_class(4).memoize
+        def add(x, y=0):
+            calls.append((x, y))
+            return None if x < 0 else x + y
+        if add(1) != 1 or add(1) != 1 or add(1, y=2) != 3 or add(1, y=2) != 3 or add(1, 2) != 3:
+            tl.validity_failure = True
+        if add(-1) is not None or add(-1) is not None:
+            tl.validity_failure = True
+        if calls != [(1, 0), (1, 2), (1, 2), (-1, 0)] or add.__name__ != "add" or len(add.cache) != 4:
+            print(cache_class.__name__, "memoize went wrong", calls)
+            tl.validity_failure = True
+        if add.cache.stats()['hits'] != 3:
+            tl.validity_failure = True
+
+    # Random operations, checked against simple models of the caches
+    for cache_class in [LRUCache, LFUCache]:
+        for capacity in [1, 5, 20]:
+            evicted = []
+            cache = cache_class(capacity, on_evict=lambda key, value: evicted.append(key))
+            model = {} # key -> [value, use count, last use]
+            model_evicted = []
+            for step in range(2000):
+                key = random.randrange(capacity * 2)
+                choice = random.randrange(10)
+                if choice < 5:
+                    value = cache.get(key)
+                    if key in model:
+                        model[key][1] = model[key][1] + 1
+                        model[key][2] = step
+                    if value != (model[key][0] if key in model else None):
+                        print(cache_class.__name__, "get gave", value)
+                        tl.validity_failure = True
+                elif choice < 9:
+                    cache.put(key, step)
+                    if key in model:
+                        model[key] = [step, model[key][1] + 1, step]
+                    else:
+                        if len(model) == capacity:
+                            if cache_class is LRUCache:
+                                victim = min(model, key=lambda k: model[k][2])
+                            else:
+                                victim = min(model, key=lambda k: (model[k][1], model[k][2]))
+                            del model[victim]
+                            model_evicted.append(victim)
+                        model[key] = [step, 1, step]
+                else:
+                    cache.pop(key, None)
+                    model.pop(key, None)
+                if cache_class is LRUCache:
+                    expected_keys = sorted(model, key=lambda k: -model[k][2])
+                else:
+                    expected_keys = sorted(model, key=lambda k: (-model[k][1], -model[k][2]))
+                check_cache(cache, expected_keys, cache_class.__name__ + " random")
+                if evicted != model_evicted:
+                    print(cache_class.__name__, "evicted", evicted, "expected", model_evicted)
+                    tl.validity_failure = True
+                if tl.validity_failure: break
+            if tl.validity_failure: break
+    handle_test_failure(37)
+
 if len(failed_tests) > 0:
     # If we don't get into this block of code, all tests were successful. If we do, we see a printout of which ones
     # failed
@@ -259,3 +2127,7 @@ if len(failed_tests) > 0:
     for t in failed_tests:
         print(t)
 
+if args.bench:
+    # The script's own seed changes from run to run unless --seed is given, which would add noise to a comparison
+    if benchmark.run_bench_mode(args, None if args.seed == -1 else args.seed, verbosity) > 0:
+        sys.exit(1)
@@ -0,0 +1,312 @@
+import json
+import platform
+import random
+import time
+from collections import deque
+from itertools import islice
+
+from linked_list_pkg import LinkedList
+
+# The benchmark suite, run by 'linked_list --bench'. It times the same standard workloads on LinkedList, in each index
+# mode, and on Python's list and collections.deque for reference, at a range of list sizes. Results can be saved as
+# JSON, and compared against a saved baseline, to catch a change (or an upgrade) that makes things slower.
+#
+# Each workload runs on a list of the integers 0 to size - 1, shuffled, built once per size and target. The workloads
+# run in the order of WORKLOADS, one after another on the same list. They all leave it holding the same items (in some
+# order), so each finds the list as the one before it left it. sort comes last, as it can only be timed once.
+#
+# Workloads whose operations can take time proportional to the size of the list, for some target (inserting at the
+# head of a list, for example), do fewer of them on big lists, so that a run at 1e7 items stays within minutes. The
+# count is the same for every target, and results are per operation, so they can be compared all the same.
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000, 10000000]
+DEFAULT_OPS = 1000
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_SEED = 1 # so that runs compared against each other do the same work
+RESULTS_FORMAT = 1
+
+# Targets only timed for reference. They are reported, but a regression in them isn't counted: it shows the machine or
+# the Python version has changed, rather than the linked list.
+REFERENCE_TARGETS = ['list', 'deque']
+
+# The largest number of items a workload may have operations touch, over the operations it times, for workloads whose
+# operations shift items (BUDGET_SHIFT) or scan the list (BUDGET_SCAN)
+BUDGET_SHIFT = 10 ** 8
+BUDGET_SCAN = 10 ** 7
+
+# --------------------------------------
+# Targets
+# --------------------------------------
+
+# Each target has a function to build it from a Python list, and one that returns the operations the workloads use on
+# it, in a dict of callables, so that a workload runs the same way on any target. An operation that a target doesn't
+# have is left out, and the workloads that use it are skipped for that target.
+
+def _linked_list_ops(ll):
+    return {'add_head': ll.add_head, 'add_tail': ll.add_tail, 'pop_head': ll.pop_head, 'pop_tail': ll.pop_tail,
+            'insert': lambda index, item: ll.insert(item, index), 'remove': ll.remove, 'get_item': ll.get_item,
+            'find_item': ll.find_item, 'sort': ll.sort, 'split': ll.split, 'join': ll.join}
+
+def _list_ops(items):
+    def split(index):
+        other = items[index:]
+        del items[index:]
+        return other
+    return {'add_head': lambda item: items.insert(0, item), 'add_tail': items.append,
+            'pop_head': lambda: items.pop(0), 'pop_tail': items.pop, 'insert': items.insert, 'remove': items.pop,
+            'get_item': items.__getitem__, 'find_item': items.index, 'sort': items.sort, 'split': split,
+            'join': items.extend}
+
+def _deque_ops(items):
+    def remove(index):
+        item = items[index]
+        del items[index]
+        return item
+    def split(index):
+        other = deque(islice(items, index, None))
+        for i in range(len(other)):
+            items.pop()
+        return other
+    return {'add_head': items.appendleft, 'add_tail': items.append, 'pop_head': items.popleft,
+            'pop_tail': items.pop, 'insert': items.insert, 'remove': remove, 'get_item': items.__getitem__,
+            'find_item': items.index, 'split': split, 'join': items.extend}
+
+TARGETS = {
+    'LinkedList': (LinkedList, _linked_list_ops),
+    'LinkedList/tree': (lambda items: LinkedList(items, index_mode='tree'), _linked_list_ops),
+    'list': (list, _list_ops),
+    'deque': (deque, _deque_ops),
+}
+
+# --------------------------------------
+# Workloads
+# --------------------------------------
+
+# Each workload takes a target's operations, its container, the size of the list, the number of operations to time and
+# a random.Random. It returns the time taken, in seconds, and the number of operations it took it for.
+
+def _push_pop_head(ops, container, size, count, rand):
+    add_head, pop_head = ops['add_head'], ops['pop_head']
+    start = time.perf_counter()
+    for i in range(count):
+        add_head(i)
+    for i in range(count):
+        pop_head()
+    return time.perf_counter() - start, 2 * count
+
+def _push_pop_tail(ops, container, size, count, rand):
+    add_tail, pop_tail = ops['add_tail'], ops['pop_tail']
+    start = time.perf_counter()
+    for i in range(count):
+        add_tail(i)
+    for i in range(count):
+        pop_tail()
+    return time.perf_counter() - start, 2 * count
+
+# Moves items: removes one at a random index, and inserts it again at another
+def _insert_remove_random(ops, container, size, count, rand):
+    insert, remove = ops['insert'], ops['remove']
+    moves = [(rand.randrange(size), rand.randrange(size)) for i in range(count)]
+    start = time.perf_counter()
+    for from_index, to_index in moves:
+        insert(to_index, remove(from_index))
+    return time.perf_counter() - start, 2 * count
+
+def _get_item_sequential(ops, container, size, count, rand):
+    get_item = ops['get_item']
+    first = rand.randrange(max(1, size - count))
+    indices = [min(first + i, size - 1) for i in range(count)]
+    start = time.perf_counter()
+    for index in indices:
+        get_item(index)
+    return time.perf_counter() - start, count
+
+def _get_item_random(ops, container, size, count, rand):
+    get_item = ops['get_item']
+    indices = [rand.randrange(size) for i in range(count)]
+    start = time.perf_counter()
+    for index in indices:
+        get_item(index)
+    return time.perf_counter() - start, count
+
+# Finds items that are in the list, so each is a scan of half of it, on average
+def _find_item(ops, container, size, count, rand):
+    find_item = ops['find_item']
+    items = [rand.randrange(size) for i in range(count)]
+    start = time.perf_counter()
+    for item in items:
+        find_item(item)
+    return time.perf_counter() - start, count
+
+# Splits the list at a random index, and joins the parts back together
+def _join_split(ops, container, size, count, rand):
+    split, join = ops['split'], ops['join']
+    indices = [rand.randrange(size) for i in range(count)]
+    start = time.perf_counter()
+    for index in indices:
+        join(split(index))
+    return time.perf_counter() - start, count
+
+# Iterates over the whole list, once. The count is the number of items.
+def _iterate(ops, container, size, count, rand):
+    start = time.perf_counter()
+    for item in container:
+        pass
+    return time.perf_counter() - start, size
+
+# Sorts the list, once. The count is the number of items.
+def _sort(ops, container, size, count, rand):
+    sort = ops['sort']
+    start = time.perf_counter()
+    sort()
+    return time.perf_counter() - start, size
+
+# (name, function, the operations it uses, budget for its operation count (None to do as many as asked), whether it can
+# be repeated), in the order they run
+WORKLOADS = [
+    ('iterate', _iterate, [], None, True),
+    ('get_item_sequential', _get_item_sequential, ['get_item'], None, True),
+    ('get_item_random', _get_item_random, ['get_item'], None, True),
+    ('find_item', _find_item, ['find_item'], BUDGET_SCAN, True),
+    ('push_pop_head', _push_pop_head, ['add_head', 'pop_head'], BUDGET_SHIFT, True),
+    ('push_pop_tail', _push_pop_tail, ['add_tail', 'pop_tail'], None, True),
+    ('insert_remove_random', _insert_remove_random, ['insert', 'remove'], BUDGET_SHIFT, True),
+    ('join_split', _join_split, ['split', 'join'], BUDGET_SHIFT, True),
+    ('sort', _sort, ['sort'], None, False),
+]
+
+# Returns how many operations a workload with the given budget does on a list of size items, when asked for ops
+def op_count(ops, size, budget):
+    if budget is None:
+        return ops
+    return max(1, min(ops, budget // size))
+
+# --------------------------------------
+# Running and comparing
+# --------------------------------------
+
+# Runs the workloads named (all, if None) on the targets named (all, if None) at each size, and returns the results in
+# a Python list of dicts, with keys 'workload', 'target', 'size', 'ops' and 'us_per_op'. Each workload (except sort) is
+# timed repeat times, and the fastest run kept. report, if given, is called with each result as it comes.
+def run_benchmarks(sizes=None, targets=None, workloads=None, ops=DEFAULT_OPS, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED,
+                   report=None):
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    targets = list(TARGETS) if targets is None else targets
+    for name in targets:
+        if name not in TARGETS:
+            raise ValueError("unknown benchmark target: {}".format(name))
+    workloads = [w[0] for w in WORKLOADS] if workloads is None else workloads
+    for name in workloads:
+        if name not in [w[0] for w in WORKLOADS]:
+            raise ValueError("unknown benchmark workload: {}".format(name))
+    results = []
+    for size in sizes:
+        items = list(range(size))
+        random.Random(seed).shuffle(items)
+        for target in targets:
+            build, get_ops = TARGETS[target]
+            container = build(items)
+            target_ops = get_ops(container)
+            for name, func, needed, budget, repeatable in WORKLOADS:
+                if name not in workloads or any(op not in target_ops for op in needed):
+                    continue
+                count = op_count(ops, size, budget)
+                rand = random.Random(seed)
+                best = None
+                for run in range(repeat if repeatable else 1):
+                    seconds, done = func(target_ops, container, size, count, rand)
+                    us_per_op = seconds / done * 1e6
+                    best = us_per_op if best is None else min(best, us_per_op)
+                result = {'workload': name, 'target': target, 'size': size, 'ops': count, 'us_per_op': best}
+                results.append(result)
+                if report is not None:
+                    report(result)
+            # Let the container go before the next is built
+            container = target_ops = None
+    return results
+
+# Returns a dict describing the machine the benchmarks ran on, to store with the results
+def machine_info():
+    return {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'platform': platform.platform(), 'machine': platform.machine(),
+            'time': time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+# Writes results, as returned by run_benchmarks(), to a JSON file at path
+def save_results(path, results, seed=None):
+    document = {'format': RESULTS_FORMAT, 'info': machine_info(), 'seed': seed, 'results': results}
+    with open(path, 'w') as fp:
+        json.dump(document, fp, indent=1)
+
+# Reads results saved by save_results(). Raises ValueError if the file isn't in that format.
+def load_results(path):
+    with open(path) as fp:
+        document = json.load(fp)
+    if not isinstance(document, dict) or document.get('format') != RESULTS_FORMAT:
+        raise ValueError("not a benchmark results file: {}".format(path))
+    return document['results']
+
+# Compares results against baseline results, matching them up by workload, target and size (results without a match
+# are left out). Returns a Python list of (result, baseline result, ratio of times) for each that's slower than the
+# baseline by more than tolerance (0.25 allows 25% slower), slowest first.
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    baseline_by_key = {(b['workload'], b['target'], b['size']): b for b in baseline}
+    slower = []
+    for result in results:
+        base = baseline_by_key.get((result['workload'], result['target'], result['size']))
+        if base is None or base['us_per_op'] <= 0:
+            continue
+        ratio = result['us_per_op'] / base['us_per_op']
+        if ratio > 1 + tolerance:
+            slower.append((result, base, ratio))
+    slower.sort(key=lambda s: s[2], reverse=True)
+    return slower
+
+# Prints results as a table: a row for each workload and size, and a column for each target, in microseconds per
+# operation
+def print_table(results):
+    targets = []
+    rows = {}
+    for result in results:
+        if result['target'] not in targets:
+            targets.append(result['target'])
+        rows.setdefault((result['workload'], result['size']), {})[result['target']] = result['us_per_op']
+    print("{:22s} {:>9s}".format("us per op", "size") + "".join(" {:>16s}".format(t) for t in targets))
+    for (workload, size), times in rows.items():
+        cells = ["{:16.3f}".format(times[t]) if t in times else "{:>16s}".format("-") for t in targets]
+        print("{:22s} {:>9d} ".format(workload, size) + " ".join(cells))
+
+# Runs the benchmarks as asked for by the --bench arguments of the linked_list script: prints the results, saves them
+# if asked to, and compares them against a baseline if one is given. Returns the number of regressions found (not
+# counting REFERENCE_TARGETS). The seed is DEFAULT_SEED unless one is given (with --seed), so that the runs compared
+# shuffle the same way.
+def run_bench_mode(args, seed, verbosity):
+    if seed is None:
+        seed = DEFAULT_SEED
+    sizes = None if args.bench_sizes is None else [int(float(s)) for s in args.bench_sizes.split(",")]
+    targets = None if args.bench_targets is None else args.bench_targets.split(",")
+    workloads = None if args.bench_workloads is None else args.bench_workloads.split(",")
+
+    def report(result):
+        print("  {:22s} {:>9d} {:16s} {:12.3f} us".format(result['workload'], result['size'], result['target'],
+                                                           result['us_per_op']))
+    results = run_benchmarks(sizes, targets, workloads, args.bench_ops, args.bench_repeat, seed,
+                             report if verbosity == 0 else None)
+    if verbosity < 2:
+        print("")
+        print_table(results)
+    if args.bench_output is not None:
+        save_results(args.bench_output, results, seed)
+    if args.bench_baseline is None:
+        return 0
+    slower = compare_results(results, load_results(args.bench_baseline), args.bench_tolerance)
+    regressions = 0
+    for result, base, ratio in slower:
+        reference = result['target'] in REFERENCE_TARGETS
+        if not reference:
+            regressions = regressions + 1
+        print("{} {} {} at size {}: {:.3f} us, was {:.3f} us ({:.2f}x)".format(
+            "SLOWER (reference)" if reference else "REGRESSION", result['workload'], result['target'],
+            result['size'], result['us_per_op'], base['us_per_op'], ratio))
+    print("{} regression(s) against {}".format(regressions, args.bench_baseline))
+    return regressions
@@ -1,4 +1,6 @@
-from linked_list_pkg import LinkedList
+from linked_list_pkg import (LinkedList, CompactLinkedList, UnrolledLinkedList, ConcurrentLinkedList,
+                             AsyncLinkedList, MappedLinkedList, LFUCache)
+from linked_list_pkg.mapped_list import NO_RECORD, NEXT, PREV, FREE
 
 validity_failure = False
 
@@ -48,9 +50,10 @@ class TestList(LinkedList):
     MEDIUM = 1
     HIGH = 2
 
-    def __init__(self, iterable=None):
+    def __init__(self, iterable=None, index_mode='cache', hash_index=False, hash_key=None, cache_policy='mixed',
+                 finger_count=LinkedList.DEFAULT_FINGER_COUNT, node_pool=0):
         self.verbosity = TestList.LOW
-        super().__init__(iterable)
+        super().__init__(iterable, index_mode, hash_index, hash_key, cache_policy, finger_count, node_pool)
         self.last_operation_str = "" # a string representation of the last operation, e.g. "add_tail"
 
     # The decorated functions wrap the same functions in base class. In each case, the expected_list parameter
@@ -64,17 +67,32 @@ class TestList(LinkedList):
     @test_function_decorator
     def add_head(self, item, expected_list=None):
         self.last_operation_str = "add_head, item={}".format(item)
-        super().add_head(item)
+        return super().add_head(item)
 
     @test_function_decorator
     def add_tail(self, item, expected_list=None):
         self.last_operation_str = "add_tail, item={}".format(item)
-        super().add_tail(item)
+        return super().add_tail(item)
 
     @test_function_decorator
     def insert(self, item, index=0, expected_list=None):
         self.last_operation_str = "insert, item={} at {}".format(item, index)
-        super().insert(item, index)
+        return super().insert(item, index)
+
+    @test_function_decorator
+    def extend(self, iterable, expected_list=None):
+        self.last_operation_str = "extend"
+        super().extend(iterable)
+
+    @test_function_decorator
+    def extend_head(self, iterable, expected_list=None):
+        self.last_operation_str = "extend_head"
+        super().extend_head(iterable)
+
+    @test_function_decorator
+    def insert_many(self, index, iterable, expected_list=None):
+        self.last_operation_str = "insert_many at {}".format(index)
+        super().insert_many(index, iterable)
 
     @test_function_decorator
     def pop_head(self, expected_list=None):
@@ -91,6 +109,41 @@ class TestList(LinkedList):
         self.last_operation_str = "remove, index={}".format(index)
         return super().remove(index)
 
+    @test_function_decorator
+    def remove_value(self, item, expected_list=None):
+        self.last_operation_str = "remove_value, item={}".format(item)
+        return super().remove_value(item)
+
+    @test_function_decorator
+    def remove_at(self, indices, expected_list=None):
+        self.last_operation_str = "remove_at, {} indices".format(len(indices))
+        return super().remove_at(indices)
+
+    @test_function_decorator
+    def remove_if(self, pred, expected_list=None):
+        self.last_operation_str = "remove_if"
+        return super().remove_if(pred)
+
+    @test_function_decorator
+    def retain(self, pred, expected_list=None):
+        self.last_operation_str = "retain"
+        return super().retain(pred)
+
+    @test_function_decorator
+    def dedupe(self, key=None, consecutive=False, expected_list=None):
+        self.last_operation_str = "dedupe, consecutive={}".format(consecutive)
+        return super().dedupe(key, consecutive)
+
+    @test_function_decorator
+    def remove_all(self, value, expected_list=None):
+        self.last_operation_str = "remove_all, value={}".format(value)
+        return super().remove_all(value)
+
+    @test_function_decorator
+    def set_items_at(self, indices, items, expected_list=None):
+        self.last_operation_str = "set_items_at, {} indices".format(len(indices))
+        super().set_items_at(indices, items)
+
     @test_function_decorator
     def get_item(self, index, expected_list=None):
         self.last_operation_str = "get_item, index={}".format(index)
@@ -105,12 +158,17 @@ class TestList(LinkedList):
     def copy(self, expected_list=None):
         self.last_operation_str = "copy"
         result = super().copy()
-        return TestList(result.get_items()) # A bit of a hack, but fine for testing
+        return TestList(result.get_items(), self.index_mode) # A bit of a hack, but fine for testing
 
     @test_function_decorator
-    def sort(self, reverse=False, val_func=None, expected_list=None):
+    def sort(self, reverse=False, val_func=None, key=None, expected_list=None):
         self.last_operation_str = "sort"
-        return super().sort(reverse, val_func)
+        return super().sort(reverse, val_func, key)
+
+    @test_function_decorator
+    def parallel_sort(self, reverse=False, key=None, workers=None, executor=None, expected_list=None):
+        self.last_operation_str = "parallel_sort"
+        return super().parallel_sort(reverse, key, workers, executor)
 
     @test_function_decorator
     def join(self, other_list, expected_list=None):
@@ -121,7 +179,7 @@ class TestList(LinkedList):
     def split(self, index, expected_list=None):
         self.last_operation_str = "split"
         result = super().split(index)
-        return TestList(result.get_items()) # A bit of a hack, but fine for testing
+        return TestList(result.get_items(), self.index_mode) # A bit of a hack, but fine for testing
 
     def change_cache_entry(self, cache_idx, new_list_idx=None, clear_node=True):
         if cache_idx < 0 or cache_idx >= len(self.cached_nodes): return
@@ -186,4 +244,193 @@ class TestList(LinkedList):
                 if node is not self.cached_nodes[n].node:
                     error_str = "cached node doesn't match index"
                     return False, error_str
+        if len(self._fingers) > self.finger_count:
+            return False, "too many fingers"
+        if len(self._free_nodes) > self.node_pool:
+            return False, "too many pooled nodes"
+        if len(self._free_nodes) > 0:
+            # Pooled nodes must be scrubbed, and not in the list
+            list_nodes = set(id(node) for node in self._get_nodes())
+            for node in self._free_nodes:
+                if node.item is not None or node.next is not None or node.prev is not None:
+                    return False, "pooled node not scrubbed"
+                if id(node) in list_nodes:
+                    return False, "pooled node still in list"
+        for finger in self._fingers:
+            node = self.head
+            for i in range(finger.idx):
+                if node is None: break
+                node = node.next
+            if node is None or node is not finger.node:
+                return False, "finger doesn't match index"
+            if self._stale_from is not None and finger.idx >= self._stale_from:
+                return False, "finger in stale part of list"
+        if self._stale_from is not None:
+            # Cache entries must stop short of the stale part of the list
+            for cache_entry in self.cached_nodes:
+                if cache_entry.idx >= self._stale_from:
+                    return False, "cached node in stale part of list"
+        elif self._order_index is not None:
+            valid, error_str = self._order_index.validate(self.head, self.size())
+            if not valid:
+                return False, error_str
+        if self._hash_index is not None:
+            # Every node must be in the hash index under its key, and there must be nothing else in it
+            hashed_count, unhashable_count, node = 0, 0, self.head
+            while node:
+                try:
+                    bucket = self._hash_index.buckets.get(self._hash_index._key_of(node.item), {})
+                except TypeError:
+                    unhashable_count = unhashable_count + 1
+                else:
+                    if node not in bucket:
+                        return False, "node missing from hash index"
+                    hashed_count = hashed_count + 1
+                node = node.next
+            if hashed_count != sum(len(bucket) for bucket in self._hash_index.buckets.values()):
+                return False, "extra nodes in hash index"
+            if unhashable_count != self._hash_index.unhashable_count:
+                return False, "bad unhashable count"
         return True, ""
+
+# Debugging feature for CompactLinkedList; tests the list for validity. Returns False if list invalid, error code
+# string. Every slot must be either in the chain of nodes or on the free list, not both.
+def validate_compact(compact_list):
+    in_chain = set()
+    count, slot, prev_slot = 0, compact_list.head, -1
+    while slot != -1:
+        if slot in in_chain:
+            return False, "loop in list"
+        if compact_list._prev[slot] != prev_slot:
+            return False, "bad prev link"
+        in_chain.add(slot)
+        prev_slot = slot
+        slot = compact_list._next[slot]
+        count = count + 1
+    if count != compact_list.size():
+        return False, "bad length, forward"
+    if prev_slot != compact_list.tail:
+        return False, "bad tail"
+    free_slots = set(compact_list._free)
+    if len(free_slots) != len(compact_list._free) or free_slots & in_chain:
+        return False, "bad free list"
+    if len(free_slots) + len(in_chain) != len(compact_list._items):
+        return False, "slot neither used nor free"
+    return True, ""
+
+# Debugging feature for UnrolledLinkedList; tests the list for validity. Returns False if list invalid, error code
+# string.
+def validate_unrolled(unrolled_list):
+    count, block, prev_block = 0, unrolled_list.head, None
+    while block is not None:
+        if block.prev is not prev_block:
+            return False, "bad prev link"
+        if len(block.items) == 0:
+            return False, "empty block"
+        if len(block.items) > unrolled_list.block_capacity:
+            return False, "block over capacity"
+        if unrolled_list.typecode is None and type(block.items) is not list:
+            return False, "untyped block not a list"
+        if unrolled_list.typecode is not None and getattr(block.items, 'typecode', None) != unrolled_list.typecode:
+            return False, "block of wrong type"
+        count = count + len(block.items)
+        prev_block = block
+        block = block.next
+    if count != unrolled_list.size():
+        return False, "bad length"
+    if prev_block is not unrolled_list.tail:
+        return False, "bad tail"
+    return True, ""
+
+# Debugging feature for MappedLinkedList; tests the list for validity. Returns False if list invalid, error code
+# string. Every record in use must be either in the list or on the free list, and every item must be in the heap.
+def validate_mapped(mapped_list):
+    count, slot, prev_slot = 0, mapped_list.head, NO_RECORD
+    while slot != NO_RECORD:
+        if mapped_list._field(slot, PREV) != prev_slot:
+            return False, "bad prev link"
+        offset, length = mapped_list._item_ref(slot)
+        if length < 0 or offset + length > mapped_list._heap_end:
+            return False, "item outside heap"
+        count = count + 1
+        if count > mapped_list.size():
+            return False, "loop in list"
+        prev_slot = slot
+        slot = mapped_list._field(slot, NEXT)
+    if count != mapped_list.size():
+        return False, "bad length"
+    if prev_slot != mapped_list.tail:
+        return False, "bad tail"
+    free_count, slot = 0, mapped_list._free
+    while slot != NO_RECORD:
+        if mapped_list._item_ref(slot)[1] != FREE:
+            return False, "free record in use"
+        free_count = free_count + 1
+        if free_count > mapped_list._record_count:
+            return False, "loop in free list"
+        slot = mapped_list._field(slot, NEXT)
+    if count + free_count != mapped_list._record_count:
+        return False, "records lost"
+    return True, ""
+
+# Debugging feature for ConcurrentLinkedList; tests the list for validity. Returns False if list invalid, error code
+# string. Only call it while no other thread is using the list.
+def validate_concurrent(concurrent_list):
+    count, node, prev_node = 0, concurrent_list._dummy.next, concurrent_list._dummy
+    while node is not None:
+        if node.prev is not prev_node:
+            return False, "bad prev link"
+        count = count + 1
+        prev_node = node
+        node = node.next
+    if count != concurrent_list.size():
+        return False, "bad length"
+    if prev_node is not concurrent_list._tail:
+        return False, "bad tail"
+    if concurrent_list.capacity is not None and count > concurrent_list.capacity:
+        return False, "over capacity"
+    return True, ""
+
+# Debugging feature for LRUCache and LFUCache; tests the cache for validity. Returns False if cache invalid, error code
+# string.
+def validate_cache(cache):
+    if isinstance(cache, LFUCache):
+        rings = []
+        bucket, prev_bucket = cache._buckets.next, cache._buckets
+        while bucket is not cache._buckets:
+            if bucket.prev is not prev_bucket:
+                return False, "bad bucket prev link"
+            if prev_bucket is not cache._buckets and bucket.count <= prev_bucket.count:
+                return False, "bucket counts out of order"
+            if bucket.entries.next is bucket.entries:
+                return False, "empty bucket"
+            rings.append((bucket.entries, bucket))
+            prev_bucket = bucket
+            bucket = bucket.next
+        if cache._buckets.prev is not prev_bucket:
+            return False, "bad last bucket"
+    else:
+        rings = [(cache._root, None)]
+    count, weight = 0, 0
+    for root, bucket in rings:
+        node, prev_node = root.next, root
+        while node is not root:
+            if node.prev is not prev_node:
+                return False, "bad prev link"
+            if cache._nodes.get(node.key) is not node:
+                return False, "node not in dict"
+            if bucket is not None and node.bucket is not bucket:
+                return False, "bad bucket"
+            count = count + 1
+            weight = weight + node.weight
+            prev_node = node
+            node = node.next
+        if root.prev is not prev_node:
+            return False, "bad last node"
+    if count != len(cache._nodes):
+        return False, "bad length"
+    if weight != cache.weight:
+        return False, "bad weight"
+    if weight > cache.capacity:
+        return False, "over capacity"
+    return True, ""